@@ -30,6 +30,25 @@ COMMENT ON COLUMN companies.company_name IS 'Unique name of the company/platoon'
 COMMENT ON COLUMN companies.location IS 'Physical location or barracks assignment';
 COMMENT ON COLUMN companies.commanding_officer IS 'Name of the officer in charge';
 
+-- =====================================================
+-- SERVICE NUMBER ALLOCATION (Used by: students)
+-- =====================================================
+-- Purpose: Collision-free service numbers drawn from a sequence.
+--          Starts at 1000000 so allocated numbers (SN-1000000+) never
+--          clash with legacy SN-XXXX / SN-XXXXX / SN-YYYY-XXXX values.
+-- =====================================================
+
+CREATE SEQUENCE seq_service_number
+    START WITH 1000000
+    CACHE 100;
+
+CREATE OR REPLACE FUNCTION fn_next_service_number()
+RETURNS VARCHAR AS $$
+    SELECT 'SN-' || nextval('seq_service_number')::TEXT;
+$$ LANGUAGE sql;
+
+COMMENT ON SEQUENCE seq_service_number IS 'Backs fn_next_service_number and sp_allocate_service_numbers';
+
 -- =====================================================
 -- 2. STUDENTS TABLE (Depends on: companies)
 -- =====================================================
@@ -39,7 +58,7 @@ COMMENT ON COLUMN companies.commanding_officer IS 'Name of the officer in charge
 CREATE TABLE students (
     student_id      SERIAL PRIMARY KEY,
     company_id      INTEGER,
-    service_number  VARCHAR(20) NOT NULL,
+    service_number  VARCHAR(20) NOT NULL DEFAULT fn_next_service_number(),
     first_name      VARCHAR(50) NOT NULL,
     last_name       VARCHAR(50) NOT NULL,
     date_of_birth   DATE NOT NULL,
@@ -72,7 +91,7 @@ CREATE TABLE students (
 COMMENT ON TABLE students IS 'Official personnel records for all cadets/trainees';
 COMMENT ON COLUMN students.student_id IS 'Primary key - auto-generated student identifier';
 COMMENT ON COLUMN students.company_id IS 'Foreign key to companies table';
-COMMENT ON COLUMN students.service_number IS 'Unique military/academy service number';
+COMMENT ON COLUMN students.service_number IS 'Unique military/academy service number (defaults to next SN from seq_service_number)';
 COMMENT ON COLUMN students.first_name IS 'Student first name';
 COMMENT ON COLUMN students.last_name IS 'Student last name/surname';
 COMMENT ON COLUMN students.date_of_birth IS 'Date of birth for age verification';
@@ -126,6 +145,8 @@ CREATE TABLE enrollments (
     completion_date DATE,
     final_score     DECIMAL(5,2),
     grade_letter    CHAR(2),
+    weighted_sum    NUMERIC(12,4) NOT NULL DEFAULT 0,
+    weight_total    NUMERIC(10,2) NOT NULL DEFAULT 0,
     status          VARCHAR(20) DEFAULT 'In Progress',
     created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -160,6 +181,8 @@ COMMENT ON COLUMN enrollments.start_date IS 'Date enrollment began';
 COMMENT ON COLUMN enrollments.completion_date IS 'Date of completion (NULL if in progress)';
 COMMENT ON COLUMN enrollments.final_score IS 'Final calculated score (0-100)';
 COMMENT ON COLUMN enrollments.grade_letter IS 'Final letter grade (A+ through F)';
+COMMENT ON COLUMN enrollments.weighted_sum IS 'Running SUM(score * weight) of the enrollment''s grades (trigger-maintained)';
+COMMENT ON COLUMN enrollments.weight_total IS 'Running SUM(weight) of the enrollment''s grades (trigger-maintained)';
 
 -- =====================================================
 -- 5. GRADES TABLE (Depends on: enrollments)
@@ -201,10 +224,14 @@ COMMENT ON COLUMN grades.weight IS 'Weight factor for final grade calculation (0
 -- 6. ATTENDANCE TABLE (Depends on: students, courses)
 -- =====================================================
 -- Purpose: Track daily presence (muster rolls)
+-- Partitioned by month of muster_date (attendance_pYYYYMM). Monthly
+-- partitions are created/detached by sp_ensure_attendance_partitions and
+-- sp_archive_attendance_partitions (11_stored_procs.sql); rows outside
+-- every month partition land in attendance_default.
 -- =====================================================
 
 CREATE TABLE attendance (
-    attendance_id   SERIAL PRIMARY KEY,
+    attendance_id   SERIAL,
     student_id      INTEGER NOT NULL,
     course_id       INTEGER NOT NULL,
     muster_date     DATE NOT NULL,
@@ -212,13 +239,18 @@ CREATE TABLE attendance (
     remarks         TEXT,
     recorded_by     VARCHAR(100),
     created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
     -- Check Constraints
     CONSTRAINT chk_attendance_status CHECK (status IN ('Present', 'Absent', 'Late', 'AWOL', 'Excused')),
     CONSTRAINT chk_attendance_date CHECK (muster_date <= CURRENT_DATE),
     
-    -- Unique Constraint (one record per student/course/day)
-    CONSTRAINT uq_attendance_student_course_date UNIQUE (student_id, course_id, muster_date),
+    -- Primary Key (must include the partition key)
+    CONSTRAINT pk_attendance PRIMARY KEY (attendance_id, muster_date),
+
+    -- Unique Constraint (one record per student/course/day); status is
+    -- carried in the index so per student/course status counts are index-only
+    CONSTRAINT uq_attendance_student_course_date UNIQUE (student_id, course_id, muster_date) INCLUDE (status),
     
     -- Foreign Key Constraints
     CONSTRAINT fk_attendance_student 
@@ -231,15 +263,118 @@ CREATE TABLE attendance (
         REFERENCES courses(course_id) 
         ON DELETE RESTRICT 
         ON UPDATE CASCADE
-);
+) PARTITION BY RANGE (muster_date);
+
+CREATE TABLE attendance_default PARTITION OF attendance DEFAULT;
 
 COMMENT ON TABLE attendance IS 'Daily muster/attendance records for accountability';
-COMMENT ON COLUMN attendance.attendance_id IS 'Primary key - auto-generated attendance identifier';
+COMMENT ON COLUMN attendance.attendance_id IS 'Auto-generated attendance identifier (primary key with muster_date)';
 COMMENT ON COLUMN attendance.student_id IS 'Foreign key to students table';
 COMMENT ON COLUMN attendance.course_id IS 'Foreign key to courses table';
 COMMENT ON COLUMN attendance.muster_date IS 'Date of attendance record';
 COMMENT ON COLUMN attendance.status IS 'Attendance status (Present, Absent, Late, AWOL, Excused)';
 
+-- =====================================================
+-- 6a. ATTENDANCE_DAILY_ROLLUP TABLE (Depends on: courses)
+-- =====================================================
+-- Purpose: Per course/day muster counters, maintained by the attendance
+--          triggers below so daily reports never scan raw attendance
+-- =====================================================
+
+CREATE TABLE attendance_daily_rollup (
+    course_id       INTEGER NOT NULL,
+    muster_date     DATE NOT NULL,
+    present_count   INTEGER NOT NULL DEFAULT 0,
+    absent_count    INTEGER NOT NULL DEFAULT 0,
+    late_count      INTEGER NOT NULL DEFAULT 0,
+    awol_count      INTEGER NOT NULL DEFAULT 0,
+    excused_count   INTEGER NOT NULL DEFAULT 0,
+    total_records   INTEGER NOT NULL DEFAULT 0,
+    last_updated    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT pk_attendance_daily_rollup PRIMARY KEY (course_id, muster_date),
+
+    -- Foreign Key Constraints
+    CONSTRAINT fk_attendance_rollup_course
+        FOREIGN KEY (course_id)
+        REFERENCES courses(course_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+COMMENT ON TABLE attendance_daily_rollup IS 'Trigger-maintained attendance counters per course and muster date';
+COMMENT ON COLUMN attendance_daily_rollup.total_records IS 'Attendance rows for the course/day (0 once all are deleted)';
+COMMENT ON COLUMN attendance_daily_rollup.last_updated IS 'Time of the last change applied to this course/day';
+
+-- =====================================================
+-- 6b. ATTENDANCE COUNTER TABLES (Depends on: students, courses)
+-- =====================================================
+-- Purpose: Trigger-maintained per (student, course) attendance counters.
+--   attendance_rolling_counters: running (prefix) present/total counts at
+--     each muster date, so the counts for any trailing window are the
+--     latest row minus the last row before the window (two index probes).
+--     Partitioned by month like attendance; sp_archive_attendance_partitions
+--     drops a month's counters when it archives that month's attendance,
+--     folding each pair's last archived counts into archived_present/total.
+--   attendance_counter_totals: all-time counts, one row per pair
+-- =====================================================
+
+CREATE TABLE attendance_rolling_counters (
+    student_id      INTEGER NOT NULL,
+    course_id       INTEGER NOT NULL,
+    muster_date     DATE NOT NULL,
+    cum_present     INTEGER NOT NULL,
+    cum_total       INTEGER NOT NULL,
+
+    CONSTRAINT pk_attendance_rolling_counters PRIMARY KEY (student_id, course_id, muster_date),
+
+    -- Foreign Key Constraints
+    CONSTRAINT fk_attendance_rolling_student
+        FOREIGN KEY (student_id)
+        REFERENCES students(student_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+    CONSTRAINT fk_attendance_rolling_course
+        FOREIGN KEY (course_id)
+        REFERENCES courses(course_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+) PARTITION BY RANGE (muster_date);
+
+CREATE TABLE attendance_rolling_counters_default PARTITION OF attendance_rolling_counters DEFAULT;
+
+CREATE TABLE attendance_counter_totals (
+    student_id      INTEGER NOT NULL,
+    course_id       INTEGER NOT NULL,
+    present_count   INTEGER NOT NULL DEFAULT 0,
+    total_count     INTEGER NOT NULL DEFAULT 0,
+    archived_present INTEGER NOT NULL DEFAULT 0,
+    archived_total  INTEGER NOT NULL DEFAULT 0,
+    last_date       DATE,
+    last_updated    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT pk_attendance_counter_totals PRIMARY KEY (student_id, course_id),
+
+    -- Foreign Key Constraints
+    CONSTRAINT fk_attendance_totals_student
+        FOREIGN KEY (student_id)
+        REFERENCES students(student_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+    CONSTRAINT fk_attendance_totals_course
+        FOREIGN KEY (course_id)
+        REFERENCES courses(course_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+COMMENT ON TABLE attendance_rolling_counters IS 'Running Present/total attendance counts per student, course and muster date';
+COMMENT ON COLUMN attendance_rolling_counters.cum_present IS 'Present sessions on or before muster_date';
+COMMENT ON COLUMN attendance_rolling_counters.cum_total IS 'Recorded sessions on or before muster_date';
+COMMENT ON TABLE attendance_counter_totals IS 'All-time Present/total attendance counts per student and course';
+COMMENT ON COLUMN attendance_counter_totals.archived_present IS 'Present sessions in archived attendance partitions (base of the running counters)';
+COMMENT ON COLUMN attendance_counter_totals.archived_total IS 'Recorded sessions in archived attendance partitions';
+
 -- =====================================================
 -- 7. PERFORMANCE_SUMMARY TABLE (Depends on: students)
 -- =====================================================
@@ -280,6 +415,37 @@ COMMENT ON COLUMN performance_summary.attendance_rate IS 'Overall attendance per
 COMMENT ON COLUMN performance_summary.total_credits IS 'Total credits earned';
 COMMENT ON COLUMN performance_summary.current_standing IS 'Current academic/disciplinary standing';
 
+-- =====================================================
+-- 7a. COMPANY_READINESS_SUMMARY TABLE (Depends on: companies)
+-- =====================================================
+-- Purpose: Per-company readiness metrics for the readiness ledger, kept in
+-- step with performance_summary by the triggers further down
+-- =====================================================
+
+CREATE TABLE company_readiness_summary (
+    company_id      INTEGER PRIMARY KEY,
+    student_count   INTEGER NOT NULL DEFAULT 0,
+    graded_count    INTEGER NOT NULL DEFAULT 0,
+    gpa_sum         NUMERIC(12,2) NOT NULL DEFAULT 0,
+    good_count      INTEGER NOT NULL DEFAULT 0,
+    avg_gpa         NUMERIC GENERATED ALWAYS AS (gpa_sum / NULLIF(graded_count, 0)) STORED,
+    last_updated    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    -- Foreign Key Constraints
+    CONSTRAINT fk_readiness_company
+        FOREIGN KEY (company_id)
+        REFERENCES companies(company_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+COMMENT ON TABLE company_readiness_summary IS 'Per-company performance_summary aggregates (maintained by triggers)';
+COMMENT ON COLUMN company_readiness_summary.student_count IS 'Students in the company with a performance_summary row';
+COMMENT ON COLUMN company_readiness_summary.graded_count IS 'Of those, students with a GPA';
+COMMENT ON COLUMN company_readiness_summary.gpa_sum IS 'Sum of GPA over graded students';
+COMMENT ON COLUMN company_readiness_summary.good_count IS 'Students whose standing starts with Good';
+COMMENT ON COLUMN company_readiness_summary.avg_gpa IS 'gpa_sum / graded_count';
+
 -- =====================================================
 -- 8. ATTRITION_RISK TABLE (Depends on: students)
 -- =====================================================
@@ -317,6 +483,47 @@ COMMENT ON COLUMN attrition_risk.risk_score IS 'Risk score from ML model (0-100)
 COMMENT ON COLUMN attrition_risk.risk_level IS 'Categorized risk level (Low/Medium/High/Critical)';
 COMMENT ON COLUMN attrition_risk.contributing_factors IS 'JSON or text description of risk factors';
 
+-- =====================================================
+-- 9. MATERIALIZED_VIEW_REFRESHES TABLE (No dependencies)
+-- =====================================================
+-- Purpose: When each materialized view was last refreshed. Kept outside the
+--          views so a CONCURRENTLY refresh only rewrites rows whose data changed
+-- =====================================================
+
+CREATE TABLE materialized_view_refreshes (
+    view_name       VARCHAR(63) PRIMARY KEY,
+    refreshed_at    TIMESTAMP NOT NULL
+);
+
+COMMENT ON TABLE materialized_view_refreshes IS 'Last refresh time per materialized view';
+
+-- =====================================================
+-- 10. TABLE_CHANGES TABLE (No dependencies)
+-- =====================================================
+-- Purpose: Transactional change log, one row per write statement on the
+--          logged tables (see CHANGE LOG AND NOTIFICATIONS). txid is the writing
+--          transaction, so a reader holding an earlier txid_current_snapshot()
+--          finds exactly the changes committed since, whatever order their
+--          ids or timestamps were assigned in
+-- =====================================================
+
+CREATE TABLE table_changes (
+    change_id       BIGSERIAL PRIMARY KEY,
+    table_name      VARCHAR(63) NOT NULL,
+    op              VARCHAR(8) NOT NULL,
+    txid            BIGINT NOT NULL DEFAULT txid_current(),
+    keys            BIGINT[],
+    changed_at      TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX idx_table_changes_txid ON table_changes(txid);
+-- Per-table count/max/sum for the report cache's data versions
+CREATE INDEX idx_table_changes_table ON table_changes(table_name, change_id);
+
+COMMENT ON TABLE table_changes IS 'Trigger-maintained log of write statements on the core tables';
+COMMENT ON COLUMN table_changes.txid IS 'Writing transaction (txid_current); compare with txid_visible_in_snapshot';
+COMMENT ON COLUMN table_changes.keys IS 'Primary keys written by the statement; NULL on TRUNCATE or above the key cap';
+
 -- =====================================================
 -- AUTO-UPDATE TRIGGER FOR updated_at COLUMNS
 -- =====================================================
@@ -346,6 +553,687 @@ CREATE TRIGGER trg_enrollments_updated_at
     BEFORE UPDATE ON enrollments 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER trg_attendance_updated_at
+    BEFORE UPDATE ON attendance
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- =====================================================
+-- ATTENDANCE ROLLUP MAINTENANCE
+-- =====================================================
+-- Statement-level triggers with transition tables: one aggregated upsert
+-- per statement, so bulk loads (COPY, multi-row INSERT) cost one pass over
+-- the changed rows rather than a rollup write per attendance row.
+
+CREATE OR REPLACE FUNCTION fn_attendance_rollup_apply()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta TEXT;
+BEGIN
+    -- Changed rows as (course_id, muster_date, status, +1/-1)
+    v_delta := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT course_id, muster_date, status, 1 AS sign FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT course_id, muster_date, status, -1 AS sign FROM old_rows'
+        ELSE 'SELECT course_id, muster_date, status, 1 AS sign FROM new_rows
+              UNION ALL
+              SELECT course_id, muster_date, status, -1 AS sign FROM old_rows'
+    END;
+
+    EXECUTE format($sql$
+        INSERT INTO attendance_daily_rollup AS r
+            (course_id, muster_date, present_count, absent_count, late_count,
+             awol_count, excused_count, total_records, last_updated)
+        SELECT course_id, muster_date,
+               COALESCE(SUM(n) FILTER (WHERE status = 'Present'), 0),
+               COALESCE(SUM(n) FILTER (WHERE status = 'Absent'), 0),
+               COALESCE(SUM(n) FILTER (WHERE status = 'Late'), 0),
+               COALESCE(SUM(n) FILTER (WHERE status = 'AWOL'), 0),
+               COALESCE(SUM(n) FILTER (WHERE status = 'Excused'), 0),
+               SUM(n),
+               CURRENT_TIMESTAMP
+        FROM (
+            SELECT course_id, muster_date, status, SUM(sign) AS n
+            FROM (%s) d
+            GROUP BY course_id, muster_date, status
+            HAVING SUM(sign) <> 0
+        ) net
+        GROUP BY course_id, muster_date
+        ON CONFLICT (course_id, muster_date) DO UPDATE SET
+            present_count = r.present_count + EXCLUDED.present_count,
+            absent_count  = r.absent_count  + EXCLUDED.absent_count,
+            late_count    = r.late_count    + EXCLUDED.late_count,
+            awol_count    = r.awol_count    + EXCLUDED.awol_count,
+            excused_count = r.excused_count + EXCLUDED.excused_count,
+            total_records = r.total_records + EXCLUDED.total_records,
+            last_updated  = EXCLUDED.last_updated
+    $sql$, v_delta);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_attendance_rollup_reset()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM attendance_daily_rollup;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_attendance_rollup_insert
+    AFTER INSERT ON attendance
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_attendance_rollup_apply();
+
+CREATE TRIGGER trg_attendance_rollup_update
+    AFTER UPDATE ON attendance
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_attendance_rollup_apply();
+
+CREATE TRIGGER trg_attendance_rollup_delete
+    AFTER DELETE ON attendance
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_attendance_rollup_apply();
+
+CREATE TRIGGER trg_attendance_rollup_truncate
+    AFTER TRUNCATE ON attendance
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_attendance_rollup_reset();
+
+-- =====================================================
+-- ATTENDANCE COUNTER MAINTENANCE
+-- =====================================================
+-- For each (student, course) touched by a statement, the running counters
+-- from the earliest changed muster date onward are recomputed from attendance
+-- on top of the last untouched counter row (or the pair's archived counts)
+-- and upserted; the newest row of each pair becomes its total in the same
+-- statement. Marking today's muster (the usual case) therefore writes a
+-- single counter row per pair. Only deletes, and updates that move a row to
+-- another student/course/date, need the extra clean-up statements.
+
+CREATE OR REPLACE FUNCTION fn_attendance_counters_apply()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_changed TEXT;
+    v_removed BOOLEAN := FALSE;
+BEGIN
+    -- Touched pairs and the earliest muster date changed for each
+    v_changed := format(
+        'SELECT student_id, course_id, MIN(muster_date) AS from_date FROM (%s) d GROUP BY student_id, course_id',
+        CASE TG_OP
+            WHEN 'INSERT' THEN 'SELECT student_id, course_id, muster_date FROM new_rows'
+            WHEN 'DELETE' THEN 'SELECT student_id, course_id, muster_date FROM old_rows'
+            ELSE 'SELECT student_id, course_id, muster_date FROM new_rows
+                  UNION ALL
+                  SELECT student_id, course_id, muster_date FROM old_rows'
+        END);
+
+    IF TG_OP = 'DELETE' THEN
+        v_removed := TRUE;
+    ELSIF TG_OP = 'UPDATE' THEN
+        v_removed := EXISTS (
+            SELECT 1 FROM old_rows o
+            WHERE NOT EXISTS (SELECT 1 FROM new_rows n
+                              WHERE n.student_id = o.student_id
+                                AND n.course_id = o.course_id
+                                AND n.muster_date = o.muster_date));
+    END IF;
+
+    -- Counter rows whose attendance row is gone
+    IF v_removed THEN
+        DELETE FROM attendance_rolling_counters r
+        USING old_rows o
+        WHERE r.student_id = o.student_id
+          AND r.course_id = o.course_id
+          AND r.muster_date = o.muster_date
+          AND NOT EXISTS (SELECT 1 FROM attendance a
+                          WHERE a.student_id = o.student_id
+                            AND a.course_id = o.course_id
+                            AND a.muster_date = o.muster_date);
+    END IF;
+
+    EXECUTE format($sql$
+        WITH base AS (
+            SELECT c.student_id, c.course_id, c.from_date,
+                   COALESCE(b.cum_present, t.archived_present, 0) AS cum_present,
+                   COALESCE(b.cum_total, t.archived_total, 0) AS cum_total
+            FROM (%s) c
+            LEFT JOIN attendance_counter_totals t
+              ON t.student_id = c.student_id AND t.course_id = c.course_id
+            LEFT JOIN LATERAL (
+                SELECT r.cum_present, r.cum_total
+                FROM attendance_rolling_counters r
+                WHERE r.student_id = c.student_id
+                  AND r.course_id = c.course_id
+                  AND r.muster_date < c.from_date
+                ORDER BY r.muster_date DESC
+                LIMIT 1
+            ) b ON TRUE
+        ),
+        counters AS (
+            INSERT INTO attendance_rolling_counters AS r
+                (student_id, course_id, muster_date, cum_present, cum_total)
+            SELECT a.student_id, a.course_id, a.muster_date,
+                   base.cum_present + SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) OVER w,
+                   base.cum_total + COUNT(*) OVER w
+            FROM base
+            JOIN attendance a
+              ON a.student_id = base.student_id
+             AND a.course_id = base.course_id
+             AND a.muster_date >= base.from_date
+            WINDOW w AS (PARTITION BY a.student_id, a.course_id ORDER BY a.muster_date)
+            ON CONFLICT (student_id, course_id, muster_date) DO UPDATE SET
+                cum_present = EXCLUDED.cum_present,
+                cum_total   = EXCLUDED.cum_total
+            RETURNING r.student_id, r.course_id, r.muster_date, r.cum_present, r.cum_total
+        )
+        INSERT INTO attendance_counter_totals AS t
+            (student_id, course_id, present_count, total_count, last_date, last_updated)
+        SELECT DISTINCT ON (student_id, course_id)
+               student_id, course_id, cum_present, cum_total, muster_date, CURRENT_TIMESTAMP
+        FROM counters
+        ORDER BY student_id, course_id, muster_date DESC
+        ON CONFLICT (student_id, course_id) DO UPDATE SET
+            present_count = EXCLUDED.present_count,
+            total_count   = EXCLUDED.total_count,
+            last_date     = EXCLUDED.last_date,
+            last_updated  = EXCLUDED.last_updated
+    $sql$, v_changed);
+
+    IF v_removed THEN
+        -- Pairs that lost their newest rows fall back to the last remaining
+        -- counter row, or to their archived counts; pairs left with neither
+        -- are removed (this also covers rows cascaded away with a student)
+        EXECUTE format($sql$
+            DELETE FROM attendance_counter_totals t
+            USING (%s) c
+            WHERE t.student_id = c.student_id
+              AND t.course_id = c.course_id
+              AND t.archived_total = 0
+              AND NOT EXISTS (SELECT 1 FROM attendance_rolling_counters r
+                              WHERE r.student_id = c.student_id AND r.course_id = c.course_id)
+        $sql$, v_changed);
+
+        EXECUTE format($sql$
+            UPDATE attendance_counter_totals t
+            SET present_count = COALESCE(l.cum_present, t.archived_present),
+                total_count   = COALESCE(l.cum_total, t.archived_total),
+                last_date     = l.muster_date,
+                last_updated  = CURRENT_TIMESTAMP
+            FROM (%s) c
+            LEFT JOIN LATERAL (
+                SELECT r.cum_present, r.cum_total, r.muster_date
+                FROM attendance_rolling_counters r
+                WHERE r.student_id = c.student_id
+                  AND r.course_id = c.course_id
+                ORDER BY r.muster_date DESC
+                LIMIT 1
+            ) l ON TRUE
+            WHERE t.student_id = c.student_id
+              AND t.course_id = c.course_id
+              AND t.last_date IS DISTINCT FROM l.muster_date
+        $sql$, v_changed);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_attendance_counters_reset()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM attendance_rolling_counters;
+    DELETE FROM attendance_counter_totals;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_attendance_counters_insert
+    AFTER INSERT ON attendance
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_attendance_counters_apply();
+
+CREATE TRIGGER trg_attendance_counters_update
+    AFTER UPDATE ON attendance
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_attendance_counters_apply();
+
+CREATE TRIGGER trg_attendance_counters_delete
+    AFTER DELETE ON attendance
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_attendance_counters_apply();
+
+CREATE TRIGGER trg_attendance_counters_truncate
+    AFTER TRUNCATE ON attendance
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_attendance_counters_reset();
+
+-- =====================================================
+-- ENROLLMENT GRADE TOTALS MAINTENANCE
+-- =====================================================
+-- Keeps enrollments.weighted_sum / weight_total equal to the SUM(score * weight)
+-- and SUM(weight) of their grades, so the weighted score is
+-- weighted_sum / weight_total without re-aggregating grades.
+
+CREATE OR REPLACE FUNCTION fn_grade_totals_apply()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta TEXT;
+BEGIN
+    -- Changed grades as (enrollment_id, +/- score*weight, +/- weight)
+    v_delta := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT enrollment_id, score * weight AS ws, weight AS w FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT enrollment_id, -(score * weight), -weight FROM old_rows'
+        ELSE 'SELECT enrollment_id, score * weight AS ws, weight AS w FROM new_rows
+              UNION ALL
+              SELECT enrollment_id, -(score * weight), -weight FROM old_rows'
+    END;
+
+    EXECUTE format($sql$
+        UPDATE enrollments e
+        SET weighted_sum = e.weighted_sum + d.ws,
+            weight_total = e.weight_total + d.w
+        FROM (
+            SELECT enrollment_id, SUM(ws) AS ws, SUM(w) AS w
+            FROM (%s) changed
+            GROUP BY enrollment_id
+        ) d
+        WHERE e.enrollment_id = d.enrollment_id
+          AND (d.ws <> 0 OR d.w <> 0)
+    $sql$, v_delta);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_grade_totals_reset()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE enrollments
+    SET weighted_sum = 0, weight_total = 0
+    WHERE weighted_sum <> 0 OR weight_total <> 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_grades_totals_insert
+    AFTER INSERT ON grades
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_grade_totals_apply();
+
+CREATE TRIGGER trg_grades_totals_update
+    AFTER UPDATE ON grades
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_grade_totals_apply();
+
+CREATE TRIGGER trg_grades_totals_delete
+    AFTER DELETE ON grades
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_grade_totals_apply();
+
+CREATE TRIGGER trg_grades_totals_truncate
+    AFTER TRUNCATE ON grades
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_grade_totals_reset();
+
+-- =====================================================
+-- COMPANY READINESS MAINTENANCE
+-- =====================================================
+-- performance_summary changes are applied to company_readiness_summary as
+-- per-company deltas. Students moving company, or deleted (their summary
+-- rows cascade away before the company can be looked up), have their old
+-- and new companies recounted instead.
+
+CREATE OR REPLACE FUNCTION fn_company_readiness_apply()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_delta TEXT;
+BEGIN
+    -- Changed summaries as (student_id, gpa, current_standing, +1/-1)
+    v_delta := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT student_id, gpa, current_standing, 1 AS sign FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT student_id, gpa, current_standing, -1 AS sign FROM old_rows'
+        ELSE 'SELECT student_id, gpa, current_standing, 1 AS sign FROM new_rows
+              UNION ALL
+              SELECT student_id, gpa, current_standing, -1 AS sign FROM old_rows'
+    END;
+
+    EXECUTE format($sql$
+        INSERT INTO company_readiness_summary AS r
+            (company_id, student_count, graded_count, gpa_sum, good_count, last_updated)
+        SELECT company_id, students, graded, gpa_sum, good, CURRENT_TIMESTAMP
+        FROM (
+            SELECT s.company_id,
+                   SUM(d.sign) AS students,
+                   COALESCE(SUM(d.sign) FILTER (WHERE d.gpa IS NOT NULL), 0) AS graded,
+                   COALESCE(SUM(d.sign * d.gpa), 0) AS gpa_sum,
+                   COALESCE(SUM(d.sign) FILTER (WHERE d.current_standing ILIKE 'Good%%'), 0) AS good
+            FROM (%s) d
+            JOIN students s ON s.student_id = d.student_id
+            WHERE s.company_id IS NOT NULL
+            GROUP BY s.company_id
+        ) net
+        WHERE students <> 0 OR graded <> 0 OR gpa_sum <> 0 OR good <> 0
+        ON CONFLICT (company_id) DO UPDATE SET
+            student_count = r.student_count + EXCLUDED.student_count,
+            graded_count  = r.graded_count  + EXCLUDED.graded_count,
+            gpa_sum       = r.gpa_sum       + EXCLUDED.gpa_sum,
+            good_count    = r.good_count    + EXCLUDED.good_count,
+            last_updated  = EXCLUDED.last_updated
+    $sql$, v_delta);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_company_readiness_recount()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_companies TEXT;
+BEGIN
+    -- Companies that lost or gained students in this statement
+    v_companies := CASE TG_OP
+        WHEN 'DELETE' THEN 'SELECT company_id FROM old_rows'
+        ELSE 'SELECT o.company_id FROM old_rows o JOIN new_rows n USING (student_id)
+              WHERE o.company_id IS DISTINCT FROM n.company_id
+              UNION ALL
+              SELECT n.company_id FROM old_rows o JOIN new_rows n USING (student_id)
+              WHERE o.company_id IS DISTINCT FROM n.company_id'
+    END;
+
+    EXECUTE format($sql$
+        INSERT INTO company_readiness_summary AS r
+            (company_id, student_count, graded_count, gpa_sum, good_count, last_updated)
+        SELECT co.company_id,
+               COUNT(ps.student_id),
+               COUNT(ps.gpa),
+               COALESCE(SUM(ps.gpa), 0),
+               COUNT(*) FILTER (WHERE ps.current_standing ILIKE 'Good%%'),
+               CURRENT_TIMESTAMP
+        FROM (SELECT DISTINCT company_id FROM (%s) c WHERE company_id IS NOT NULL) c
+        JOIN companies co ON co.company_id = c.company_id
+        LEFT JOIN students s ON s.company_id = co.company_id
+        LEFT JOIN performance_summary ps ON ps.student_id = s.student_id
+        GROUP BY co.company_id
+        ON CONFLICT (company_id) DO UPDATE SET
+            student_count = EXCLUDED.student_count,
+            graded_count  = EXCLUDED.graded_count,
+            gpa_sum       = EXCLUDED.gpa_sum,
+            good_count    = EXCLUDED.good_count,
+            last_updated  = EXCLUDED.last_updated
+    $sql$, v_companies);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION fn_company_readiness_reset()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM company_readiness_summary;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_performance_readiness_insert
+    AFTER INSERT ON performance_summary
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_company_readiness_apply();
+
+CREATE TRIGGER trg_performance_readiness_update
+    AFTER UPDATE ON performance_summary
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_company_readiness_apply();
+
+CREATE TRIGGER trg_performance_readiness_delete
+    AFTER DELETE ON performance_summary
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_company_readiness_apply();
+
+CREATE TRIGGER trg_performance_readiness_truncate
+    AFTER TRUNCATE ON performance_summary
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_company_readiness_reset();
+
+CREATE TRIGGER trg_students_readiness_update
+    AFTER UPDATE ON students
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_company_readiness_recount();
+
+CREATE TRIGGER trg_students_readiness_delete
+    AFTER DELETE ON students
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_company_readiness_recount();
+
+-- =====================================================
+-- CHANGE LOG AND NOTIFICATIONS
+-- =====================================================
+-- After each write statement on the core tables, one trigger reads the
+-- transition rows once and then:
+-- - logs a table_changes row with the primary keys written (TG_ARGV[0]; ''
+--   for tables that are not logged). Above 1000 keys, or on TRUNCATE, keys
+--   is NULL: readers (analytics snapshot, report cache, live dashboard)
+--   reload the table. Unlike the pg_stat_user_tables counters, the log is
+--   transactional: rows from aborted statements disappear and committed ones
+--   are visible at once. Rows older than a day are pruned by
+--   sp_prune_table_changes.
+-- - sends one NOTIFY on channel `data_changes` with the table, operation and
+--   the distinct values of the remaining trigger arguments, e.g.
+--     {"table": "attendance", "op": "INSERT", "keys": {"student_id": [4, 9], "course_id": [2]}}
+--   A key list is null when the statement touched more than 200 distinct
+--   values (or on TRUNCATE): listeners treat that as "anything in the table
+--   changed". Notifications are delivered on commit; src/database.py listens
+--   and invalidates its query cache. Tables without notify columns send none.
+
+CREATE OR REPLACE FUNCTION fn_table_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_log_max    CONSTANT INT := 1000;
+    v_notify_max CONSTANT INT := 200;
+    v_notify_cols TEXT[];
+    v_rows    TEXT;
+    v_aggs    TEXT[] := '{}';
+    v_col     TEXT;
+    v_count   BIGINT;
+    v_keys    BIGINT[];
+    v_key_map JSONB := '{}'::jsonb;
+BEGIN
+    v_notify_cols := TG_ARGV[1:TG_NARGS - 1];
+    IF TG_OP = 'TRUNCATE' THEN
+        FOREACH v_col IN ARRAY v_notify_cols LOOP
+            v_key_map := v_key_map || jsonb_build_object(v_col, NULL);
+        END LOOP;
+    ELSE
+        v_rows := CASE TG_OP
+            WHEN 'INSERT' THEN 'SELECT * FROM new_rows'
+            WHEN 'DELETE' THEN 'SELECT * FROM old_rows'
+            ELSE 'SELECT * FROM new_rows UNION ALL SELECT * FROM old_rows'
+        END;
+        FOREACH v_col IN ARRAY v_notify_cols LOOP
+            v_aggs := v_aggs || format('%L, COALESCE(jsonb_agg(DISTINCT %I) FILTER (WHERE %I IS NOT NULL), ''[]'')',
+                                       v_col, v_col, v_col);
+        END LOOP;
+
+        -- One pass over the transition rows for the logged and notified keys
+        EXECUTE format('SELECT COUNT(*), %s, jsonb_build_object(%s) FROM (%s) changed',
+                       CASE WHEN TG_ARGV[0] = '' THEN 'NULL::BIGINT[]'
+                            ELSE format('array_agg(DISTINCT %I::BIGINT)', TG_ARGV[0]) END,
+                       array_to_string(v_aggs, ', '), v_rows)
+            INTO v_count, v_keys, v_key_map;
+
+        -- Statements that matched no rows still fire; nothing to log or send
+        IF v_count = 0 THEN
+            RETURN NULL;
+        END IF;
+        IF cardinality(v_keys) > v_log_max THEN
+            v_keys := NULL;
+        END IF;
+        FOREACH v_col IN ARRAY v_notify_cols LOOP
+            IF jsonb_array_length(v_key_map -> v_col) > v_notify_max THEN
+                v_key_map := jsonb_set(v_key_map, ARRAY[v_col], 'null'::jsonb);
+            END IF;
+        END LOOP;
+    END IF;
+
+    IF TG_ARGV[0] <> '' THEN
+        INSERT INTO table_changes (table_name, op, keys)
+        VALUES (TG_TABLE_NAME, TG_OP, v_keys);
+    END IF;
+    IF TG_NARGS > 1 THEN
+        PERFORM pg_notify('data_changes', jsonb_build_object(
+            'table', TG_TABLE_NAME, 'op', TG_OP, 'keys', v_key_map)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_companies_change_insert
+    AFTER INSERT ON companies
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('company_id');
+
+CREATE TRIGGER trg_companies_change_update
+    AFTER UPDATE ON companies
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('company_id');
+
+CREATE TRIGGER trg_companies_change_delete
+    AFTER DELETE ON companies
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('company_id');
+
+CREATE TRIGGER trg_companies_change_truncate
+    AFTER TRUNCATE ON companies
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('company_id');
+
+CREATE TRIGGER trg_students_change_insert
+    AFTER INSERT ON students
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('student_id', 'student_id', 'company_id');
+
+CREATE TRIGGER trg_students_change_update
+    AFTER UPDATE ON students
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('student_id', 'student_id', 'company_id');
+
+CREATE TRIGGER trg_students_change_delete
+    AFTER DELETE ON students
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('student_id', 'student_id', 'company_id');
+
+CREATE TRIGGER trg_students_change_truncate
+    AFTER TRUNCATE ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('student_id', 'student_id', 'company_id');
+
+CREATE TRIGGER trg_courses_change_insert
+    AFTER INSERT ON courses
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('course_id', 'course_id');
+
+CREATE TRIGGER trg_courses_change_update
+    AFTER UPDATE ON courses
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('course_id', 'course_id');
+
+CREATE TRIGGER trg_courses_change_delete
+    AFTER DELETE ON courses
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('course_id', 'course_id');
+
+CREATE TRIGGER trg_courses_change_truncate
+    AFTER TRUNCATE ON courses
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('course_id', 'course_id');
+
+CREATE TRIGGER trg_enrollments_change_insert
+    AFTER INSERT ON enrollments
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('enrollment_id', 'student_id', 'course_id');
+
+CREATE TRIGGER trg_enrollments_change_update
+    AFTER UPDATE ON enrollments
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('enrollment_id', 'student_id', 'course_id');
+
+CREATE TRIGGER trg_enrollments_change_delete
+    AFTER DELETE ON enrollments
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('enrollment_id', 'student_id', 'course_id');
+
+CREATE TRIGGER trg_enrollments_change_truncate
+    AFTER TRUNCATE ON enrollments
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('enrollment_id', 'student_id', 'course_id');
+
+CREATE TRIGGER trg_grades_change_insert
+    AFTER INSERT ON grades
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('', 'enrollment_id');
+
+CREATE TRIGGER trg_grades_change_update
+    AFTER UPDATE ON grades
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('', 'enrollment_id');
+
+CREATE TRIGGER trg_grades_change_delete
+    AFTER DELETE ON grades
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('', 'enrollment_id');
+
+CREATE TRIGGER trg_grades_change_truncate
+    AFTER TRUNCATE ON grades
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('', 'enrollment_id');
+
+CREATE TRIGGER trg_performance_summary_change_insert
+    AFTER INSERT ON performance_summary
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('summary_id');
+
+CREATE TRIGGER trg_performance_summary_change_update
+    AFTER UPDATE ON performance_summary
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('summary_id');
+
+CREATE TRIGGER trg_performance_summary_change_delete
+    AFTER DELETE ON performance_summary
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('summary_id');
+
+CREATE TRIGGER trg_performance_summary_change_truncate
+    AFTER TRUNCATE ON performance_summary
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('summary_id');
+
+CREATE TRIGGER trg_attendance_change_insert
+    AFTER INSERT ON attendance
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('attendance_id', 'student_id', 'course_id');
+
+CREATE TRIGGER trg_attendance_change_update
+    AFTER UPDATE ON attendance
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('attendance_id', 'student_id', 'course_id');
+
+CREATE TRIGGER trg_attendance_change_delete
+    AFTER DELETE ON attendance
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('attendance_id', 'student_id', 'course_id');
+
+CREATE TRIGGER trg_attendance_change_truncate
+    AFTER TRUNCATE ON attendance
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('attendance_id', 'student_id', 'course_id');
+
+CREATE TRIGGER trg_attrition_risk_change_insert
+    AFTER INSERT ON attrition_risk
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('risk_id');
+
+CREATE TRIGGER trg_attrition_risk_change_update
+    AFTER UPDATE ON attrition_risk
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('risk_id');
+
+CREATE TRIGGER trg_attrition_risk_change_delete
+    AFTER DELETE ON attrition_risk
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('risk_id');
+
+CREATE TRIGGER trg_attrition_risk_change_truncate
+    AFTER TRUNCATE ON attrition_risk
+    FOR EACH STATEMENT EXECUTE FUNCTION fn_table_change('risk_id');
+
 -- =====================================================
 -- VERIFICATION QUERY
 -- =====================================================
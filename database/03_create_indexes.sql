@@ -4,6 +4,18 @@
 -- =====================================================
 -- Run this script after creating all tables
 -- Indexes optimize query performance for common operations
+--
+-- Index plan notes:
+--  * Append-mostly date columns (grades.assessment_date,
+--    attendance.muster_date, attrition_risk.assessment_date) use BRIN:
+--    a few pages instead of a full B-tree, near-zero insert cost.
+--  * No index duplicates the leading columns of another index or of a
+--    UNIQUE constraint (those already give a B-tree).
+--  * Aggregates over hot paths get INCLUDE (covering) indexes so they can
+--    be answered without visiting the heap. Row listings that also return
+--    free-text remarks still fetch from the heap; the index only saves them
+--    the sort.
+-- Benchmark with scripts/benchmark_indexes.py.
 -- =====================================================
 
 -- =====================================================
@@ -22,18 +34,14 @@ CREATE INDEX idx_students_status
 CREATE INDEX idx_students_name 
     ON students(last_name, first_name);
 
--- Index for email lookups (login, contact)
-CREATE INDEX idx_students_email 
-    ON students(email) 
-    WHERE email IS NOT NULL;
+-- Email lookups use the uq_students_email constraint index
 
 -- =====================================================
 -- ENROLLMENTS TABLE INDEXES
 -- =====================================================
 
--- Index for student enrollment history
-CREATE INDEX idx_enrollments_student 
-    ON enrollments(student_id);
+-- Student enrollment history and student/course lookups use
+-- uq_enrollments_student_course_date (student_id, course_id, start_date)
 
 -- Index for course enrollment lists
 CREATE INDEX idx_enrollments_course 
@@ -47,21 +55,20 @@ CREATE INDEX idx_enrollments_dates
 CREATE INDEX idx_enrollments_status 
     ON enrollments(status);
 
--- Composite index for student-course lookups
-CREATE INDEX idx_enrollments_student_course 
-    ON enrollments(student_id, course_id);
-
 -- =====================================================
 -- GRADES TABLE INDEXES
 -- =====================================================
 
--- Index for enrollment-based grade lookups
-CREATE INDEX idx_grades_enrollment 
-    ON grades(enrollment_id);
+-- An enrollment's grades, newest first. get_student_grades reads it in order
+-- but still visits the heap for remarks; score/weight aggregates per
+-- enrollment (sp_rebuild_grade_totals) are index-only.
+CREATE INDEX idx_grades_enrollment_date 
+    ON grades(enrollment_id, assessment_date DESC) 
+    INCLUDE (grade_id, assessment_type, score, weight);
 
--- Index for assessment date queries
-CREATE INDEX idx_grades_date 
-    ON grades(assessment_date);
+-- BRIN index for assessment date ranges (grades arrive in date order)
+CREATE INDEX idx_grades_date_brin 
+    ON grades USING BRIN (assessment_date);
 
 -- Index for assessment type filtering
 CREATE INDEX idx_grades_type 
@@ -71,29 +78,32 @@ CREATE INDEX idx_grades_type
 -- ATTENDANCE TABLE INDEXES
 -- =====================================================
 
--- Index for student attendance history
-CREATE INDEX idx_attendance_student 
-    ON attendance(student_id);
-
--- Index for course attendance records
-CREATE INDEX idx_attendance_course 
-    ON attendance(course_id);
+-- Student and student/course lookups use uq_attendance_student_course_date.
+-- It INCLUDEs status, so the per student/course status reads of the counter
+-- trigger and sp_rebuild_attendance_counters are index-only scans;
+-- get_student_attendance also returns attendance_id and remarks and so still
+-- visits the heap.
 
--- Index for date-based queries (daily muster)
-CREATE INDEX idx_attendance_date 
-    ON attendance(muster_date);
-
--- Composite index for student attendance by date
-CREATE INDEX idx_attendance_student_date 
-    ON attendance(student_id, muster_date);
+-- BRIN index for date-based queries (daily muster); one per monthly partition
+CREATE INDEX idx_attendance_date_brin 
+    ON attendance USING BRIN (muster_date);
 
 -- Composite index for course attendance by date (daily roster)
 CREATE INDEX idx_attendance_course_date 
     ON attendance(course_id, muster_date);
 
--- Index for attendance status filtering
-CREATE INDEX idx_attendance_status 
-    ON attendance(status);
+-- Partial index for muster exceptions (daily muster report)
+CREATE INDEX idx_attendance_exceptions 
+    ON attendance(muster_date DESC) 
+    WHERE status IN ('AWOL', 'Absent');
+
+-- =====================================================
+-- ATTENDANCE_DAILY_ROLLUP TABLE INDEXES
+-- =====================================================
+
+-- Index for the daily muster report (most recent days first)
+CREATE INDEX idx_attendance_rollup_date
+    ON attendance_daily_rollup(muster_date DESC);
 
 -- =====================================================
 -- PERFORMANCE_SUMMARY TABLE INDEXES
@@ -103,27 +113,25 @@ CREATE INDEX idx_attendance_status
 CREATE INDEX idx_performance_standing 
     ON performance_summary(current_standing);
 
--- Index for GPA-based filtering
-CREATE INDEX idx_performance_gpa 
-    ON performance_summary(gpa);
+-- Ranking index for top-N by GPA (fn_top_students, vw_top_gpa): read in
+-- order and stopped after N rows; also serves GPA range filters
+CREATE INDEX idx_performance_gpa_rank 
+    ON performance_summary(gpa DESC, total_credits DESC, student_id) 
+    WHERE gpa IS NOT NULL;
 
 -- =====================================================
 -- ATTRITION_RISK TABLE INDEXES
 -- =====================================================
 
--- Index for student risk lookups
-CREATE INDEX idx_attrition_student 
-    ON attrition_risk(student_id);
-
--- Index for risk assessment date (time-series analysis)
-CREATE INDEX idx_attrition_date 
-    ON attrition_risk(assessment_date);
+-- BRIN index for risk assessment date (time-series analysis)
+CREATE INDEX idx_attrition_date_brin 
+    ON attrition_risk USING BRIN (assessment_date);
 
 -- Index for risk level filtering (high-risk students)
 CREATE INDEX idx_attrition_level 
     ON attrition_risk(risk_level);
 
--- Composite index for recent risk by student
+-- Composite index for recent risk by student (also serves student lookups)
 CREATE INDEX idx_attrition_student_date 
     ON attrition_risk(student_id, assessment_date DESC);
 
@@ -2,23 +2,25 @@
 -- 7. IDENTIFY STUDENTS WITH <75% ATTENDANCE
 -- =====================================================
 -- Purpose: Flag students who are below the critical attendance threshold.
---          Based on the performance_summary table for quick access.
+--          Uses fn_low_attendance (trigger-maintained counters), here over
+--          the last 14 days; pass NULL as the first argument for all history.
 -- =====================================================
 
 SELECT 
     s.service_number,
     s.first_name,
     s.last_name,
-    c.company_name,
-    ps.attendance_rate,
-    ps.current_standing
+    co.company_name,
+    c.course_code,
+    la.attendance_rate,
+    la.total_sessions
 FROM 
-    students s
+    fn_low_attendance(14, 75.00) la
 JOIN 
-    performance_summary ps ON s.student_id = ps.student_id
+    students s ON s.student_id = la.student_id
 JOIN 
-    companies c ON s.company_id = c.company_id
-WHERE 
-    ps.attendance_rate < 75.00
+    courses c ON c.course_id = la.course_id
+LEFT JOIN 
+    companies co ON co.company_id = s.company_id
 ORDER BY 
-    ps.attendance_rate ASC;
+    la.attendance_rate ASC;
@@ -2,6 +2,7 @@
 -- Elite Defense Academy - Student Records Management System
 -- Prereq: Week 2 schema & data
 
+DROP MATERIALIZED VIEW IF EXISTS mv_course_avg_grades CASCADE;
 DROP VIEW IF EXISTS vw_attendance_report CASCADE;
 DROP VIEW IF EXISTS vw_transcript CASCADE;
 DROP VIEW IF EXISTS vw_course_enrollment_stats CASCADE;
@@ -39,40 +40,33 @@ SELECT cs.*, s.contact_number, s.gender, s.date_of_birth
 FROM vw_course_students cs
 JOIN students s ON s.student_id = cs.student_id;
 
--- Course-level average grades (uses final_score or weighted grades)
+-- Course-level average grades (uses final_score or the maintained weighted totals)
 CREATE OR REPLACE VIEW vw_course_avg_grades AS
-WITH grade_totals AS (
-    SELECT g.enrollment_id,
-           SUM(g.score * g.weight) / NULLIF(SUM(g.weight), 0) AS weighted_score
-    FROM grades g
-    GROUP BY g.enrollment_id
+WITH scored AS (
+    SELECT e.enrollment_id, e.course_id, e.status,
+           COALESCE(e.final_score, e.weighted_sum / NULLIF(e.weight_total, 0)) AS score
+    FROM enrollments e
 )
 SELECT
     c.course_id,
     c.course_code,
     c.name AS course_name,
-    COUNT(e.enrollment_id) AS enrollments,
-    SUM(CASE WHEN e.status = 'Completed' THEN 1 ELSE 0 END) AS completed_count,
-    AVG(COALESCE(e.final_score, gt.weighted_score)) AS avg_score,
-    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY COALESCE(e.final_score, gt.weighted_score)) AS median_score,
-    SUM(CASE WHEN COALESCE(e.final_score, gt.weighted_score) >= 90 THEN 1 ELSE 0 END) AS a_bucket,
-    SUM(CASE WHEN COALESCE(e.final_score, gt.weighted_score) BETWEEN 80 AND 89.999 THEN 1 ELSE 0 END) AS b_bucket,
-    SUM(CASE WHEN COALESCE(e.final_score, gt.weighted_score) BETWEEN 70 AND 79.999 THEN 1 ELSE 0 END) AS c_bucket,
-    SUM(CASE WHEN COALESCE(e.final_score, gt.weighted_score) < 70 THEN 1 ELSE 0 END) AS d_f_bucket
-FROM enrollments e
-JOIN courses c ON c.course_id = e.course_id
-LEFT JOIN grade_totals gt ON gt.enrollment_id = e.enrollment_id
+    COUNT(sc.enrollment_id) AS enrollments,
+    SUM(CASE WHEN sc.status = 'Completed' THEN 1 ELSE 0 END) AS completed_count,
+    AVG(sc.score) AS avg_score,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY sc.score) AS median_score,
+    SUM(CASE WHEN sc.score >= 90 THEN 1 ELSE 0 END) AS a_bucket,
+    SUM(CASE WHEN sc.score BETWEEN 80 AND 89.999 THEN 1 ELSE 0 END) AS b_bucket,
+    SUM(CASE WHEN sc.score BETWEEN 70 AND 79.999 THEN 1 ELSE 0 END) AS c_bucket,
+    SUM(CASE WHEN sc.score < 70 THEN 1 ELSE 0 END) AS d_f_bucket
+FROM scored sc
+JOIN courses c ON c.course_id = sc.course_id
 GROUP BY c.course_id, c.course_code, c.name;
 
--- Students with attendance rate < 75% per course
+-- Students with attendance rate < 75% per course (all history)
+-- Reads the trigger-maintained attendance_counter_totals; use
+-- fn_low_attendance(days, threshold) for trailing windows.
 CREATE OR REPLACE VIEW vw_low_attendance AS
-WITH attendance_calc AS (
-    SELECT a.student_id, a.course_id,
-           SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END)::DECIMAL / NULLIF(COUNT(*), 0) * 100 AS attendance_rate,
-           COUNT(*) AS total_sessions
-    FROM attendance a
-    GROUP BY a.student_id, a.course_id
-)
 SELECT
     c.course_id,
     c.course_code,
@@ -81,16 +75,32 @@ SELECT
     s.service_number,
     s.first_name,
     s.last_name,
-    ac.attendance_rate,
-    ac.total_sessions
-FROM attendance_calc ac
-JOIN students s ON s.student_id = ac.student_id
-JOIN courses c ON c.course_id = ac.course_id
-WHERE ac.attendance_rate < 75;
+    t.present_count::DECIMAL / t.total_count * 100 AS attendance_rate,
+    t.total_count AS total_sessions
+FROM attendance_counter_totals t
+JOIN students s ON s.student_id = t.student_id
+JOIN courses c ON c.course_id = t.course_id
+WHERE t.total_count > 0
+  AND t.present_count::DECIMAL / t.total_count * 100 < 75;
 
 -- Top 10 students by GPA
+-- The inner LIMIT reads idx_performance_gpa_rank in order and stops at 10
+-- rows; ROW_NUMBER then only ranks those. fn_top_students() generalises this
+-- to any N and to company/course filters.
 CREATE OR REPLACE VIEW vw_top_gpa AS
-SELECT * FROM (
+SELECT
+    top.student_id,
+    top.service_number,
+    top.first_name,
+    top.last_name,
+    top.gpa,
+    top.total_credits,
+    top.attendance_rate,
+    top.current_standing,
+    ROW_NUMBER() OVER (
+        ORDER BY top.gpa DESC, top.total_credits DESC, top.student_id
+    ) AS gpa_rank
+FROM (
     SELECT
         ps.student_id,
         s.service_number,
@@ -99,17 +109,13 @@ SELECT * FROM (
         ps.gpa,
         ps.total_credits,
         ps.attendance_rate,
-        ps.current_standing,
-        ROW_NUMBER() OVER (
-            ORDER BY ps.gpa DESC NULLS LAST,
-                     ps.total_credits DESC,
-                     s.last_name, s.first_name
-        ) AS gpa_rank
+        ps.current_standing
     FROM performance_summary ps
     JOIN students s ON s.student_id = ps.student_id
     WHERE ps.gpa IS NOT NULL
-) ranked
-WHERE gpa_rank <= 10;
+    ORDER BY ps.gpa DESC, ps.total_credits DESC, ps.student_id
+    LIMIT 10
+) top;
 
 -- Course enrollment statistics
 CREATE OR REPLACE VIEW vw_course_enrollment_stats AS
@@ -128,12 +134,6 @@ GROUP BY c.course_id, c.course_code, c.name;
 
 -- Transcript view (per enrollment)
 CREATE OR REPLACE VIEW vw_transcript AS
-WITH grade_totals AS (
-    SELECT g.enrollment_id,
-           SUM(g.score * g.weight) / NULLIF(SUM(g.weight), 0) AS weighted_score
-    FROM grades g
-    GROUP BY g.enrollment_id
-)
 SELECT
     s.student_id,
     s.service_number,
@@ -146,27 +146,69 @@ SELECT
     e.start_date,
     e.completion_date,
     e.status AS enrollment_status,
-    COALESCE(e.final_score, gt.weighted_score) AS final_score,
+    COALESCE(e.final_score, e.weighted_sum / NULLIF(e.weight_total, 0)) AS final_score,
     e.grade_letter,
-    COALESCE(e.final_score, gt.weighted_score) / 25.0 AS gpa_like_score
+    COALESCE(e.final_score, e.weighted_sum / NULLIF(e.weight_total, 0)) / 25.0 AS gpa_like_score
 FROM enrollments e
 JOIN students s ON s.student_id = e.student_id
-JOIN courses c ON c.course_id = e.course_id
-LEFT JOIN grade_totals gt ON gt.enrollment_id = e.enrollment_id;
+JOIN courses c ON c.course_id = e.course_id;
 
 -- Attendance report (daily roll-up per course)
+-- Reads the trigger-maintained attendance_daily_rollup counters.
 CREATE OR REPLACE VIEW vw_attendance_report AS
 SELECT
-    a.course_id,
+    r.course_id,
     c.course_code,
     c.name AS course_name,
-    a.muster_date,
-    SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) AS present_count,
-    SUM(CASE WHEN a.status = 'Absent' THEN 1 ELSE 0 END) AS absent_count,
-    SUM(CASE WHEN a.status = 'Late' THEN 1 ELSE 0 END) AS late_count,
-    SUM(CASE WHEN a.status = 'AWOL' THEN 1 ELSE 0 END) AS awol_count,
-    SUM(CASE WHEN a.status = 'Excused' THEN 1 ELSE 0 END) AS excused_count,
-    COUNT(*) AS total_records
-FROM attendance a
-JOIN courses c ON c.course_id = a.course_id
-GROUP BY a.course_id, c.course_code, c.name, a.muster_date;
+    r.muster_date,
+    r.present_count,
+    r.absent_count,
+    r.late_count,
+    r.awol_count,
+    r.excused_count,
+    r.total_records
+FROM attendance_daily_rollup r
+JOIN courses c ON c.course_id = r.course_id
+WHERE r.total_records > 0;
+
+-- Materialized course averages (read by reports and the CLI course screen).
+-- Same figures as vw_course_avg_grades plus the finished-enrollment stats the
+-- CLI shows. The refresh time is kept in materialized_view_refreshes.
+-- Refresh with sp_refresh_course_avg_grades() (CONCURRENTLY, needs the unique index).
+CREATE MATERIALIZED VIEW mv_course_avg_grades AS
+WITH scored AS (
+    SELECT e.course_id,
+           e.enrollment_id,
+           e.status,
+           e.final_score,
+           COALESCE(e.final_score, e.weighted_sum / NULLIF(e.weight_total, 0)) AS score
+    FROM enrollments e
+)
+SELECT
+    c.course_id,
+    c.course_code,
+    c.name AS course_name,
+    c.department,
+    COUNT(sc.enrollment_id) AS enrollments,
+    SUM(CASE WHEN sc.status = 'Completed' THEN 1 ELSE 0 END) AS completed_count,
+    AVG(sc.score) AS avg_score,
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY sc.score) AS median_score,
+    SUM(CASE WHEN sc.score >= 90 THEN 1 ELSE 0 END) AS a_bucket,
+    SUM(CASE WHEN sc.score BETWEEN 80 AND 89.999 THEN 1 ELSE 0 END) AS b_bucket,
+    SUM(CASE WHEN sc.score BETWEEN 70 AND 79.999 THEN 1 ELSE 0 END) AS c_bucket,
+    SUM(CASE WHEN sc.score < 70 THEN 1 ELSE 0 END) AS d_f_bucket,
+    -- Finished determinations only (Completed/Failed with a final score)
+    COUNT(*) FILTER (WHERE sc.status IN ('Completed', 'Failed') AND sc.final_score IS NOT NULL) AS finished_count,
+    ROUND(AVG(sc.final_score) FILTER (WHERE sc.status IN ('Completed', 'Failed')), 2) AS finished_avg_score,
+    MAX(sc.final_score) FILTER (WHERE sc.status IN ('Completed', 'Failed')) AS finished_high_score,
+    MIN(sc.final_score) FILTER (WHERE sc.status IN ('Completed', 'Failed')) AS finished_low_score
+FROM scored sc
+JOIN courses c ON c.course_id = sc.course_id
+GROUP BY c.course_id, c.course_code, c.name, c.department;
+
+CREATE UNIQUE INDEX idx_mv_course_avg_grades_course ON mv_course_avg_grades(course_id);
+CREATE INDEX idx_mv_course_avg_grades_finished ON mv_course_avg_grades(finished_avg_score DESC) WHERE finished_count > 0;
+
+INSERT INTO materialized_view_refreshes (view_name, refreshed_at)
+VALUES ('mv_course_avg_grades', clock_timestamp())
+ON CONFLICT (view_name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at;
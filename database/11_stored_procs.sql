@@ -5,9 +5,24 @@
 -- Safety drops for reruns
 DROP FUNCTION IF EXISTS sp_enroll_student(INT, INT, DATE) CASCADE;
 DROP FUNCTION IF EXISTS sp_record_grade(INT, VARCHAR, NUMERIC, NUMERIC, DATE, TEXT) CASCADE;
+DROP FUNCTION IF EXISTS sp_apply_grade_totals(INT) CASCADE;
+DROP FUNCTION IF EXISTS sp_update_grade(INT, NUMERIC, NUMERIC, TEXT) CASCADE;
+DROP FUNCTION IF EXISTS sp_delete_grade(INT) CASCADE;
+DROP FUNCTION IF EXISTS sp_rebuild_grade_totals() CASCADE;
 DROP FUNCTION IF EXISTS sp_mark_attendance(INT, INT, DATE, VARCHAR, TEXT) CASCADE;
 DROP FUNCTION IF EXISTS sp_refresh_performance_summary(INT) CASCADE;
 DROP FUNCTION IF EXISTS sp_refresh_all_performance() CASCADE;
+DROP FUNCTION IF EXISTS sp_rebuild_company_readiness() CASCADE;
+DROP FUNCTION IF EXISTS sp_allocate_service_numbers(INT) CASCADE;
+DROP FUNCTION IF EXISTS sp_refresh_course_avg_grades() CASCADE;
+DROP FUNCTION IF EXISTS sp_rebuild_attendance_rollup() CASCADE;
+DROP FUNCTION IF EXISTS sp_ensure_attendance_partitions(DATE, INT) CASCADE;
+DROP FUNCTION IF EXISTS sp_archive_attendance_partitions(INT) CASCADE;
+DROP FUNCTION IF EXISTS fn_top_students(INT, INT, INT) CASCADE;
+DROP FUNCTION IF EXISTS fn_company_leaderboard(INT) CASCADE;
+DROP FUNCTION IF EXISTS fn_low_attendance(INT, NUMERIC) CASCADE;
+DROP FUNCTION IF EXISTS sp_rebuild_attendance_counters() CASCADE;
+DROP FUNCTION IF EXISTS sp_prune_table_changes(INTERVAL) CASCADE;
 
 -- Enroll a student in a course (respects unique constraint student/course/start_date)
 CREATE OR REPLACE FUNCTION sp_enroll_student(
@@ -37,7 +52,110 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Record a grade entry and update enrollment aggregates if provided
+-- Recompute final_score/grade_letter from the trigger-maintained grade totals
+-- (enrollments.weighted_sum / weight_total). Both are cleared once the
+-- enrollment has no weighted grades left.
+CREATE OR REPLACE FUNCTION sp_apply_grade_totals(
+    p_enrollment_id INT
+) RETURNS NUMERIC AS $$
+DECLARE
+    v_final_score NUMERIC;
+BEGIN
+    UPDATE enrollments
+    SET final_score = weighted_sum / NULLIF(weight_total, 0),
+        grade_letter = CASE
+            WHEN weight_total <= 0 THEN NULL
+            WHEN weighted_sum / weight_total >= 90 THEN 'A'
+            WHEN weighted_sum / weight_total >= 80 THEN 'B'
+            WHEN weighted_sum / weight_total >= 70 THEN 'C'
+            WHEN weighted_sum / weight_total >= 60 THEN 'D'
+            ELSE 'F'
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE enrollment_id = p_enrollment_id
+    RETURNING final_score INTO v_final_score;
+
+    RETURN v_final_score;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Update a grade and its enrollment's final score in one transaction.
+-- NULL arguments leave that field unchanged. Returns the enrollment_id, or
+-- NULL when the grade does not exist.
+CREATE OR REPLACE FUNCTION sp_update_grade(
+    p_grade_id INT,
+    p_score NUMERIC DEFAULT NULL,
+    p_weight NUMERIC DEFAULT NULL,
+    p_remarks TEXT DEFAULT NULL
+) RETURNS INT AS $$
+DECLARE
+    v_enrollment_id INT;
+BEGIN
+    -- trg_grades_totals_update moves the enrollment's running totals
+    UPDATE grades
+    SET score = COALESCE(p_score, score),
+        weight = COALESCE(p_weight, weight),
+        remarks = COALESCE(p_remarks, remarks)
+    WHERE grade_id = p_grade_id
+    RETURNING enrollment_id INTO v_enrollment_id;
+
+    IF v_enrollment_id IS NOT NULL AND (p_score IS NOT NULL OR p_weight IS NOT NULL) THEN
+        PERFORM sp_apply_grade_totals(v_enrollment_id);
+    END IF;
+    RETURN v_enrollment_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Delete a grade and recompute its enrollment's final score in one transaction.
+-- Returns the enrollment_id, or NULL when the grade does not exist.
+CREATE OR REPLACE FUNCTION sp_delete_grade(
+    p_grade_id INT
+) RETURNS INT AS $$
+DECLARE
+    v_enrollment_id INT;
+BEGIN
+    DELETE FROM grades
+    WHERE grade_id = p_grade_id
+    RETURNING enrollment_id INTO v_enrollment_id;
+
+    IF v_enrollment_id IS NOT NULL THEN
+        PERFORM sp_apply_grade_totals(v_enrollment_id);
+    END IF;
+    RETURN v_enrollment_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute enrollments.weighted_sum / weight_total from raw grades. Manual
+-- repair step (or a one-off backfill for databases that predate the columns);
+-- the grade triggers keep them current, so the loaders do not call it. Blocks
+-- grade writers while it runs. Returns the number of enrollments corrected.
+CREATE OR REPLACE FUNCTION sp_rebuild_grade_totals()
+RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    LOCK TABLE grades IN SHARE MODE; -- block writers while recounting
+
+    UPDATE enrollments e
+    SET weighted_sum = t.weighted_sum,
+        weight_total = t.weight_total
+    FROM (
+        SELECT en.enrollment_id,
+               COALESCE(SUM(g.score * g.weight), 0) AS weighted_sum,
+               COALESCE(SUM(g.weight), 0) AS weight_total
+        FROM enrollments en
+        LEFT JOIN grades g ON g.enrollment_id = en.enrollment_id
+        GROUP BY en.enrollment_id
+    ) t
+    WHERE e.enrollment_id = t.enrollment_id
+      AND (e.weighted_sum, e.weight_total) IS DISTINCT FROM (t.weighted_sum, t.weight_total);
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Record a grade entry and update enrollment aggregates; returns the new grade_id
 CREATE OR REPLACE FUNCTION sp_record_grade(
     p_enrollment_id INT,
     p_assessment_type VARCHAR,
@@ -45,35 +163,17 @@ CREATE OR REPLACE FUNCTION sp_record_grade(
     p_weight NUMERIC,
     p_assessment_date DATE DEFAULT CURRENT_DATE,
     p_remarks TEXT DEFAULT NULL
-) RETURNS VOID AS $$
+) RETURNS INT AS $$
 DECLARE
-    v_weighted_score NUMERIC;
-    v_total_weight NUMERIC;
-    v_final_score NUMERIC;
+    v_grade_id INT;
 BEGIN
+    -- trg_grades_totals_insert adds this grade to the enrollment's running totals
     INSERT INTO grades (enrollment_id, assessment_type, score, weight, assessment_date, remarks)
-    VALUES (p_enrollment_id, p_assessment_type, p_score, p_weight, p_assessment_date, p_remarks);
-
-    -- Recompute weighted score for the enrollment
-    SELECT SUM(score * weight), SUM(weight)
-    INTO v_weighted_score, v_total_weight
-    FROM grades
-    WHERE enrollment_id = p_enrollment_id;
-
-    IF v_total_weight IS NOT NULL AND v_total_weight > 0 THEN
-        v_final_score := v_weighted_score / v_total_weight;
-        UPDATE enrollments
-        SET final_score = v_final_score,
-            grade_letter = CASE 
-                WHEN v_final_score >= 90 THEN 'A'
-                WHEN v_final_score >= 80 THEN 'B'
-                WHEN v_final_score >= 70 THEN 'C'
-                WHEN v_final_score >= 60 THEN 'D'
-                ELSE 'F'
-            END,
-            updated_at = CURRENT_TIMESTAMP
-        WHERE enrollment_id = p_enrollment_id;
-    END IF;
+    VALUES (p_enrollment_id, p_assessment_type, p_score, p_weight, p_assessment_date, p_remarks)
+    RETURNING grade_id INTO v_grade_id;
+
+    PERFORM sp_apply_grade_totals(p_enrollment_id);
+    RETURN v_grade_id;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -99,7 +199,8 @@ BEGIN
         SET status = p_status,
             remarks = p_remarks,
             updated_at = CURRENT_TIMESTAMP
-        WHERE attendance_id = v_attendance_id;
+        WHERE attendance_id = v_attendance_id
+          AND muster_date = p_muster_date; -- prunes to one partition
     ELSE
         INSERT INTO attendance (student_id, course_id, muster_date, status, remarks)
         VALUES (p_student_id, p_course_id, p_muster_date, p_status, p_remarks)
@@ -128,10 +229,11 @@ BEGIN
     WHERE e.student_id = p_student_id
       AND e.final_score IS NOT NULL;
 
-    -- Attendance rate: present / total across courses
-    SELECT SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END)::DECIMAL / NULLIF(COUNT(*), 0) * 100
+    -- Attendance rate: present / total across courses, from the same
+    -- trigger-maintained counters as sp_refresh_all_performance
+    SELECT SUM(present_count)::DECIMAL / NULLIF(SUM(total_count), 0) * 100
     INTO v_attendance_rate
-    FROM attendance
+    FROM attendance_counter_totals
     WHERE student_id = p_student_id;
 
     -- Standing heuristic
@@ -159,13 +261,436 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Refresh performance for all students
+-- Same rules as sp_refresh_performance_summary in one set-based upsert, so the
+-- company readiness triggers apply a single delta for the whole refresh.
+-- Rows whose values are unchanged are left alone.
 CREATE OR REPLACE FUNCTION sp_refresh_all_performance()
 RETURNS VOID AS $$
+BEGIN
+    INSERT INTO performance_summary (student_id, gpa, attendance_rate, total_credits, current_standing, last_updated)
+    SELECT s.student_id,
+           g.gpa,
+           a.attendance_rate,
+           COALESCE(g.total_credits, 0),
+           CASE
+               WHEN g.gpa IS NULL THEN 'Good Standing'
+               WHEN g.gpa >= 3.5 THEN 'Deans List'
+               WHEN g.gpa >= 3.0 THEN 'Honor Roll'
+               WHEN g.gpa >= 2.0 THEN 'Good Standing'
+               ELSE 'Probation'
+           END,
+           CURRENT_TIMESTAMP
+    FROM students s
+    LEFT JOIN (
+        SELECT e.student_id, AVG(e.final_score / 25.0) AS gpa, SUM(c.credits) AS total_credits
+        FROM enrollments e
+        JOIN courses c ON c.course_id = e.course_id
+        WHERE e.final_score IS NOT NULL
+        GROUP BY e.student_id
+    ) g ON g.student_id = s.student_id
+    LEFT JOIN (
+        SELECT student_id, SUM(present_count)::DECIMAL / NULLIF(SUM(total_count), 0) * 100 AS attendance_rate
+        FROM attendance_counter_totals
+        GROUP BY student_id
+    ) a ON a.student_id = s.student_id
+    ON CONFLICT (student_id)
+    DO UPDATE SET gpa = EXCLUDED.gpa,
+                  attendance_rate = EXCLUDED.attendance_rate,
+                  total_credits = EXCLUDED.total_credits,
+                  current_standing = EXCLUDED.current_standing,
+                  last_updated = CURRENT_TIMESTAMP
+    WHERE (performance_summary.gpa, performance_summary.attendance_rate,
+           performance_summary.total_credits, performance_summary.current_standing)
+          IS DISTINCT FROM
+          (EXCLUDED.gpa, EXCLUDED.attendance_rate, EXCLUDED.total_credits, EXCLUDED.current_standing);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recount company_readiness_summary from performance_summary (initial
+-- backfill or repair). Returns the number of companies counted.
+CREATE OR REPLACE FUNCTION sp_rebuild_company_readiness()
+RETURNS INT AS $$
 DECLARE
-    rec RECORD;
+    v_companies INT;
 BEGIN
-    FOR rec IN SELECT student_id FROM students LOOP
-        PERFORM sp_refresh_performance_summary(rec.student_id);
+    LOCK TABLE performance_summary IN SHARE MODE; -- block writers while recounting
+    DELETE FROM company_readiness_summary;
+
+    INSERT INTO company_readiness_summary (company_id, student_count, graded_count, gpa_sum, good_count)
+    SELECT s.company_id,
+           COUNT(*),
+           COUNT(ps.gpa),
+           COALESCE(SUM(ps.gpa), 0),
+           COUNT(*) FILTER (WHERE ps.current_standing ILIKE 'Good%')
+    FROM performance_summary ps
+    JOIN students s ON s.student_id = ps.student_id
+    WHERE s.company_id IS NOT NULL
+    GROUP BY s.company_id;
+
+    GET DIAGNOSTICS v_companies = ROW_COUNT;
+    RETURN v_companies;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reserve a block of service numbers in one call (bulk loads / ETL)
+-- Numbers come from seq_service_number, so they never collide and never need retries.
+CREATE OR REPLACE FUNCTION sp_allocate_service_numbers(
+    p_count INT
+) RETURNS SETOF VARCHAR AS $$
+BEGIN
+    IF p_count IS NULL OR p_count <= 0 THEN
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT fn_next_service_number()
+    FROM generate_series(1, p_count);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Refresh mv_course_avg_grades without blocking readers.
+-- SECURITY DEFINER so srms_user can refresh a view it does not own.
+-- Returns the new snapshot timestamp.
+CREATE OR REPLACE FUNCTION sp_refresh_course_avg_grades()
+RETURNS TIMESTAMP AS $$
+DECLARE
+    v_refreshed TIMESTAMP;
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_course_avg_grades;
+    INSERT INTO materialized_view_refreshes (view_name, refreshed_at)
+    VALUES ('mv_course_avg_grades', clock_timestamp())
+    ON CONFLICT (view_name) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+    RETURNING refreshed_at INTO v_refreshed;
+    RETURN v_refreshed;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Rebuild attendance_daily_rollup from raw attendance (initial backfill or
+-- repair). The attendance triggers keep it current afterwards.
+-- Returns the number of course/day rows written.
+CREATE OR REPLACE FUNCTION sp_rebuild_attendance_rollup()
+RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    LOCK TABLE attendance IN SHARE MODE; -- block writers while recounting
+    DELETE FROM attendance_daily_rollup;
+
+    INSERT INTO attendance_daily_rollup
+        (course_id, muster_date, present_count, absent_count, late_count,
+         awol_count, excused_count, total_records, last_updated)
+    SELECT course_id, muster_date,
+           COUNT(*) FILTER (WHERE status = 'Present'),
+           COUNT(*) FILTER (WHERE status = 'Absent'),
+           COUNT(*) FILTER (WHERE status = 'Late'),
+           COUNT(*) FILTER (WHERE status = 'AWOL'),
+           COUNT(*) FILTER (WHERE status = 'Excused'),
+           COUNT(*),
+           CURRENT_TIMESTAMP
+    FROM attendance
+    GROUP BY course_id, muster_date;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create monthly attendance partitions (attendance_pYYYYMM) and the matching
+-- running-counter partitions (attendance_rolling_counters_pYYYYMM) from the
+-- month of p_from through p_months_ahead months past the current month. Rows
+-- already sitting in a default partition for a new month are moved into it
+-- first. Moves go straight to the partitions, so the triggers on attendance
+-- do not fire and its counters stay unchanged. Returns partitions created.
+CREATE OR REPLACE FUNCTION sp_ensure_attendance_partitions(
+    p_from DATE DEFAULT CURRENT_DATE,
+    p_months_ahead INT DEFAULT 3
+) RETURNS INT AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from)::DATE;
+    v_last DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead))::DATE;
+    v_next DATE;
+    v_parent TEXT;
+    v_name TEXT;
+    v_moved BOOLEAN;
+    v_created INT := 0;
+BEGIN
+    WHILE v_month <= v_last LOOP
+        v_next := (v_month + INTERVAL '1 month')::DATE;
+
+        FOREACH v_parent IN ARRAY ARRAY['attendance', 'attendance_rolling_counters'] LOOP
+            v_name := v_parent || '_p' || to_char(v_month, 'YYYYMM');
+            CONTINUE WHEN to_regclass(v_name) IS NOT NULL;
+
+            EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE muster_date >= %L AND muster_date < %L)',
+                           v_parent || '_default', v_month, v_next) INTO v_moved;
+            IF v_moved THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                               v_name, v_parent);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I
+                                    WHERE muster_date >= %L AND muster_date < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved', v_parent || '_default', v_month, v_next, v_name);
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                               v_parent, v_name, v_month, v_next);
+            ELSE
+                EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                               v_name, v_parent, v_month, v_next);
+            END IF;
+            v_created := v_created + 1;
+        END LOOP;
+
+        v_month := v_next;
+    END LOOP;
+
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach monthly attendance partitions older than p_keep_months and rename
+-- them attendance_archive_YYYYMM. Archived tables keep their rows (dump or
+-- drop them as policy requires); attendance_daily_rollup keeps the counts.
+-- The month's running-counter partition is dropped: each pair's last counts
+-- in it become the pair's archived_present/archived_total base, so all-time
+-- totals are kept and trailing windows up to p_keep_months stay exact.
+-- Returns attendance partitions detached.
+CREATE OR REPLACE FUNCTION sp_archive_attendance_partitions(
+    p_keep_months INT DEFAULT 24
+) RETURNS INT AS $$
+DECLARE
+    v_cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => p_keep_months))::DATE;
+    v_part RECORD;
+    v_counters TEXT;
+    v_detached INT := 0;
+BEGIN
+    FOR v_part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'attendance'::regclass
+          AND c.relname ~ '^attendance_p[0-9]{6}$'
+          AND to_date(substr(c.relname, 13), 'YYYYMM') < v_cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE attendance DETACH PARTITION %I', v_part.relname);
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', v_part.relname,
+                       replace(v_part.relname, 'attendance_p', 'attendance_archive_'));
+
+        v_counters := replace(v_part.relname, 'attendance_p', 'attendance_rolling_counters_p');
+        IF to_regclass(v_counters) IS NOT NULL THEN
+            -- Months are archived oldest first, so the latest row of this
+            -- month already includes every earlier archived month
+            EXECUTE format($sql$
+                UPDATE attendance_counter_totals t
+                SET archived_present = l.cum_present,
+                    archived_total   = l.cum_total
+                FROM (
+                    SELECT DISTINCT ON (student_id, course_id)
+                           student_id, course_id, cum_present, cum_total
+                    FROM %I
+                    ORDER BY student_id, course_id, muster_date DESC
+                ) l
+                WHERE t.student_id = l.student_id AND t.course_id = l.course_id
+            $sql$, v_counters);
+            EXECUTE format('ALTER TABLE attendance_rolling_counters DETACH PARTITION %I', v_counters);
+            EXECUTE format('DROP TABLE %I', v_counters);
+        END IF;
+
+        v_detached := v_detached + 1;
     END LOOP;
+
+    RETURN v_detached;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Top-N students by GPA, optionally limited to a company and/or a course.
+-- Walks idx_performance_gpa_rank in order and stops after p_n matches; only
+-- the filters actually supplied are added to the query, so each call gets a
+-- plan for its own predicates. Ties on GPA and credits share a rank.
+CREATE OR REPLACE FUNCTION fn_top_students(
+    p_n INT DEFAULT 10,
+    p_company_id INT DEFAULT NULL,
+    p_course_id INT DEFAULT NULL
+) RETURNS TABLE (
+    gpa_rank BIGINT,
+    student_id INT,
+    service_number VARCHAR,
+    first_name VARCHAR,
+    last_name VARCHAR,
+    company_id INT,
+    company_name VARCHAR,
+    gpa NUMERIC,
+    total_credits INT,
+    attendance_rate NUMERIC,
+    current_standing VARCHAR
+) AS $$
+DECLARE
+    v_filters TEXT := '';
+BEGIN
+    IF p_company_id IS NOT NULL THEN
+        v_filters := v_filters || format(' AND s.company_id = %s', p_company_id);
+    END IF;
+    IF p_course_id IS NOT NULL THEN
+        v_filters := v_filters || format(
+            ' AND EXISTS (SELECT 1 FROM enrollments e WHERE e.student_id = ps.student_id AND e.course_id = %s)',
+            p_course_id);
+    END IF;
+
+    RETURN QUERY EXECUTE format($sql$
+        SELECT RANK() OVER (ORDER BY t.gpa DESC, t.total_credits DESC),
+               t.student_id, t.service_number, t.first_name, t.last_name,
+               t.company_id, t.company_name, t.gpa, t.total_credits,
+               t.attendance_rate, t.current_standing
+        FROM (
+            SELECT ps.student_id, s.service_number, s.first_name, s.last_name,
+                   s.company_id, co.company_name, ps.gpa::NUMERIC, ps.total_credits,
+                   ps.attendance_rate::NUMERIC, ps.current_standing
+            FROM performance_summary ps
+            JOIN students s ON s.student_id = ps.student_id
+            LEFT JOIN companies co ON co.company_id = s.company_id
+            WHERE ps.gpa IS NOT NULL %s
+            ORDER BY ps.gpa DESC, ps.total_credits DESC, ps.student_id
+            LIMIT %s
+        ) t
+        ORDER BY t.gpa DESC, t.total_credits DESC, t.student_id
+    $sql$, v_filters, GREATEST(p_n, 0));
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Per-company leaderboard: the top p_n students of every company, one
+-- LATERAL top-N probe per company instead of ranking all students.
+CREATE OR REPLACE FUNCTION fn_company_leaderboard(
+    p_n INT DEFAULT 3
+) RETURNS TABLE (
+    company_id INT,
+    company_name VARCHAR,
+    company_rank BIGINT,
+    student_id INT,
+    service_number VARCHAR,
+    first_name VARCHAR,
+    last_name VARCHAR,
+    gpa NUMERIC,
+    total_credits INT
+) AS $$
+    SELECT c.company_id, c.company_name, t.gpa_rank, t.student_id, t.service_number,
+           t.first_name, t.last_name, t.gpa, t.total_credits
+    FROM companies c
+    CROSS JOIN LATERAL fn_top_students(p_n, c.company_id, NULL) t
+    ORDER BY c.company_name, t.gpa_rank, t.student_id;
+$$ LANGUAGE sql STABLE;
+
+-- Rebuild the running and all-time attendance counters from raw attendance
+-- (initial backfill or repair), on top of each pair's archived counts.
+-- Returns the number of pairs counted.
+CREATE OR REPLACE FUNCTION sp_rebuild_attendance_counters()
+RETURNS INT AS $$
+DECLARE
+    v_pairs INT;
+BEGIN
+    LOCK TABLE attendance IN SHARE MODE; -- block writers while recounting
+    DELETE FROM attendance_rolling_counters;
+
+    INSERT INTO attendance_rolling_counters (student_id, course_id, muster_date, cum_present, cum_total)
+    SELECT a.student_id, a.course_id, a.muster_date,
+           COALESCE(t.archived_present, 0) + SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) OVER w,
+           COALESCE(t.archived_total, 0) + COUNT(*) OVER w
+    FROM attendance a
+    LEFT JOIN attendance_counter_totals t
+      ON t.student_id = a.student_id AND t.course_id = a.course_id
+    WINDOW w AS (PARTITION BY a.student_id, a.course_id ORDER BY a.muster_date);
+
+    DELETE FROM attendance_counter_totals t
+    WHERE t.archived_total = 0
+      AND NOT EXISTS (SELECT 1 FROM attendance_rolling_counters r
+                      WHERE r.student_id = t.student_id AND r.course_id = t.course_id);
+
+    INSERT INTO attendance_counter_totals AS t (student_id, course_id, present_count, total_count, last_date)
+    SELECT DISTINCT ON (student_id, course_id)
+           student_id, course_id, cum_present, cum_total, muster_date
+    FROM attendance_rolling_counters
+    ORDER BY student_id, course_id, muster_date DESC
+    ON CONFLICT (student_id, course_id) DO UPDATE SET
+        present_count = EXCLUDED.present_count,
+        total_count   = EXCLUDED.total_count,
+        last_date     = EXCLUDED.last_date,
+        last_updated  = CURRENT_TIMESTAMP;
+    GET DIAGNOSTICS v_pairs = ROW_COUNT;
+
+    -- Pairs whose attendance is all archived keep only their archived counts
+    UPDATE attendance_counter_totals t
+    SET present_count = t.archived_present,
+        total_count   = t.archived_total,
+        last_date     = NULL,
+        last_updated  = CURRENT_TIMESTAMP
+    WHERE NOT EXISTS (SELECT 1 FROM attendance_rolling_counters r
+                      WHERE r.student_id = t.student_id AND r.course_id = t.course_id)
+      AND (t.present_count, t.total_count) IS DISTINCT FROM (t.archived_present, t.archived_total);
+
+    RETURN v_pairs;
 END;
 $$ LANGUAGE plpgsql;
+
+-- Student/course pairs whose attendance rate is below p_threshold (%).
+-- p_days NULL: all history, read from attendance_counter_totals.
+-- p_days N: the last N days including today. Counts come from the running
+-- counters: the pair's totals minus its last counter row before the window,
+-- so cost depends on the number of active pairs, not attendance rows.
+-- Windows must fall within the attendance retention (see
+-- sp_archive_attendance_partitions): older counter rows are dropped and
+-- count as the pair's archived base.
+CREATE OR REPLACE FUNCTION fn_low_attendance(
+    p_days INT DEFAULT NULL,
+    p_threshold NUMERIC DEFAULT 75
+) RETURNS TABLE (
+    student_id INT,
+    course_id INT,
+    present_sessions INT,
+    total_sessions INT,
+    attendance_rate NUMERIC
+) AS $$
+    SELECT w.student_id, w.course_id, w.present_sessions, w.total_sessions,
+           ROUND(w.present_sessions::NUMERIC / w.total_sessions * 100, 2)
+    FROM (
+        SELECT t.student_id, t.course_id,
+               t.present_count - CASE WHEN p_days IS NULL THEN 0
+                                      ELSE COALESCE(b.cum_present, t.archived_present) END AS present_sessions,
+               t.total_count - CASE WHEN p_days IS NULL THEN 0
+                                    ELSE COALESCE(b.cum_total, t.archived_total) END AS total_sessions
+        FROM attendance_counter_totals t
+        LEFT JOIN LATERAL (
+            SELECT r.cum_present, r.cum_total
+            FROM attendance_rolling_counters r
+            WHERE p_days IS NOT NULL
+              AND r.student_id = t.student_id
+              AND r.course_id = t.course_id
+              AND r.muster_date <= CURRENT_DATE - p_days
+            ORDER BY r.muster_date DESC
+            LIMIT 1
+        ) b ON TRUE
+        WHERE p_days IS NULL OR t.last_date > CURRENT_DATE - p_days
+    ) w
+    WHERE w.total_sessions > 0
+      AND w.present_sessions::NUMERIC / w.total_sessions * 100 < p_threshold
+    ORDER BY w.present_sessions::NUMERIC / w.total_sessions, w.student_id, w.course_id;
+$$ LANGUAGE sql STABLE;
+
+-- Delete table_changes rows logged more than p_keep ago by transactions that
+-- every current snapshot already sees as finished. A reader whose previous
+-- refresh is older than p_keep reloads in full instead of reading the log
+-- (CHANGE_LOG_KEEP in src/database.py). Returns rows deleted.
+CREATE OR REPLACE FUNCTION sp_prune_table_changes(
+    p_keep INTERVAL DEFAULT INTERVAL '1 day'
+) RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    DELETE FROM table_changes
+    WHERE changed_at < clock_timestamp() - p_keep
+      AND txid < txid_snapshot_xmin(txid_current_snapshot());
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Initial partitions: the past year through three months ahead
+SELECT sp_ensure_attendance_partitions((CURRENT_DATE - INTERVAL '12 months')::DATE, 3);
@@ -15,14 +15,36 @@ GRANT SELECT ON
     vw_top_gpa,
     vw_course_enrollment_stats,
     vw_transcript,
-    vw_attendance_report
+    vw_attendance_report,
+    mv_course_avg_grades,
+    materialized_view_refreshes,
+    company_readiness_summary
 TO srms_user;
 
 -- Functions: allow instructors to execute operational procs
 GRANT EXECUTE ON FUNCTION
     sp_enroll_student(INT, INT, DATE),
     sp_record_grade(INT, VARCHAR, NUMERIC, NUMERIC, DATE, TEXT),
+    sp_apply_grade_totals(INT),
+    sp_update_grade(INT, NUMERIC, NUMERIC, TEXT),
+    sp_delete_grade(INT),
+    sp_rebuild_grade_totals(),
     sp_mark_attendance(INT, INT, DATE, VARCHAR, TEXT),
     sp_refresh_performance_summary(INT),
-    sp_refresh_all_performance()
+    sp_refresh_all_performance(),
+    sp_rebuild_company_readiness(),
+    sp_allocate_service_numbers(INT),
+    fn_next_service_number(),
+    sp_refresh_course_avg_grades(),
+    sp_rebuild_attendance_rollup(),
+    sp_ensure_attendance_partitions(DATE, INT),
+    sp_archive_attendance_partitions(INT),
+    fn_top_students(INT, INT, INT),
+    fn_company_leaderboard(INT),
+    fn_low_attendance(INT, NUMERIC),
+    sp_rebuild_attendance_counters(),
+    sp_prune_table_changes(INTERVAL)
 TO srms_user;
+
+-- Sequences: service number allocation draws from seq_service_number
+GRANT USAGE ON SEQUENCE seq_service_number TO srms_user;
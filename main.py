@@ -1,4 +1,21 @@
-from src.cli import main
+import sys
+import argparse
+from src import instrumentation
 
 if __name__ == "__main__":
+    # `main.py <command> ...` runs a batch command without prompts (see src/batch.py).
+    # The interactive CLI takes only options, so any positional argument is a
+    # command; src.batch (and its process pool) is imported only then.
+    if len(sys.argv) > 1 and not sys.argv[1].startswith('-'):
+        from src import batch
+        sys.exit(batch.main(sys.argv[1:]))
+
+    from src.cli import main
+
+    parser = argparse.ArgumentParser(description="Elite Defense Academy student records CLI")
+    parser.add_argument("--explain", action="store_true",
+                        help="Capture EXPLAIN ANALYZE plans for each distinct read query (see Query Stats)")
+    args = parser.parse_args()
+    if args.explain:
+        instrumentation.enable_explain()
     main()
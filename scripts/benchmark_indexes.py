@@ -0,0 +1,264 @@
+import os
+import re
+import json
+import time
+import argparse
+import statistics
+import psycopg2
+from psycopg2 import OperationalError
+
+# Hot read paths measured for latency (sampled ids are bound at run time)
+READ_QUERIES = {
+    'vw_low_attendance': (
+        "SELECT * FROM vw_low_attendance", None),
+    'get_student_attendance': (
+        "SELECT attendance_id, muster_date, status, remarks FROM attendance "
+        "WHERE student_id = %s AND course_id = %s ORDER BY muster_date DESC", 'attendance_pair'),
+    'get_student_grades': (
+        "SELECT grade_id, assessment_type, score, weight, assessment_date, remarks FROM grades "
+        "WHERE enrollment_id = %s ORDER BY assessment_date DESC", 'enrollment'),
+    'daily_muster_exceptions': (
+        "SELECT muster_date, student_id, status FROM attendance "
+        "WHERE status IN ('AWOL', 'Absent') AND muster_date >= CURRENT_DATE - 7 "
+        "ORDER BY muster_date DESC", None),
+    'attrition_recent': (
+        "SELECT * FROM attrition_risk WHERE assessment_date >= CURRENT_DATE - 30", None),
+}
+
+INDEXED_TABLES = ('students', 'enrollments', 'grades', 'attendance', 'attendance_daily_rollup',
+                  'performance_summary', 'attrition_risk', 'courses', 'companies')
+
+
+def load_env_from_file():
+    """Load key=value pairs from project root .env if present (non-fatal if missing)."""
+    env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
+    if not os.path.isfile(env_path):
+        return
+    with open(env_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            k, v = line.split("=", 1)
+            if k and v and k not in os.environ:
+                os.environ[k] = v
+
+
+def require_env(key: str, default: str = None):
+    val = os.getenv(key, default)
+    if val is None:
+        raise ValueError(f"Missing required environment variable: {key}. Set it in .env")
+    return val
+
+
+def create_connection():
+    """Establish database connection."""
+    load_env_from_file()
+    try:
+        return psycopg2.connect(
+            database=require_env("DB_NAME", "student_records_db"),
+            user=require_env("DB_USER"),
+            password=require_env("DB_PASSWORD"),
+            host=require_env("DB_HOST", "localhost"),
+            port=require_env("DB_PORT", "5432")
+        )
+    except OperationalError as e:
+        print(f"DB Error: {e}")
+        return None
+
+
+def apply_index_plan(conn, sql_path):
+    """Drop every standalone index on the schema tables and run `sql_path`.
+
+    Constraint-backed indexes (primary keys, UNIQUE) are left alone. Use it to
+    switch between plans, e.g. the previous one from git:
+        git show <rev>:database/03_create_indexes.sql > /tmp/old_indexes.sql
+    """
+    with open(sql_path, 'r', encoding='utf-8') as f:
+        ddl = f.read()
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT i.relname
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_class t ON t.oid = x.indrelid
+        LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid
+        WHERE t.relname = ANY(%s)
+          AND c.oid IS NULL
+          AND NOT EXISTS (SELECT 1 FROM pg_inherits h WHERE h.inhrelid = x.indexrelid)
+    """, (list(INDEXED_TABLES),))
+    for (name,) in cur.fetchall():
+        cur.execute(f'DROP INDEX IF EXISTS "{name}"')
+    cur.execute(ddl)
+    cur.execute(f"ANALYZE {', '.join(INDEXED_TABLES)}")
+    conn.commit()
+    print(f"Applied index plan from {sql_path}")
+
+
+def index_inventory(cur):
+    """Index names and on-disk size per table (partitions summed into their parent)."""
+    cur.execute("""
+        SELECT COALESCE(pt.relname, t.relname) AS table_name,
+               COALESCE(pi.relname, i.relname) AS index_name,
+               SUM(pg_relation_size(i.oid)) AS bytes
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_class t ON t.oid = x.indrelid
+        LEFT JOIN pg_inherits ih ON ih.inhrelid = i.oid
+        LEFT JOIN pg_class pi ON pi.oid = ih.inhparent
+        LEFT JOIN pg_inherits th ON th.inhrelid = t.oid
+        LEFT JOIN pg_class pt ON pt.oid = th.inhparent
+        WHERE COALESCE(pt.relname, t.relname) = ANY(%s)
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """, (list(INDEXED_TABLES),))
+    return [{'table': t, 'index': i, 'bytes': int(b)} for t, i, b in cur.fetchall()]
+
+
+def sample_ids(cur, n):
+    """Random enrollments to look up (sampled from enrollments, the smaller table)."""
+    cur.execute("SELECT enrollment_id, student_id, course_id FROM enrollments ORDER BY random() LIMIT %s", (n,))
+    rows = cur.fetchall()
+    return {'attendance_pair': [(s, c) for _, s, c in rows], 'enrollment': [(e,) for e, _, _ in rows]}
+
+
+def _summary(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def measure_reads(cur, repeats):
+    ids = sample_ids(cur, repeats)
+    results = {}
+    for name, (sql, param_kind) in READ_QUERIES.items():
+        params = ids.get(param_kind) if param_kind else None
+        if param_kind and not params:
+            continue
+        samples = []
+        for i in range(repeats):
+            started = time.perf_counter()
+            cur.execute(sql, params[i % len(params)] if params else None)
+            cur.fetchall()
+            samples.append((time.perf_counter() - started) * 1000)
+        results[name] = _summary(samples)
+    return results
+
+
+def measure_inserts(conn, n_rows):
+    """Rows/second for attendance and grade inserts; rolled back afterwards.
+
+    Includes trigger cost (rollup and grade totals), as production inserts do.
+    """
+    cur = conn.cursor()
+    results = {}
+
+    # Attendance: distinct (student, course, day) rows on recent dates, skipping
+    # combinations that already exist
+    started = time.perf_counter()
+    cur.execute("""
+        INSERT INTO attendance (student_id, course_id, muster_date, status, recorded_by)
+        SELECT e.student_id, e.course_id, d::date,
+               (ARRAY['Present','Absent','Late','AWOL','Excused'])[1 + floor(random() * 5)::int],
+               'benchmark'
+        FROM (SELECT student_id, course_id FROM enrollments ORDER BY random() LIMIT %s) e
+        CROSS JOIN generate_series(CURRENT_DATE - 59, CURRENT_DATE, INTERVAL '1 day') d
+        LIMIT %s
+        ON CONFLICT (student_id, course_id, muster_date) DO NOTHING
+    """, (max(1, n_rows // 60 + 1), n_rows))
+    inserted = cur.rowcount
+    elapsed = time.perf_counter() - started
+    results['attendance'] = {'rows': inserted, 'seconds': round(elapsed, 3),
+                             'rows_per_sec': round(inserted / elapsed, 1) if elapsed else None}
+    conn.rollback()
+
+    started = time.perf_counter()
+    cur.execute("""
+        INSERT INTO grades (enrollment_id, assessment_type, score, weight, assessment_date, remarks)
+        SELECT e.enrollment_id, 'Quiz', round((random() * 100)::numeric, 2), 0.10,
+               CURRENT_DATE - (g %% 30), 'benchmark'
+        FROM (SELECT enrollment_id FROM enrollments ORDER BY random() LIMIT %s) e
+        CROSS JOIN generate_series(1, 10) g
+        LIMIT %s
+    """, (max(1, n_rows // 10 + 1), n_rows))
+    inserted = cur.rowcount
+    elapsed = time.perf_counter() - started
+    results['grades'] = {'rows': inserted, 'seconds': round(elapsed, 3),
+                         'rows_per_sec': round(inserted / elapsed, 1) if elapsed else None}
+    conn.rollback()
+    return results
+
+
+def compare(before_path, after_path):
+    """Print a before/after table from two result files."""
+    with open(before_path, encoding='utf-8') as f:
+        before = json.load(f)
+    with open(after_path, encoding='utf-8') as f:
+        after = json.load(f)
+
+    print(f"{'metric':<40}{before['label']:>14}{after['label']:>14}{'change':>10}")
+    for name, b in before['reads'].items():
+        a = after['reads'].get(name)
+        if a:
+            change = (a['median_ms'] - b['median_ms']) / b['median_ms'] * 100 if b['median_ms'] else 0
+            print(f"{'read ' + name + ' median ms':<40}{b['median_ms']:>14}{a['median_ms']:>14}{change:>9.1f}%")
+    for name, b in before['inserts'].items():
+        a = after['inserts'].get(name)
+        if a and b['rows_per_sec'] and a['rows_per_sec']:
+            change = (a['rows_per_sec'] - b['rows_per_sec']) / b['rows_per_sec'] * 100
+            print(f"{'insert ' + name + ' rows/s':<40}{b['rows_per_sec']:>14}{a['rows_per_sec']:>14}{change:>9.1f}%")
+    b_size = sum(i['bytes'] for i in before['indexes'])
+    a_size = sum(i['bytes'] for i in after['indexes'])
+    print(f"{'total index MB':<40}{b_size / 1e6:>14.1f}{a_size / 1e6:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark insert throughput and read latency for an index plan")
+    parser.add_argument("--label", default="current", help="Name for this run (e.g. before/after)")
+    parser.add_argument("--apply", metavar="SQL", help="Replace standalone indexes with this index script first")
+    parser.add_argument("--repeats", type=int, default=50, help="Executions per read query")
+    parser.add_argument("--insert-rows", type=int, default=20000, help="Rows per insert test (rolled back)")
+    parser.add_argument("--output", help="Write results JSON here (default reports/index_benchmark_<label>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    conn = create_connection()
+    if not conn:
+        return
+
+    try:
+        if args.apply:
+            apply_index_plan(conn, args.apply)
+
+        cur = conn.cursor()
+        result = {
+            'label': args.label,
+            'indexes': index_inventory(cur),
+            'reads': measure_reads(cur, args.repeats),
+        }
+        conn.rollback()
+        result['inserts'] = measure_inserts(conn, args.insert_rows)
+    finally:
+        conn.close()
+
+    output = args.output or os.path.join("reports", f"index_benchmark_{re.sub(r'[^A-Za-z0-9_-]', '_', args.label)}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+    for name, r in result['reads'].items():
+        print(f"  read {name}: median {r['median_ms']} ms, p95 {r['p95_ms']} ms")
+    for name, r in result['inserts'].items():
+        print(f"  insert {name}: {r['rows_per_sec']} rows/s")
+
+
+if __name__ == "__main__":
+    main()
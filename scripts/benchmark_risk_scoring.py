@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.risk_scoring import score, assessments_csv, MODEL_VERSION
+
+
+def synthetic_features(n, seed=42):
+    """Plausible feature arrays for n students (no database needed)."""
+    rng = np.random.default_rng(seed)
+    sessions_all = rng.integers(0, 200, n).astype(float)
+    sessions_recent = np.minimum(sessions_all, rng.integers(0, 15, n)).astype(float)
+    gpa = np.round(rng.uniform(0.0, 4.0, n), 2)
+    gpa[rng.random(n) < 0.05] = np.nan
+    grade_prior = rng.uniform(40, 100, n)
+    grade_prior[rng.random(n) < 0.1] = np.nan
+    return {
+        'student_id': np.arange(1, n + 1, dtype=np.int64),
+        'gpa': gpa,
+        'total_credits': rng.integers(0, 60, n).astype(float),
+        'present_all': np.floor(sessions_all * rng.uniform(0.4, 1.0, n)),
+        'sessions_all': sessions_all,
+        'present_recent': np.floor(sessions_recent * rng.uniform(0.3, 1.0, n)),
+        'sessions_recent': sessions_recent,
+        'grade_recent': rng.uniform(40, 100, n),
+        'grade_prior': grade_prior,
+        'failed_courses': rng.poisson(0.2, n).astype(float),
+        'withdrawn_courses': rng.poisson(0.1, n).astype(float),
+        'active_courses': rng.integers(0, 5, n).astype(float),
+    }
+
+
+def benchmark(n, repeats):
+    features = synthetic_features(n)
+    score_runs, csv_runs = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        scores = score(features)
+        score_runs.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        assessments_csv(features['student_id'], scores, date(2024, 1, 1))
+        csv_runs.append(time.perf_counter() - started)
+
+    levels, counts = np.unique(scores['risk_level'], return_counts=True)
+    return {
+        'students': n,
+        'model_version': MODEL_VERSION,
+        'score_s_median': round(float(np.median(score_runs)), 3),
+        'csv_s_median': round(float(np.median(csv_runs)), 3),
+        'students_per_sec': round(n / float(np.median(score_runs))),
+        'levels': dict(zip(levels.tolist(), counts.tolist())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorised attrition risk scorer")
+    parser.add_argument("--students", type=int, default=1_000_000, help="Synthetic students to score")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs to take the median over")
+    parser.add_argument("--db", action="store_true", help="Also run a full fetch/score/write against the database")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    result = {'synthetic': benchmark(args.students, args.repeats)}
+    r = result['synthetic']
+    print(f"Scored {r['students']:,} students: score {r['score_s_median']}s, "
+          f"CSV for COPY {r['csv_s_median']}s ({r['students_per_sec']:,} students/s)")
+
+    if args.db:
+        from src.risk_scoring import run_scoring
+        db_result = run_scoring()
+        if db_result:
+            result['database'] = db_result
+            print(f"Database run: {db_result['students']} students, fetch {db_result['fetch_s']:.2f}s, "
+                  f"score {db_result['score_s']:.2f}s, write {db_result['write_s']:.2f}s")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""End-to-end benchmark: controllers, views, stored procedures and reports.
+
+Seeds the configured database with generate_sample_data (bulk COPY mode,
+fixed seed), times each hot operation through the application code path and
+writes percentiles to JSON. A run counts as failed when the operation returns
+False, logs a database error or (reports) writes no file; failed runs are left
+out of the timings, their output is shown, and the suite exits 1. With
+--baseline, it also exits 1 if any operation's median or p95 regressed beyond
+--tolerance.
+
+    python -m scripts.benchmark_suite --scale small --label before
+    python -m scripts.benchmark_suite --skip-seed --baseline reports/benchmark_before.json
+
+WARNING: seeding clears the existing data (use a dedicated database).
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import shutil
+import tempfile
+import statistics
+import contextlib
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import controllers, reports, instrumentation
+from src.database import execute_query
+
+SCALE_PRESETS = {
+    'small': {'companies': 5, 'students': 1000, 'courses': 20, 'attendance_days': 10},
+    'medium': {'companies': 10, 'students': 20000, 'courses': 40, 'attendance_days': 20},
+    'large': {'companies': 20, 'students': 200000, 'courses': 60, 'attendance_days': 30},
+}
+
+VIEWS = ('vw_course_students', 'vw_course_roster', 'vw_course_avg_grades', 'vw_low_attendance',
+         'vw_top_gpa', 'vw_course_enrollment_stats', 'vw_transcript', 'vw_attendance_report')
+
+# Same statements as the CLI student list/search screen
+SEARCH_COUNT = ("SELECT COUNT(*) as cnt FROM students WHERE first_name ILIKE %s OR last_name ILIKE %s "
+                "OR email ILIKE %s OR rank ILIKE %s OR CAST(student_id AS TEXT) ILIKE %s")
+SEARCH_PAGE = ("SELECT student_id, first_name, last_name, email, rank FROM students WHERE first_name ILIKE %s "
+               "OR last_name ILIKE %s OR email ILIKE %s OR rank ILIKE %s OR CAST(student_id AS TEXT) ILIKE %s "
+               "ORDER BY student_id LIMIT 10 OFFSET 0")
+
+# Slow operations run fewer times
+HEAVY_OPERATIONS = ('sp_refresh_all_performance',)
+HEAVY_REPEATS = 3
+
+
+def seed_database(scale, seed):
+    """Clear the database and load a reproducible dataset of the given scale."""
+    from scripts.generate_sample_data import create_connection, clear_data, bulk_generate, generate_analytics
+
+    preset = SCALE_PRESETS[scale]
+    conn = create_connection()
+    if not conn:
+        return False
+    try:
+        clear_data(conn)
+        student_ids = bulk_generate(conn, preset['companies'], preset['students'], preset['courses'],
+                                    attendance_days=preset['attendance_days'], seed=seed)
+        generate_analytics(conn, student_ids)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+    finally:
+        conn.close()
+    return True
+
+
+def load_fixtures(n):
+    """Sample students, courses and enrollments the operations work on."""
+    students = execute_query(
+        "SELECT student_id, email, last_name FROM students WHERE email IS NOT NULL ORDER BY student_id LIMIT %s",
+        (n,), fetch=True) or []
+    courses = execute_query("SELECT course_code FROM courses ORDER BY course_id", fetch=True) or []
+    enrollments = execute_query("""
+        SELECT s.email, c.course_code
+        FROM enrollments e
+        JOIN students s ON s.student_id = e.student_id
+        JOIN courses c ON c.course_id = e.course_id
+        WHERE e.status = 'In Progress' AND s.email IS NOT NULL
+        ORDER BY e.enrollment_id
+        LIMIT %s
+    """, (n,), fetch=True) or []
+    # Enroll after every existing start date, so repeat runs insert rather
+    # than find the previous run's enrollments
+    last_start = execute_query("SELECT MAX(start_date) AS last_start FROM enrollments", fetch=True)
+    if not (students and courses and enrollments and last_start):
+        raise RuntimeError("Database has no students/courses/enrollments; run without --skip-seed")
+    enroll_base = max(last_start[0]['last_start'] or date.today(), date.today()) + timedelta(days=1)
+    return students, [c['course_code'] for c in courses], enrollments, enroll_base
+
+
+def build_operations(students, course_codes, enrollments, enroll_base):
+    """name -> callable(i); i is the repetition number, used to vary inputs.
+
+    Each callable returns False when the operation failed.
+    """
+    today = date.today()
+
+    def search(i):
+        term = f"%{students[i % len(students)]['last_name'][:4]}%"
+        return (execute_query(SEARCH_COUNT, (term,) * 5, fetch=True) is not None
+                and execute_query(SEARCH_PAGE, (term,) * 5, fetch=True) is not None)
+
+    ops = {
+        'enroll_student': lambda i: controllers.enroll_student(
+            students[i % len(students)]['email'], course_codes[i % len(course_codes)],
+            enroll_base + timedelta(days=i)),
+        'record_grade': lambda i: controllers.record_grade(
+            enrollments[i % len(enrollments)]['email'], enrollments[i % len(enrollments)]['course_code'],
+            'Quiz', 50 + (i * 7) % 50, 0.05, 'benchmark'),
+        'mark_attendance': lambda i: controllers.mark_attendance(
+            enrollments[i % len(enrollments)]['email'], enrollments[i % len(enrollments)]['course_code'],
+            today - timedelta(days=i % 30), ('Present', 'Absent', 'Late')[i % 3], 'benchmark'),
+        'student_search': search,
+    }
+    for view in VIEWS:
+        ops[f'view:{view}'] = lambda i, v=view: execute_query(f"SELECT * FROM {v}", fetch=True) is not None
+    ops['sp_refresh_all_performance'] = lambda i: execute_query(
+        "SELECT sp_refresh_all_performance() AS done", fetch=True, commit=True) is not None
+
+    # Reports write under ./reports; run from a scratch directory, where
+    # run_operations checks that each run wrote a file
+    ops.update({
+        'report:official_transcript': lambda i: reports.generate_official_transcript(
+            students[i % len(students)]['student_id']),
+        'report:company_readiness_ledger': lambda i: reports.generate_company_readiness_ledger(),
+        'report:attendance_csv': lambda i: reports.generate_attendance_report('csv'),
+        'report:attrition_watchlist_csv': lambda i: reports.generate_attrition_watchlist_report('csv'),
+        'report:attrition_watchlist_pdf': lambda i: reports.generate_attrition_watchlist_report('pdf'),
+        'report:course_grit_csv': lambda i: reports.generate_course_grit_report('csv'),
+        'report:course_grit_pdf': lambda i: reports.generate_course_grit_report('pdf'),
+        'report:daily_muster_csv': lambda i: reports.generate_daily_muster_report('csv'),
+        'report:daily_muster_pdf': lambda i: reports.generate_daily_muster_report('pdf'),
+    })
+    return ops
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    if len(ordered) > 1:
+        cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+        p50, p90, p95, p99 = cuts[49], cuts[89], cuts[94], cuts[98]
+    else:
+        p50 = p90 = p95 = p99 = ordered[0]
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'p50_ms': round(p50, 3),
+        'p90_ms': round(p90, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def database_errors():
+    """Statements that have failed so far (execute_query / execute_proc)."""
+    return sum(sum(entry['errors'].values()) for entry in instrumentation.get_stats().values())
+
+
+def timed_run(name, fn, i):
+    """Run fn(i) once. Returns (elapsed ms, None) or (elapsed ms, captured output) on failure."""
+    if name.startswith('report:'):
+        shutil.rmtree('reports', ignore_errors=True)
+    errors = database_errors()
+    output = io.StringIO()
+    # Controllers and reports print progress; keep the benchmark output readable
+    with contextlib.redirect_stdout(output):
+        started = time.perf_counter()
+        result = fn(i)
+        elapsed = (time.perf_counter() - started) * 1000
+    failed = (result is False or database_errors() != errors
+              or (name.startswith('report:') and not (os.path.isdir('reports') and os.listdir('reports'))))
+    return elapsed, (output.getvalue() or "(no output)") if failed else None
+
+
+def run_operations(ops, repeats, warmup=1, only=None):
+    """Time each operation. Failed runs are counted, not timed; their output goes to stderr."""
+    results = {}
+    scratch = tempfile.mkdtemp(prefix="srms_bench_")
+    cwd = os.getcwd()
+    os.chdir(scratch)
+    try:
+        for name, fn in ops.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            runs = HEAVY_REPEATS if name in HEAVY_OPERATIONS else repeats
+            samples, failures = [], 0
+            plan = [(repeats + w, False) for w in range(warmup)] + [(i, True) for i in range(runs)]
+            for i, timed in plan:
+                elapsed, error_output = timed_run(name, fn, i)
+                if error_output is not None:
+                    failures += 1
+                    if failures == 1:
+                        print(f"  {name} failed:\n{error_output.rstrip()}", file=sys.stderr)
+                elif timed:
+                    samples.append(elapsed)
+            results[name] = summarize(samples) if samples else {'runs': 0}
+            results[name]['failures'] = failures
+            r = results[name]
+            if samples:
+                print(f"  {name:<40} p50 {r['p50_ms']:>10.2f} ms   p95 {r['p95_ms']:>10.2f} ms"
+                      + (f"   FAILED {failures}x" if failures else ""))
+            else:
+                print(f"  {name:<40} FAILED every run")
+    finally:
+        os.chdir(cwd)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance_pct, floor_ms):
+    """Operations whose p50 or p95 grew by more than tolerance_pct (and floor_ms)."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get('results', {}).get(name)
+        # Operations that failed every run have no timings
+        if not before or 'p50_ms' not in before or 'p50_ms' not in current:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            old, new = before[metric], current[metric]
+            if new - old > floor_ms and new > old * (1 + tolerance_pct / 100.0):
+                regressions.append({'operation': name, 'metric': metric, 'baseline': old, 'current': new,
+                                    'change_pct': round((new - old) / old * 100, 1) if old else None})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark controllers, views, stored procedures and reports")
+    parser.add_argument("--scale", choices=sorted(SCALE_PRESETS), default="small", help="Seed dataset size")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the generated dataset")
+    parser.add_argument("--skip-seed", action="store_true", help="Benchmark the data already in the database")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per operation")
+    parser.add_argument("--only", action="append", help="Only operations whose name contains this (repeatable)")
+    parser.add_argument("--label", default="current", help="Name for this run")
+    parser.add_argument("--output", help="Results JSON (default reports/benchmark_<label>.json)")
+    parser.add_argument("--baseline", help="Fail if results regress against this results file")
+    parser.add_argument("--tolerance", type=float, default=25.0, help="Allowed slowdown in percent")
+    parser.add_argument("--floor-ms", type=float, default=2.0,
+                        help="Ignore slowdowns smaller than this many ms (timer noise)")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        print(f"Seeding '{args.scale}' dataset (seed {args.seed})...")
+        with contextlib.redirect_stdout(io.StringIO()):
+            seeded = seed_database(args.scale, args.seed)
+        if not seeded:
+            print("Could not connect to the database.")
+            sys.exit(2)
+
+    students, course_codes, enrollments, enroll_base = load_fixtures(max(args.repeats, 10) + 1)
+    print(f"Timing operations ({args.repeats} runs each)...")
+    results = run_operations(build_operations(students, course_codes, enrollments, enroll_base), args.repeats,
+                             only=args.only)
+
+    output = args.output or os.path.join("reports", f"benchmark_{args.label}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    version = execute_query("SELECT version() AS v", fetch=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'label': args.label,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'scale': None if args.skip_seed else args.scale,
+            'seed': None if args.skip_seed else args.seed,
+            'repeats': args.repeats,
+            'postgres': version[0]['v'] if version else None,
+            'results': results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    failed = {name: r['failures'] for name, r in results.items() if r['failures']}
+    if failed:
+        print(f"\n{len(failed)} operation(s) failed:", file=sys.stderr)
+        for name, count in failed.items():
+            print(f"  {name}: {count} failed run(s)", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.floor_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline} (tolerance {args.tolerance}%):")
+            for r in regressions:
+                print(f"  {r['operation']} {r['metric']}: {r['baseline']} -> {r['current']} ms ({r['change_pct']}%)")
+        else:
+            print(f"No regressions against {args.baseline}.")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
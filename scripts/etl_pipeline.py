@@ -6,7 +6,6 @@ from psycopg2 import OperationalError, extras
 import re
 from datetime import datetime
 import logging
-import random
 
 # Configure Logging
 logging.basicConfig(
@@ -70,8 +69,13 @@ def extract_data():
     
     try:
         df_students = pd.read_csv(os.path.join(RAW_DATA_DIR, 'students_raw.csv'))
-        with open(os.path.join(RAW_DATA_DIR, 'courses_catalog.json'), 'r') as f:
-            df_courses = pd.DataFrame(json.load(f))
+        catalog_jsonl = os.path.join(RAW_DATA_DIR, 'courses_catalog.jsonl')
+        if os.path.exists(catalog_jsonl):
+            df_courses = pd.read_json(catalog_jsonl, lines=True)
+        else:
+            # Legacy single-document catalog
+            with open(os.path.join(RAW_DATA_DIR, 'courses_catalog.json'), 'r') as f:
+                df_courses = pd.DataFrame(json.load(f))
         df_grades = pd.read_csv(os.path.join(RAW_DATA_DIR, 'grades_raw.csv'))
         df_attendance = pd.read_csv(os.path.join(RAW_DATA_DIR, 'attendance_raw.csv'))
         
@@ -145,10 +149,13 @@ def load_data(conn, df_students, df_courses, df_stats, df_att):
             company_id = res[0]
             
             # 1. Batch Load Students
+            # Reserve one service number per row in a single call (sequence-backed, never collides)
+            cur.execute("SELECT sp_allocate_service_numbers(%s)", (len(df_students),))
+            service_numbers = [r[0] for r in cur.fetchall()]
             student_data = [
-                (company_id, f"SN-{random.randint(2000, 9999)}", row['first_name'], row['last_name'], 
+                (company_id, sn, row['first_name'], row['last_name'], 
                  row['Email Address'], row['DOB'], row['Rank'])
-                for _, row in df_students.iterrows()
+                for sn, (_, row) in zip(service_numbers, df_students.iterrows())
             ]
             extras.execute_batch(cur, """
                 INSERT INTO students (company_id, service_number, first_name, last_name, email, date_of_birth, rank)
@@ -195,7 +202,6 @@ def load_data(conn, df_students, df_courses, df_stats, df_att):
         logger.error(f"Load failed, rolling back. Error: {e}")
 
 def main():
-    import random # for service numbers
     conn = create_connection()
     if conn:
         s, c, g, a = extract_data()
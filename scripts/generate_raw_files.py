@@ -2,6 +2,8 @@ import os
 import csv
 import json
 import random
+import argparse
+from datetime import date, timedelta
 from faker import Faker
 
 # Initialize Faker with consistent locale
@@ -11,38 +13,98 @@ fake = Faker(['zu_ZA', 'en_GB'])
 RAW_DATA_DIR = os.path.join(os.path.dirname(__file__), '../docs/data/raw')
 os.makedirs(RAW_DATA_DIR, exist_ok=True)
 
-def generate_messy_student_csv(filename='students_raw.csv', n=50):
+# Row counts per feed. 'small' matches the original fixture sizes; the larger
+# presets produce production-sized feeds for benchmarking etl_pipeline.
+SCALE_PRESETS = {
+    'small':  {'students': 50,        'courses': 10,   'grades': 100,        'attendance': 100},
+    'medium': {'students': 10_000,    'courses': 50,   'grades': 100_000,    'attendance': 250_000},
+    'large':  {'students': 250_000,   'courses': 200,  'grades': 2_500_000,  'attendance': 7_500_000},
+    'xl':     {'students': 1_000_000, 'courses': 500,  'grades': 10_000_000, 'attendance': 50_000_000},
+}
+
+WRITE_BUFFER_BYTES = 1 << 20  # 1 MiB file buffer
+ROW_BATCH = 10_000            # rows handed to writerows() at a time
+POOL_SIZE = 2_000             # pre-generated Faker values; per-row Faker calls are too slow at scale
+
+
+class FakerPools:
+    """Faker values generated once and sampled per row."""
+
+    def __init__(self, size=POOL_SIZE):
+        self.first_names = [fake.first_name() for _ in range(size)]
+        self.last_names = [fake.last_name() for _ in range(size)]
+        self.domains = [fake.domain_name() for _ in range(max(10, size // 20))]
+        self.phones = [fake.basic_phone_number() for _ in range(max(10, size // 10))]
+
+    def identity(self, i):
+        """Deterministic (first, last, domain) for student number `i`.
+
+        Grade and attendance feeds rebuild emails from the same index, so they
+        reference real students without keeping millions of emails in memory.
+        """
+        fn = self.first_names[i % len(self.first_names)]
+        ln = self.last_names[(i * 7919) % len(self.last_names)]
+        domain = self.domains[(i * 104729) % len(self.domains)]
+        return fn, ln, domain
+
+    def email(self, i):
+        fn, ln, domain = self.identity(i)
+        return f"{fn}.{ln}{i}@{domain}".replace(' ', '').lower()
+
+
+def _stream_rows(filepath, headers, rows):
+    """Write `rows` (an iterator) to CSV through a buffered writer in batches."""
+    count = 0
+    with open(filepath, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_BYTES) as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= ROW_BATCH:
+                writer.writerows(batch)
+                count += len(batch)
+                batch = []
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def _random_date(start, days):
+    return start + timedelta(days=random.randrange(days))
+
+
+def generate_messy_student_csv(filename='students_raw.csv', n=50, pools=None):
     """
     Generate a CSV file with intentional 'messy' data to test ETL cleaning logic.
-    
+
     Issues introduced:
     - Missing emails
     - Invalid email formats
     - Uppercase/lowercase inconsistencies in names
     - Duplicate entries
     """
+    pools = pools or FakerPools()
     filepath = os.path.join(RAW_DATA_DIR, filename)
     print(f"Generating messy CSV: {filepath}")
-    
+
     headers = ['Full Name', 'Email Address', 'Phone_Num', 'DOB', 'Rank']
-    
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        
-        for _ in range(n):
-            # 1. Generate core data
-            fn = fake.first_name()
-            ln = fake.last_name()
-            
+    dob_start = date.today() - timedelta(days=35 * 365)
+    dob_span = 17 * 365  # ages 18-35
+
+    def rows():
+        for i in range(n):
+            # 1. Core data
+            fn, ln, domain = pools.identity(i)
+
             # 2. Introduce "messiness"
-            
+
             # Name formatting issues (all caps, all lower)
             if random.random() < 0.2:
                 full_name = f"{fn.upper()} {ln.lower()}"
             else:
                 full_name = f"{fn} {ln}"
-                
+
             # Email issues
             rand_val = random.random()
             if rand_val < 0.1:
@@ -50,92 +112,128 @@ def generate_messy_student_csv(filename='students_raw.csv', n=50):
             elif rand_val < 0.2:
                 email = f"{fn}@{ln}" # Invalid format
             else:
-                email = f"{fn}.{ln}@{fake.domain_name()}"
-                
+                email = f"{fn}.{ln}{i}@{domain}".replace(" ", "")
+
             # Phone issues (inconsistent formats)
             if random.random() < 0.3:
-                phone = fake.basic_phone_number() # Random format
+                phone = random.choice(pools.phones) # Random format
             else:
-                phone = f"0{fake.random_int(60, 89)} {fake.random_int(100, 999)} {fake.random_int(1000, 9999)}" # Standard local
-                
-            dob = fake.date_of_birth(minimum_age=18, maximum_age=35).isoformat()
+                phone = f"0{random.randint(60, 89)} {random.randint(100, 999)} {random.randint(1000, 9999)}" # Standard local
+
+            dob = _random_date(dob_start, dob_span).isoformat()
             rank = random.choice(['Recruit', 'Cadet', 'Private', 'Unknown'])
-            
-            writer.writerow([full_name, email, phone, dob, rank])
-            
+
+            yield [full_name, email, phone, dob, rank]
+
         # Add a deliberate duplicate row for testing deduplication using specific values
-        writer.writerow(["John Doe", "john.doe@example.com", "082 123 4567", "2000-01-01", "Recruit"])
-        writer.writerow(["John Doe", "john.doe@example.com", "082 123 4567", "2000-01-01", "Recruit"])
+        yield ["John Doe", "john.doe@example.com", "082 123 4567", "2000-01-01", "Recruit"]
+        yield ["John Doe", "john.doe@example.com", "082 123 4567", "2000-01-01", "Recruit"]
 
-    print(f"Created {filename} with ~{n} rows.")
+    count = _stream_rows(filepath, headers, rows())
+    print(f"Created {filename} with {count} rows.")
 
-def generate_courses_json(filename='courses_catalog.json', n=10):
+
+def course_codes(n):
+    """Course codes for a catalog of size `n` (unique at any size)."""
+    departments = ['Cybersecurity', 'Logistics', 'Medical', 'Aviation']
+    return [f"{departments[i % len(departments)][:3].upper()}-{800 + i}" for i in range(n)]
+
+
+def generate_courses_jsonl(filename='courses_catalog.jsonl', n=10):
     """
-    Generate a JSON file representing an external course catalog.
+    Generate a JSON Lines file representing an external course catalog.
+
+    One course object per line, written as it is generated.
     """
     filepath = os.path.join(RAW_DATA_DIR, filename)
-    print(f"Generating JSON catalog: {filepath}")
-    
-    courses = []
+    print(f"Generating JSON Lines catalog: {filepath}")
+
     departments = ['Cybersecurity', 'Logistics', 'Medical', 'Aviation']
-    
-    for _ in range(n):
-        dept = random.choice(departments)
-        course = {
-            "course_code": f"{dept[:3].upper()}-{fake.random_int(800, 999)}", # New range
-            "course_title": f"{dept} {fake.word().capitalize()} Fundamentals",
-            "department": dept,
-            "credits": random.randint(2, 4),
-            "difficulty": random.choice(['Basic', 'Intermediate']),
-            "description": fake.sentence(nb_words=10)
-        }
-        courses.append(course)
-        
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(courses, f, indent=4)
-        
+    with open(filepath, 'w', encoding='utf-8', buffering=WRITE_BUFFER_BYTES) as f:
+        for i, code in enumerate(course_codes(n)):
+            dept = departments[i % len(departments)]
+            course = {
+                "course_code": code,
+                "course_title": f"{dept} {fake.word().capitalize()} Fundamentals",
+                "department": dept,
+                "credits": random.randint(2, 4),
+                "difficulty": random.choice(['Basic', 'Intermediate']),
+                "description": fake.sentence(nb_words=10)
+            }
+            f.write(json.dumps(course))
+            f.write('\n')
+
     print(f"Created {filename} with {n} courses.")
 
-def generate_messy_grades_csv(filename='grades_raw.csv', n=100):
+
+def generate_messy_grades_csv(filename='grades_raw.csv', n=100, n_students=50, n_courses=10, pools=None):
     """Generate raw assessment data with missing values and bad formats."""
+    pools = pools or FakerPools()
     filepath = os.path.join(RAW_DATA_DIR, filename)
     headers = ['Student_Email', 'Course_Code', 'Assessment', 'Raw_Score', 'Weight', 'Date']
-    
-    with open(filepath, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
+    codes = course_codes(n_courses)
+    year_start = date(date.today().year, 1, 1)
+    year_span = max(1, (date.today() - year_start).days + 1)
+
+    def rows():
         for _ in range(n):
-            score = random.uniform(30, 100) if random.random() > 0.1 else "" # Missing values
-            date = fake.date_this_year().strftime("%d/%m/%Y") if random.random() > 0.2 else fake.date_this_year().isoformat()
-            writer.writerow([
-                fake.email(), 
-                f"TAC-{random.randint(100, 110)}", 
-                random.choice(['Quiz', 'Exam', 'Final']), 
-                score, 
-                0.2, 
-                date
-            ])
-    print(f"Created {filename}")
-
-def generate_messy_attendance_csv(filename='attendance_raw.csv', n=100):
+            score = round(random.uniform(30, 100), 2) if random.random() > 0.1 else "" # Missing values
+            d = _random_date(year_start, year_span)
+            date_str = d.strftime("%d/%m/%Y") if random.random() > 0.2 else d.isoformat()
+            yield [
+                pools.email(random.randrange(n_students)),
+                random.choice(codes),
+                random.choice(['Quiz', 'Exam', 'Final']),
+                score,
+                0.2,
+                date_str
+            ]
+
+    count = _stream_rows(filepath, headers, rows())
+    print(f"Created {filename} with {count} rows.")
+
+
+def generate_messy_attendance_csv(filename='attendance_raw.csv', n=100, n_students=50, n_courses=10, pools=None):
     """Generate raw attendance logs."""
+    pools = pools or FakerPools()
     filepath = os.path.join(RAW_DATA_DIR, filename)
     headers = ['Email', 'Course', 'MusterDate', 'Status']
-    
-    with open(filepath, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
+    codes = course_codes(n_courses)
+    month_start = date.today().replace(day=1)
+    month_span = (date.today() - month_start).days + 1
+
+    def rows():
         for _ in range(n):
-            writer.writerow([
-                fake.email(),
-                f"TAC-{random.randint(100, 110)}",
-                fake.date_this_month().isoformat(),
+            yield [
+                pools.email(random.randrange(n_students)),
+                random.choice(codes),
+                _random_date(month_start, month_span).isoformat(),
                 random.choice(['Present', 'Absent', 'Late', 'Excused', 'UNK'])
-            ])
-    print(f"Created {filename}")
+            ]
+
+    count = _stream_rows(filepath, headers, rows())
+    print(f"Created {filename} with {count} rows.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate messy raw feeds for the ETL pipeline")
+    parser.add_argument("--scale", choices=sorted(SCALE_PRESETS), default="small", help="Row-count preset")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible output")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+        Faker.seed(args.seed)
+
+    preset = SCALE_PRESETS[args.scale]
+    print(f"Scale '{args.scale}': {preset}")
+    pools = FakerPools()
+
+    generate_messy_student_csv(n=preset['students'], pools=pools)
+    generate_courses_jsonl(n=preset['courses'])
+    generate_messy_grades_csv(n=preset['grades'], n_students=preset['students'], n_courses=preset['courses'], pools=pools)
+    generate_messy_attendance_csv(n=preset['attendance'], n_students=preset['students'], n_courses=preset['courses'], pools=pools)
+
 
 if __name__ == "__main__":
-    generate_messy_student_csv()
-    generate_courses_json()
-    generate_messy_grades_csv()
-    generate_messy_attendance_csv()
+    main()
@@ -1,6 +1,10 @@
 import os
+import io
+import csv
 import random
 import argparse
+import multiprocessing
+from collections import deque
 from datetime import datetime, timedelta
 from faker import Faker
 import psycopg2
@@ -291,74 +295,310 @@ def enroll_students(conn, student_ids, course_ids, dry_run=False):
     conn.commit()
     print(f"Created {count} enrollments.")
 
+# =====================================================
+# BULK MODE (COPY FROM STDIN)
+# =====================================================
+# Rows are built one chunk of students at a time and streamed with COPY instead
+# of one INSERT ... RETURNING per row. Primary keys are reserved up front from
+# each table's serial sequence, so child rows (enrollments, grades, attendance)
+# can reference their parents without fetching ids back row by row.
+#
+# Chunk building (the Faker-heavy part) can be sharded across worker processes.
+# Every chunk is seeded from the global seed and its chunk number, so the output
+# is reproducible for a given --seed and --chunk-size regardless of --workers.
+
+STUDENT_COLUMNS = [
+    "student_id", "company_id", "first_name", "last_name", "date_of_birth", "gender",
+    "contact_number", "email", "address", "rank", "status"
+]
+ENROLLMENT_COLUMNS = [
+    "enrollment_id", "student_id", "course_id", "start_date", "completion_date",
+    "final_score", "grade_letter", "status"
+]
+GRADE_COLUMNS = ["enrollment_id", "assessment_type", "score", "weight", "remarks"]
+ATTENDANCE_COLUMNS = ["student_id", "course_id", "muster_date", "status", "remarks", "recorded_by"]
+
+def _to_csv(rows):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
+def copy_csv(cursor, table, columns, payload):
+    """Stream a CSV payload into `table` using COPY FROM STDIN."""
+    if not payload:
+        return
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", io.StringIO(payload))
+
+def copy_rows(cursor, table, columns, rows):
+    """Stream `rows` (list of tuples) into `table` using COPY FROM STDIN (CSV)."""
+    copy_csv(cursor, table, columns, _to_csv(rows))
+    return len(rows)
+
+def reserve_ids(cursor, table, pk, n):
+    """Reserve `n` primary key values from the table's serial sequence in one query."""
+    if n <= 0:
+        return []
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+        (table, pk, n)
+    )
+    return [r[0] for r in cursor.fetchall()]
+
+def seed_generators(seed):
+    """Seed `random` and both Faker providers so generation is reproducible."""
+    random.seed(seed)
+    Faker.seed(seed)
+    fake_en.seed_instance(seed)
+
+def chunk_seed(seed, chunk_no):
+    """Derive a per-chunk seed from the global seed."""
+    return seed * 1000003 + chunk_no
+
+def _text_pools(size=200):
+    """Pre-generate Faker text once per chunk; per-row Faker text dominates bulk generation time."""
+    return {
+        "grade_remarks": [fake_en.sentence(nb_words=6) for _ in range(size)],
+        "attendance_remarks": [fake_en.sentence(nb_words=3) for _ in range(size)],
+        "recorders": ["Sgt. " + fake.last_name() for _ in range(size)],
+        "domains": [fake.domain_name() for _ in range(size)],
+        "addresses": [fake.address().replace('\n', ', ') for _ in range(size)],
+    }
+
+def _letter_grade(score):
+    if score >= 90: return 'A'
+    if score >= 80: return 'B'
+    if score >= 70: return 'C'
+    if score >= 60: return 'D'
+    return 'F'
+
+def build_chunk(task):
+    """Build CSV payloads for one chunk of students and their history.
+
+    Runs in a worker process, so it takes and returns only picklable values:
+    task = (seed, student_ids, enrollment_ids, company_ids, course_ids, attendance_days, today).
+    Returns {table: (csv_payload, row_count)}.
+    """
+    seed, sids, eids, company_ids, course_ids, attendance_days, today = task
+    seed_generators(seed)
+    pools = _text_pools()
+    eids = iter(eids)
+    courses_per_student = min(3, len(course_ids))
+
+    student_rows, enrollment_rows, grade_rows, attendance_rows = [], [], [], []
+    for sid in sids:
+        # service_number is omitted so the sequence-backed column default assigns it
+        f_name, l_name = get_regional_name()
+        local = f"{f_name}.{l_name}".lower().replace(' ', '')
+        student_rows.append((
+            sid, random.choice(company_ids), f_name, l_name,
+            fake.date_of_birth(minimum_age=18, maximum_age=30), random.choice(['Male', 'Female']),
+            generate_sa_phone(), f"{local}.{sid}@{random.choice(pools['domains'])}",
+            random.choice(pools["addresses"]), random.choice(['Recruit', 'Cadet', 'Private']), 'Active'
+        ))
+
+        for cid in random.sample(course_ids, k=courses_per_student):
+            eid = next(eids)
+            start = today - timedelta(days=random.randint(182, 365))
+            final_score = round(random.uniform(40, 100), 2)
+            enrollment_rows.append((
+                eid, sid, cid, start, start + timedelta(days=random.randint(30, 90)),
+                final_score, _letter_grade(final_score), 'Completed' if final_score >= 60 else 'Failed'
+            ))
+            for atype, w in [('Quiz', 0.2), ('Assignment', 0.3), ('Exam', 0.5)]:
+                grade_rows.append((eid, atype, round(random.uniform(60, 100), 2), w, random.choice(pools["grade_remarks"])))
+            for day in range(attendance_days):
+                curr = start + timedelta(days=day)
+                if curr > today: break
+                att_status = random.choice(['Present', 'Present', 'Absent', 'Late'])
+                remark = "On time" if att_status == 'Present' else random.choice(pools["attendance_remarks"])
+                attendance_rows.append((sid, cid, curr, att_status, remark, random.choice(pools["recorders"])))
+
+    return {
+        "students": (_to_csv(student_rows), len(student_rows)),
+        "enrollments": (_to_csv(enrollment_rows), len(enrollment_rows)),
+        "grades": (_to_csv(grade_rows), len(grade_rows)),
+        "attendance": (_to_csv(attendance_rows), len(attendance_rows)),
+    }
+
+def _copy_chunk(cursor, payloads, totals):
+    # Parents before children so foreign keys resolve within the transaction
+    for table, columns in [("students", STUDENT_COLUMNS), ("enrollments", ENROLLMENT_COLUMNS),
+                           ("grades", GRADE_COLUMNS), ("attendance", ATTENDANCE_COLUMNS)]:
+        payload, count = payloads[table]
+        copy_csv(cursor, table, columns, payload)
+        totals[table] += count
+
+def bulk_generate(conn, n_companies=5, n_students=100, n_courses=20, attendance_days=5,
+                  chunk_size=10000, workers=1, seed=None):
+    """Generate a full dataset with COPY, committing once per chunk of students.
+
+    With workers > 1, chunks are built in a process pool while the parent
+    streams finished chunks into the database in chunk order.
+    Returns the list of generated student_ids.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 31)
+    print(f"Bulk generation seed: {seed} (pass --seed {seed} to reproduce)")
+    seed_generators(seed)
+
+    cursor = conn.cursor()
+    pools = _text_pools()
+    today = datetime.now().date()
+
+    # Companies
+    company_ids = reserve_ids(cursor, "companies", "company_id", n_companies)
+    company_rows = [
+        (cid, f"Company {fake.word().capitalize()} {cid}", random.choice(pools["addresses"]),
+         " ".join(get_regional_name()))
+        for cid in company_ids
+    ]
+    copy_rows(cursor, "companies", ["company_id", "company_name", "location", "commanding_officer"], company_rows)
+    print(f"Copied {len(company_rows)} companies.")
+
+    # Courses. Names and codes carry the reserved id, so they stay unique at any
+    # catalog size and when the generator runs again against existing data
+    depts = ['Tactics', 'Engineering', 'Leadership', 'Weapons', 'Intelligence']
+    course_ids = reserve_ids(cursor, "courses", "course_id", n_courses)
+    course_rows = []
+    for cid in course_ids:
+        dept = random.choice(depts)
+        course_rows.append((
+            cid, f"{dept[:3].upper()}-{cid:04d}", f"{dept} {fake_en.word().capitalize()} {fake.random_int(1, 5)}",
+            random.randint(1, 5), dept, random.choice(['Basic', 'Intermediate', 'Advanced']),
+            fake_en.text(max_nb_chars=200)
+        ))
+    copy_rows(cursor, "courses", ["course_id", "course_code", "name", "credits", "department", "difficulty_level", "description"], course_rows)
+    conn.commit()
+    print(f"Copied {len(course_rows)} courses.")
+
+    student_ids = []
+    totals = {"students": 0, "enrollments": 0, "grades": 0, "attendance": 0}
+    courses_per_student = min(3, len(course_ids))
+
+    def tasks():
+        for chunk_no, offset in enumerate(range(0, n_students, chunk_size)):
+            n = min(chunk_size, n_students - offset)
+            sids = reserve_ids(cursor, "students", "student_id", n)
+            eids = reserve_ids(cursor, "enrollments", "enrollment_id", n * courses_per_student)
+            student_ids.extend(sids)
+            yield (chunk_seed(seed, chunk_no), sids, eids, company_ids, course_ids, attendance_days, today)
+
+    def stream(payloads):
+        _copy_chunk(cursor, payloads, totals)
+        conn.commit()
+        print(f"  Progress: {totals['students']}/{n_students} students copied...")
+
+    if workers > 1:
+        # Keep a bounded number of chunks in flight; all database work stays in
+        # this process and chunks are copied strictly in chunk order.
+        with multiprocessing.Pool(processes=workers) as pool:
+            pending = deque()
+            for task in tasks():
+                pending.append(pool.apply_async(build_chunk, (task,)))
+                if len(pending) > workers:
+                    stream(pending.popleft().get())
+            while pending:
+                stream(pending.popleft().get())
+    else:
+        for task in tasks():
+            stream(build_chunk(task))
+
+    print(f"Copied {totals['students']} students, {totals['enrollments']} enrollments, "
+          f"{totals['grades']} grades, {totals['attendance']} attendance records.")
+    return student_ids
+
 def generate_analytics(conn, student_ids, dry_run=False):
-    if dry_run: return
+    """Compute performance summaries and risk assessments set-wise.
+
+    One grouped pass builds per-student GPA, credits and attendance into a
+    temp table; two INSERT ... SELECT statements then write both analytics
+    tables. Round trips are constant regardless of the number of students.
+    """
+    if dry_run or not student_ids: return
     
     cursor = conn.cursor()
     print("Generating analytics (Performance & Risk)...")
-    summary_count, risk_count = 0, 0
-    
-    for sid in student_ids:
-        try:
-            cursor.execute("""
-                SELECT AVG(final_score), SUM(c.credits)
+
+    try:
+        cursor.execute("""
+            CREATE TEMP TABLE tmp_student_stats ON COMMIT DROP AS
+            WITH ids AS (
+                SELECT DISTINCT unnest(%s::int[]) AS student_id
+            ), enr AS (
+                SELECT e.student_id, AVG(e.final_score) AS avg_score, SUM(c.credits) AS total_credits
                 FROM enrollments e
                 JOIN courses c ON e.course_id = c.course_id
-                WHERE e.student_id = %s
-            """, (sid,))
-            avg_score, total_credits = cursor.fetchone()
-            
-            gpa = 0.0
-            if avg_score:
-                gpa = min(4.0, max(0.0, (float(avg_score) - 50) / 10))
-            
-            total_credits = total_credits or 0
-            
-            cursor.execute("""
-                SELECT COUNT(*) FILTER (WHERE status = 'Present'), COUNT(*)
-                FROM attendance WHERE student_id = %s
-            """, (sid,))
-            present, total_days = cursor.fetchone()
-            att_rate = (present / total_days * 100) if total_days and total_days > 0 else 100.0
-            
-            standing = 'Good Standing'
-            if gpa < 2.0: standing = 'Academic Warning'
-            if att_rate < 70: standing = 'Probation'
-            if gpa > 3.5: standing = 'Deans List'
-            
-            cursor.execute("""
-                INSERT INTO performance_summary (student_id, gpa, attendance_rate, total_credits, current_standing)
-                VALUES (%s, %s, %s, %s, %s) ON CONFLICT (student_id) DO NOTHING
-            """, (sid, gpa, att_rate, total_credits, standing))
-            summary_count += 1
-            
-            risk_score = 0
-            if gpa < 2.0: risk_score += 40
-            if att_rate < 80: risk_score += 30
-            if total_credits < 5: risk_score += 10
-            risk_score = min(100, risk_score + random.randint(0, 20))
-            
-            risk_level = 'Low'
-            if risk_score > 30: risk_level = 'Medium'
-            if risk_score > 60: risk_level = 'High'
-            if risk_score > 80: risk_level = 'Critical'
-            
-            cursor.execute("""
-                INSERT INTO attrition_risk (student_id, risk_score, risk_level, contributing_factors, model_version)
-                VALUES (%s, %s, %s, %s, 'v1.0')
-            """, (sid, risk_score, risk_level, f"GPA: {gpa:.2f}, Attendance: {att_rate:.1f}%"))
-            risk_count += 1
-        except Exception:
-            conn.rollback()
-            continue
-            
-    conn.commit()
+                WHERE e.student_id IN (SELECT student_id FROM ids)
+                GROUP BY e.student_id
+            ), att AS (
+                SELECT a.student_id, COUNT(*) FILTER (WHERE a.status = 'Present') AS present, COUNT(*) AS total_days
+                FROM attendance a
+                WHERE a.student_id IN (SELECT student_id FROM ids)
+                GROUP BY a.student_id
+            )
+            SELECT ids.student_id,
+                   CASE WHEN enr.avg_score IS NULL THEN 0.0
+                        ELSE LEAST(4.0, GREATEST(0.0, (enr.avg_score - 50) / 10)) END AS gpa,
+                   COALESCE(enr.total_credits, 0) AS total_credits,
+                   CASE WHEN att.total_days > 0 THEN att.present::DECIMAL / att.total_days * 100
+                        ELSE 100.0 END AS att_rate
+            FROM ids
+            LEFT JOIN enr ON enr.student_id = ids.student_id
+            LEFT JOIN att ON att.student_id = ids.student_id
+        """, (list(student_ids),))
+
+        # Standing precedence matches the original heuristic: Deans List > Probation > Academic Warning
+        cursor.execute("""
+            INSERT INTO performance_summary (student_id, gpa, attendance_rate, total_credits, current_standing)
+            SELECT student_id, gpa, att_rate, total_credits,
+                   CASE WHEN gpa > 3.5 THEN 'Deans List'
+                        WHEN att_rate < 70 THEN 'Probation'
+                        WHEN gpa < 2.0 THEN 'Academic Warning'
+                        ELSE 'Good Standing' END
+            FROM tmp_student_stats
+            ON CONFLICT (student_id) DO NOTHING
+        """)
+        summary_count = cursor.rowcount
+
+        cursor.execute("""
+            INSERT INTO attrition_risk (student_id, risk_score, risk_level, contributing_factors, model_version)
+            SELECT student_id, risk_score,
+                   CASE WHEN risk_score > 80 THEN 'Critical'
+                        WHEN risk_score > 60 THEN 'High'
+                        WHEN risk_score > 30 THEN 'Medium'
+                        ELSE 'Low' END,
+                   format('GPA: %s, Attendance: %s%%', to_char(gpa, 'FM0.00'), to_char(att_rate, 'FM990.0')),
+                   'v1.0'
+            FROM (
+                SELECT student_id, gpa, att_rate,
+                       LEAST(100, CASE WHEN gpa < 2.0 THEN 40 ELSE 0 END
+                                + CASE WHEN att_rate < 80 THEN 30 ELSE 0 END
+                                + CASE WHEN total_credits < 5 THEN 10 ELSE 0 END
+                                + floor(random() * 21)::INT) AS risk_score
+                FROM tmp_student_stats
+            ) scored
+        """)
+        risk_count = cursor.rowcount
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Analytics generation failed: {e}")
+        return
+
     print(f"Generated {summary_count} summaries and {risk_count} risk assessments.")
 
 def main():
     parser = argparse.ArgumentParser(description="Generate Sample Data for SRMS")
     parser.add_argument("--dry-run", action="store_true", help="Preview data without inserting into DB")
     parser.add_argument("--clean", action="store_true", help="Clear existing data before generating")
+    parser.add_argument("--bulk", action="store_true", help="Stream rows with COPY FROM STDIN (load-test scale)")
+    parser.add_argument("--companies", type=int, default=5, help="Number of companies")
+    parser.add_argument("--students", type=int, default=100, help="Number of students")
+    parser.add_argument("--courses", type=int, default=20, help="Number of courses")
+    parser.add_argument("--attendance-days", type=int, default=5, help="Muster days per enrollment (bulk mode)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Students per COPY chunk/commit (bulk mode)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes building chunks (bulk mode)")
+    parser.add_argument("--seed", type=int, default=None, help="Global seed for reproducible output (bulk mode)")
     args = parser.parse_args()
 
     conn = create_connection()
@@ -367,10 +607,18 @@ def main():
     try:
         if args.clean and not args.dry_run:
             clear_data(conn)
+
+        if args.bulk and not args.dry_run:
+            s_ids = bulk_generate(conn, args.companies, args.students, args.courses,
+                                  attendance_days=args.attendance_days, chunk_size=args.chunk_size,
+                                  workers=args.workers, seed=args.seed)
+            if s_ids:
+                generate_analytics(conn, s_ids)
+            return
         
-        c_ids = generate_companies(conn, n=5, dry_run=args.dry_run)
-        s_ids = generate_students(conn, c_ids, n=100, dry_run=args.dry_run)  # 100 students
-        course_ids = generate_courses(conn, n=20, dry_run=args.dry_run)  # 20 courses
+        c_ids = generate_companies(conn, n=args.companies, dry_run=args.dry_run)
+        s_ids = generate_students(conn, c_ids, n=args.students, dry_run=args.dry_run)
+        course_ids = generate_courses(conn, n=args.courses, dry_run=args.dry_run)
         
         if s_ids and course_ids:
             enroll_students(conn, s_ids, course_ids, dry_run=args.dry_run)
@@ -0,0 +1,263 @@
+"""Concurrent load generator: instructors marking muster and entering grades.
+
+Worker threads call the controllers (each call opens its own connection, as
+the CLI does) with a weighted mix of writes and reads. Concurrency ramps
+through --stages; each stage reports throughput, latency percentiles per
+operation, lock waits sampled from pg_locks, deadlocks from pg_stat_database,
+and errors by SQLSTATE (deadlock 40P01, serialization 40001, lock timeout
+55P03, unique violation 23505, ...) taken from the query instrumentation.
+
+    python -m scripts.load_test --stages 5,10,25,50 --stage-seconds 30
+
+Run it against a local database loaded with generate_sample_data.
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import contextlib
+from datetime import date, datetime, timedelta
+
+import psycopg2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import controllers, instrumentation
+from src.database import get_db_connection, execute_query
+from scripts.benchmark_suite import load_fixtures, summarize
+
+# Operation -> weight in the mix (06:00 muster is mostly attendance writes)
+DEFAULT_MIX = {
+    'mark_attendance': 50,
+    'record_grade': 20,
+    'read_attendance': 15,
+    'read_grades': 10,
+    'view_low_attendance': 5,
+}
+
+ERROR_NAMES = {
+    '40P01': 'deadlock',
+    '40001': 'serialization_failure',
+    '55P03': 'lock_not_available',
+    '57014': 'statement_timeout',
+    '23505': 'unique_violation',
+}
+
+LOCK_SAMPLE_QUERY = """
+SELECT COUNT(*) FILTER (WHERE NOT l.granted) AS waiting_locks,
+       COUNT(DISTINCT l.pid) FILTER (WHERE NOT l.granted) AS waiting_backends,
+       (SELECT COUNT(*) FROM pg_stat_activity
+        WHERE datname = current_database() AND wait_event_type = 'Lock') AS lock_wait_sessions
+FROM pg_locks l
+WHERE l.database = (SELECT oid FROM pg_database WHERE datname = current_database())
+"""
+
+
+def log(message):
+    # stdout is redirected while workers run (controllers print every call)
+    print(message, file=sys.__stdout__, flush=True)
+
+
+def build_operations(enrollments):
+    today = date.today()
+
+    def pick():
+        return random.choice(enrollments)
+
+    return {
+        'mark_attendance': lambda: controllers.mark_attendance(
+            *_pair(pick()), today - timedelta(days=random.randint(0, 2)),
+            random.choices(('Present', 'Late', 'Absent', 'Excused'), weights=(85, 7, 5, 3))[0], 'load test'),
+        'record_grade': lambda: controllers.record_grade(
+            *_pair(pick()), random.choice(('Quiz', 'Assignment', 'Practical')),
+            round(random.uniform(40, 100), 2), 0.05, 'load test'),
+        'read_attendance': lambda: controllers.get_student_attendance(*_pair(pick())),
+        'read_grades': lambda: controllers.get_student_grades(*_pair(pick())),
+        'view_low_attendance': lambda: execute_query("SELECT * FROM fn_low_attendance(14, 75.00) LIMIT 50",
+                                                     fetch=True),
+    }
+
+
+def _pair(enrollment):
+    return enrollment['email'], enrollment['course_code']
+
+
+class LockSampler(threading.Thread):
+    """Polls pg_locks on its own connection while a stage runs."""
+
+    def __init__(self, interval):
+        super().__init__(name="lock-sampler", daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = get_db_connection()
+        if not conn:
+            return
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                while not self._stop_event.is_set():
+                    cur.execute(LOCK_SAMPLE_QUERY)
+                    self.samples.append(dict(cur.fetchone()))
+                    self._stop_event.wait(self.interval)
+        except psycopg2.Error as e:
+            log(f"Lock sampler stopped: {e}")
+        finally:
+            conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=5)
+
+    def summary(self):
+        if not self.samples:
+            return {}
+        return {
+            'samples': len(self.samples),
+            'max_waiting_locks': max(s['waiting_locks'] for s in self.samples),
+            'avg_waiting_locks': round(sum(s['waiting_locks'] for s in self.samples) / len(self.samples), 2),
+            'max_waiting_backends': max(s['waiting_backends'] for s in self.samples),
+            'max_lock_wait_sessions': max(s['lock_wait_sessions'] for s in self.samples),
+            'pct_samples_with_waits': round(
+                100.0 * sum(1 for s in self.samples if s['waiting_locks']) / len(self.samples), 1),
+        }
+
+
+def database_counters():
+    rows = execute_query("""
+        SELECT deadlocks, xact_commit, xact_rollback
+        FROM pg_stat_database WHERE datname = current_database()
+    """, fetch=True)
+    return dict(rows[0]) if rows else {}
+
+
+def error_counts():
+    """SQLSTATE -> count across every statement in the instrumentation registry."""
+    totals = {}
+    for entry in instrumentation.get_stats().values():
+        for code, count in entry['errors'].items():
+            totals[code] = totals.get(code, 0) + count
+    return totals
+
+
+def run_stage(concurrency, seconds, operations, mix, sample_interval, think_ms):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    latencies = {n: [] for n in names}
+    failures = {n: 0 for n in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        while time.perf_counter() < deadline:
+            name = random.choices(names, weights)[0]
+            started = time.perf_counter()
+            ok = operations[name]()
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies[name].append(elapsed)
+                if ok is False:
+                    failures[name] += 1
+            if think_ms:
+                time.sleep(random.uniform(0, think_ms) / 1000)
+
+    errors_before = error_counts()
+    db_before = database_counters()
+    sampler = LockSampler(sample_interval)
+    sampler.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, name=f"instructor-{i}") for i in range(concurrency)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - started
+    sampler.stop()
+    db_after = database_counters()
+
+    errors = {}
+    for code, count in error_counts().items():
+        delta = count - errors_before.get(code, 0)
+        if delta:
+            errors[ERROR_NAMES.get(code, code)] = delta
+
+    total_ops = sum(len(v) for v in latencies.values())
+    return {
+        'concurrency': concurrency,
+        'seconds': round(wall, 2),
+        'operations': total_ops,
+        'throughput_ops_s': round(total_ops / wall, 1) if wall else None,
+        'latency': {n: {**summarize(v), 'failed': failures[n]} for n, v in latencies.items() if v},
+        'locks': sampler.summary(),
+        'deadlocks': (db_after.get('deadlocks', 0) - db_before.get('deadlocks', 0)) if db_before else None,
+        'rollbacks': (db_after.get('xact_rollback', 0) - db_before.get('xact_rollback', 0)) if db_before else None,
+        'errors': errors,
+    }
+
+
+def print_stage(result):
+    log(f"\n== {result['concurrency']} concurrent instructors: {result['operations']} ops in "
+        f"{result['seconds']}s ({result['throughput_ops_s']} ops/s)")
+    log(f"   {'operation':<22}{'runs':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'failed':>8}")
+    for name, r in result['latency'].items():
+        log(f"   {name:<22}{r['runs']:>7}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['failed']:>8}")
+    locks = result['locks']
+    if locks:
+        log(f"   lock waits: max {locks['max_waiting_locks']} locks / {locks['max_waiting_backends']} backends, "
+            f"waits in {locks['pct_samples_with_waits']}% of samples")
+    log(f"   deadlocks: {result['deadlocks']}, rollbacks: {result['rollbacks']}, "
+        f"errors: {result['errors'] or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent muster/grade-entry load test")
+    parser.add_argument("--stages", default="5,10,25,50", help="Comma-separated concurrency levels to ramp through")
+    parser.add_argument("--stage-seconds", type=float, default=30, help="Duration of each stage")
+    parser.add_argument("--think-ms", type=float, default=0, help="Max random pause between a worker's operations")
+    parser.add_argument("--mix", help="Override weights, e.g. mark_attendance=70,record_grade=30")
+    parser.add_argument("--enrollments", type=int, default=500, help="Enrollments the workers pick from")
+    parser.add_argument("--sample-interval", type=float, default=0.25, help="Seconds between pg_locks samples")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the operation mix")
+    parser.add_argument("--label", default="current", help="Name for this run")
+    parser.add_argument("--output", help="Results JSON (default reports/load_test_<label>.json)")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    mix = dict(DEFAULT_MIX)
+    if args.mix:
+        mix = {k: float(v) for k, v in (item.split('=') for item in args.mix.split(','))}
+        unknown = set(mix) - set(DEFAULT_MIX)
+        if unknown:
+            parser.error(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    stages = [int(s) for s in args.stages.split(',') if s.strip()]
+
+    # Slow-query logging would measure the log file under contention; keep it off
+    os.environ.setdefault("SLOW_QUERY_MS", "60000")
+    _, _, enrollments, _ = load_fixtures(args.enrollments)
+    operations = build_operations(enrollments)
+    log(f"Load test over {len(enrollments)} enrollments, mix {mix}, stages {stages}")
+
+    results = []
+    for concurrency in stages:
+        result = run_stage(concurrency, args.stage_seconds, operations, mix, args.sample_interval, args.think_ms)
+        print_stage(result)
+        results.append(result)
+
+    output = args.output or os.path.join("reports", f"load_test_{args.label}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'label': args.label, 'created_at': datetime.now().isoformat(timespec='seconds'),
+                   'mix': mix, 'stage_seconds': args.stage_seconds, 'stages': results}, f, indent=2)
+    log(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import argparse
+import logging
+import psycopg2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.database import get_db_connection, CHANGE_LOG_KEEP
+
+# Configure Logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Materialized views and the function that refreshes each one
+REFRESH_FUNCTIONS = {
+    'mv_course_avg_grades': 'sp_refresh_course_avg_grades',
+}
+
+
+def create_connection():
+    """Database connection in autocommit mode: each refresh is its own transaction."""
+    conn = get_db_connection()
+    if conn:
+        conn.autocommit = True
+    return conn
+
+
+def refresh_all(conn, views=None):
+    """Refresh each materialized view; a failure is logged and does not stop the others."""
+    for view in views or REFRESH_FUNCTIONS:
+        started = time.perf_counter()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT {REFRESH_FUNCTIONS[view]}() AS refreshed_at")
+                refreshed_at = cur.fetchone()['refreshed_at']
+            logger.info(f"Refreshed {view} in {time.perf_counter() - started:.2f}s (data as of {refreshed_at})")
+        except psycopg2.Error as e:
+            logger.error(f"Refresh of {view} failed: {e}")
+
+
+def maintain_partitions(conn, archive_after_months=None):
+    """Create upcoming attendance partitions and optionally archive old ones."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT sp_ensure_attendance_partitions() AS created")
+            created = cur.fetchone()['created']
+            if created:
+                logger.info(f"Created {created} attendance/counter partition(s)")
+            if archive_after_months:
+                cur.execute("SELECT sp_archive_attendance_partitions(%s) AS detached", (archive_after_months,))
+                detached = cur.fetchone()['detached']
+                if detached:
+                    logger.info(f"Archived {detached} attendance partition(s)")
+    except psycopg2.Error as e:
+        logger.error(f"Partition maintenance failed: {e}")
+
+
+def prune_change_log(conn):
+    """Drop table_changes rows older than the analytics snapshot reads back."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT sp_prune_table_changes(%s) AS pruned", (CHANGE_LOG_KEEP,))
+            pruned = cur.fetchone()['pruned']
+            if pruned:
+                logger.info(f"Pruned {pruned} change log row(s)")
+    except psycopg2.Error as e:
+        logger.error(f"Change log pruning failed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh reporting materialized views and attendance partitions")
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between refreshes")
+    parser.add_argument("--once", action="store_true", help="Refresh once and exit")
+    parser.add_argument("--view", choices=sorted(REFRESH_FUNCTIONS), action="append",
+                        help="Refresh only this view (repeatable)")
+    parser.add_argument("--archive-after-months", type=int, default=None,
+                        help="Detach attendance partitions older than this many months")
+    args = parser.parse_args()
+
+    conn = create_connection()
+    if not conn:
+        return
+
+    try:
+        while True:
+            maintain_partitions(conn, args.archive_after_months)
+            prune_change_log(conn)
+            refresh_all(conn, args.view)
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        logger.info("Refresh scheduler stopped.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
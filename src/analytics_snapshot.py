@@ -0,0 +1,356 @@
+"""In-memory columnar snapshot for report aggregates.
+
+Loads compact, integer-keyed frames (students, enrollments, the attendance
+counters and the small lookup tables) in one read-only transaction, then
+answers the report aggregates with pandas/NumPy instead of one heavy query per
+report. The snapshot refreshes incrementally from the table_changes log:
+statements committed since the previous refresh's txid snapshot name the keys
+they wrote, and only those rows are re-read (a table with no logged changes is
+skipped; a TRUNCATE or a statement over the key cap reloads the table).
+
+Attendance is held as the trigger-maintained counters rather than raw rows, so
+archived months still count, as in fn_low_attendance. After logged attendance
+changes the per-enrollment totals are re-read, and the rolling counters of the
+student/course pairs involved.
+
+Typical use:
+    snap = AnalyticsSnapshot()
+    snap.load()
+    snap.start_auto_refresh(300)
+    generate_course_grit_report('pdf', snapshot=snap)
+"""
+import io
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.database import get_db_connection, TABLE_CHANGES_QUERY, CHANGE_LOG_KEEP
+
+# Columns kept per table. `key` is the primary key logged in table_changes.
+TABLES = {
+    'companies': {
+        'key': 'company_id',
+        'columns': ['company_id', 'company_name', 'commanding_officer'],
+        'dtypes': {'company_id': 'int32'},
+    },
+    'students': {
+        'key': 'student_id',
+        'columns': ['student_id', 'company_id', 'service_number', 'first_name', 'last_name', 'status'],
+        'dtypes': {'student_id': 'int32', 'company_id': 'float64', 'status': 'category'},
+    },
+    'courses': {
+        'key': 'course_id',
+        'columns': ['course_id', 'course_code', 'name', 'department'],
+        'dtypes': {'course_id': 'int32'},
+    },
+    'enrollments': {
+        'key': 'enrollment_id',
+        'columns': ['enrollment_id', 'student_id', 'course_id', 'status',
+                    'final_score', 'weighted_sum', 'weight_total'],
+        'dtypes': {'enrollment_id': 'int32', 'student_id': 'int32', 'course_id': 'int32', 'status': 'category',
+                   'final_score': 'float64', 'weighted_sum': 'float64', 'weight_total': 'float64'},
+    },
+    'performance_summary': {
+        'key': 'summary_id',
+        'columns': ['summary_id', 'student_id', 'gpa', 'current_standing'],
+        'dtypes': {'summary_id': 'int32', 'student_id': 'int32', 'gpa': 'float64', 'current_standing': 'category'},
+    },
+    'attrition_risk': {
+        'key': 'risk_id',
+        'columns': ['risk_id', 'student_id', 'assessment_date', 'risk_score', 'risk_level', 'contributing_factors'],
+        'dtypes': {'risk_id': 'int32', 'student_id': 'int32', 'risk_score': 'float64', 'risk_level': 'category'},
+    },
+}
+
+# Maintained from attendance by triggers (not logged themselves); keyed by
+# student/course pair
+COUNTER_TABLES = {
+    'attendance_counter_totals': {
+        'key': ['student_id', 'course_id'],
+        'columns': ['student_id', 'course_id', 'present_count', 'total_count', 'archived_present',
+                    'archived_total', 'last_date'],
+        'dtypes': {'student_id': 'int32', 'course_id': 'int32', 'present_count': 'int32', 'total_count': 'int32',
+                   'archived_present': 'int32', 'archived_total': 'int32'},
+    },
+    'attendance_rolling_counters': {
+        'key': ['student_id', 'course_id'],
+        'columns': ['student_id', 'course_id', 'muster_date', 'cum_present', 'cum_total'],
+        'dtypes': {'student_id': 'int32', 'course_id': 'int32', 'cum_present': 'int32', 'cum_total': 'int32'},
+    },
+}
+
+PAIRS_WHERE = "(student_id, course_id) IN (SELECT * FROM unnest(%s::INT[], %s::INT[]))"
+
+DATE_COLUMNS = ('muster_date', 'assessment_date', 'last_date')
+
+RISK_ORDER = {'Critical': 1, 'High': 2, 'Medium': 3}
+
+
+class AnalyticsSnapshot:
+    """Columnar copy of the reporting tables with in-memory aggregates."""
+
+    def __init__(self):
+        self.frames = {}
+        self.loaded_at = None
+        self._txid_snapshot = None
+        self._lock = threading.RLock()
+        self._timer = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load(self):
+        """Read every table in full. Returns True on success."""
+        return self.refresh(full=True)
+
+    def refresh(self, full=False):
+        """Bring the snapshot up to date; only changed tables are read.
+
+        Returns True on success, False if the database could not be read
+        (the previous snapshot is kept).
+        """
+        conn = get_db_connection()
+        if not conn:
+            return False
+        try:
+            conn.set_session(readonly=True, isolation_level='REPEATABLE READ')
+            with conn.cursor() as cur:
+                cur.execute("SELECT now() AS read_at, txid_current_snapshot()::text AS txid_snapshot")
+                row = cur.fetchone()
+                read_at, txid_snapshot = row['read_at'], row['txid_snapshot']
+
+                changes = None if full else self._changes_since(cur, read_at)
+                frames = {}
+                for table, spec in TABLES.items():
+                    frames[table] = self._refresh_table(cur, table, spec, changes)
+                frames.update(self._refresh_counters(cur, changes))
+            conn.rollback()
+        except Exception as e:
+            print(f"Analytics snapshot refresh failed: {e}")
+            return False
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.frames = frames
+            self._txid_snapshot = txid_snapshot
+            self.loaded_at = read_at
+        return True
+
+    def _changes_since(self, cur, read_at):
+        """{table: changed keys, or None to reread} since the last refresh; None if the log cannot tell."""
+        if not self._txid_snapshot or not self.loaded_at or read_at - self.loaded_at >= CHANGE_LOG_KEEP:
+            return None
+        cur.execute(TABLE_CHANGES_QUERY, {'since': self._txid_snapshot, 'tables': [*TABLES, 'attendance']})
+        changes = {}
+        for r in cur.fetchall():
+            keys = changes.setdefault(r['table_name'], set())
+            if keys is None or r['keys'] is None:
+                changes[r['table_name']] = None
+            else:
+                keys.update(r['keys'])
+        return changes
+
+    def _refresh_table(self, cur, table, spec, changes):
+        """Re-read the rows of `table` named in `changes` ({table: keys or None}; None = read everything)."""
+        current = self.frames.get(table)
+        if changes is None or current is None:
+            return self._read(cur, table, spec)
+        if table not in changes:
+            return current
+        keys = changes[table]
+        if keys is None:
+            return self._read(cur, table, spec)
+
+        # Changed keys that are no longer returned were deleted
+        delta = self._read(cur, table, spec, f"{spec['key']} = ANY(%s)", (sorted(keys),))
+        kept = current[~current.index.isin(keys)]
+        if delta.empty:
+            return kept
+        merged = pd.concat([kept, delta]).sort_index()
+        return self._restore_categories(merged, spec)
+
+    def _refresh_counters(self, cur, changes):
+        """Counter frames after the attendance changes in `changes` (None = read everything)."""
+        totals = self.frames.get('attendance_counter_totals')
+        rolling = self.frames.get('attendance_rolling_counters')
+        if changes is None or totals is None or rolling is None or changes.get('attendance', set()) is None:
+            return {table: self._read(cur, table, spec) for table, spec in COUNTER_TABLES.items()}
+        if 'attendance' not in changes:
+            return {'attendance_counter_totals': totals, 'attendance_rolling_counters': rolling}
+
+        # One row per enrollment: re-read in full. Pairs whose totals moved
+        # (deleted rows leave no attendance_id to look up) plus the pairs of
+        # changed rows that still exist have new rolling counters.
+        new_totals = self._read(cur, 'attendance_counter_totals', COUNTER_TABLES['attendance_counter_totals'])
+        moved = pd.concat([totals, new_totals]).drop_duplicates(keep=False)
+        pairs = set(moved.index)
+        cur.execute("SELECT DISTINCT student_id, course_id FROM attendance WHERE attendance_id = ANY(%s)",
+                    (sorted(changes['attendance']),))
+        pairs.update((r['student_id'], r['course_id']) for r in cur.fetchall())
+        if not pairs:
+            return {'attendance_counter_totals': new_totals, 'attendance_rolling_counters': rolling}
+
+        ordered = sorted(pairs)
+        delta = self._read(cur, 'attendance_rolling_counters', COUNTER_TABLES['attendance_rolling_counters'],
+                           PAIRS_WHERE, ([s for s, _ in ordered], [c for _, c in ordered]))
+        kept = rolling[~rolling.index.isin(ordered)]
+        return {'attendance_counter_totals': new_totals,
+                'attendance_rolling_counters': kept if delta.empty else pd.concat([kept, delta]).sort_index()}
+
+    def _read(self, cur, table, spec, where=None, params=None):
+        """COPY the table (or the rows matching `where`) into a frame indexed by its key."""
+        select = f"SELECT {', '.join(spec['columns'])} FROM {table}"
+        if where:
+            select += " WHERE " + cur.mogrify(where, params).decode()
+        buf = io.StringIO()
+        cur.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER true)", buf)
+        buf.seek(0)
+
+        frame = pd.read_csv(buf, dtype=spec['dtypes'], keep_default_na=False, na_values=[''])
+        for col in frame.columns:
+            if col in DATE_COLUMNS:
+                frame[col] = pd.to_datetime(frame[col], format='%Y-%m-%d')
+        return frame.set_index(spec['key'], drop=False)
+
+    @staticmethod
+    def _restore_categories(frame, spec):
+        # concat of frames with different category sets falls back to object
+        for col, dtype in spec['dtypes'].items():
+            if dtype == 'category' and frame[col].dtype != 'category':
+                frame[col] = frame[col].astype('category')
+        return frame
+
+    # ------------------------------------------------------------------
+    # Timed refresh
+    # ------------------------------------------------------------------
+    def start_auto_refresh(self, interval_seconds=300):
+        """Refresh in a daemon thread every `interval_seconds` until stop_auto_refresh()."""
+        if self._timer and self._timer.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval_seconds):
+                self.refresh()
+
+        self._timer = threading.Thread(target=loop, name="analytics-snapshot-refresh", daemon=True)
+        self._timer.start()
+
+    def stop_auto_refresh(self):
+        self._stop.set()
+        if self._timer:
+            self._timer.join(timeout=5)
+            self._timer = None
+
+    # ------------------------------------------------------------------
+    # Aggregates (row shapes match the SQL used by src/reports.py)
+    # ------------------------------------------------------------------
+    def _frames(self, *names):
+        with self._lock:
+            if not self.frames:
+                raise RuntimeError("Analytics snapshot is not loaded; call load() first")
+            return [self.frames[n] for n in names]
+
+    def company_readiness(self):
+        """Average GPA and good-standing counts per company."""
+        companies, students, perf = self._frames('companies', 'students', 'performance_summary')
+        df = (perf[['student_id', 'gpa', 'current_standing']].reset_index(drop=True)
+              .merge(students[['student_id', 'company_id']].reset_index(drop=True), on='student_id')
+              .dropna(subset=['company_id'])
+              .astype({'company_id': 'int32'})
+              .merge(companies[['company_id', 'company_name', 'commanding_officer']].reset_index(drop=True),
+                     on='company_id'))
+        df['good'] = df['current_standing'].astype(str).str.lower().str.startswith('good')
+        out = (df.groupby(['company_name', 'commanding_officer'], dropna=False, observed=True)
+               .agg(avg_gpa=('gpa', 'mean'), good_count=('good', 'sum'), total_students=('student_id', 'size'))
+               .reset_index()
+               .sort_values('avg_gpa', ascending=False, na_position='first'))
+        return _records(out)
+
+    def course_grit(self):
+        """Grade buckets and failures per department (course_code prefix)."""
+        courses, enrollments = self._frames('courses', 'enrollments')
+        e = enrollments
+        with np.errstate(divide='ignore', invalid='ignore'):
+            running = np.where(e['weight_total'] > 0, e['weighted_sum'] / e['weight_total'], np.nan)
+        score = e['final_score'].to_numpy()
+        score = np.where(np.isnan(score), running, score)
+
+        df = pd.DataFrame({
+            'course_id': e['course_id'].to_numpy(),
+            'a_bucket': score >= 90,
+            'b_bucket': (score >= 80) & (score <= 89.999),
+            'c_bucket': (score >= 70) & (score <= 79.999),
+            'd_f_bucket': score < 70,
+            'failed_count': (e['status'] == 'Failed').to_numpy(),
+        }).merge(courses[['course_id', 'course_code']].reset_index(drop=True), on='course_id')
+        df['department'] = df['course_code'].str.split('-', n=1).str[0]
+
+        out = (df.groupby('department')
+               .agg(a_bucket=('a_bucket', 'sum'), b_bucket=('b_bucket', 'sum'), c_bucket=('c_bucket', 'sum'),
+                    d_f_bucket=('d_f_bucket', 'sum'), enrollments=('course_id', 'size'),
+                    failed_count=('failed_count', 'sum'))
+               .reset_index()
+               .sort_values('department'))
+        out['total_enrollments'] = out['enrollments']
+        out['data_as_of'] = self.loaded_at
+        return _records(out[['department', 'a_bucket', 'b_bucket', 'c_bucket', 'd_f_bucket', 'enrollments',
+                             'total_enrollments', 'failed_count', 'data_as_of']])
+
+    def low_attendance(self, window_days=None, threshold=75.0):
+        """Student/course pairs under `threshold` percent present (same rules as fn_low_attendance).
+
+        Totals include archived months; a window subtracts the last rolling
+        counter on or before its start (or the archived base if none is left).
+        """
+        totals, rolling = self._frames('attendance_counter_totals', 'attendance_rolling_counters')
+        t = totals.reset_index(drop=True)
+        present, total = t['present_count'], t['total_count']
+        if window_days is not None:
+            cutoff = pd.Timestamp(date.today() - timedelta(days=window_days))
+            base = (rolling[rolling['muster_date'] <= cutoff].reset_index(drop=True)
+                    .sort_values('muster_date')
+                    .drop_duplicates(['student_id', 'course_id'], keep='last'))
+            t = (t[t['last_date'] > cutoff]
+                 .merge(base[['student_id', 'course_id', 'cum_present', 'cum_total']],
+                        on=['student_id', 'course_id'], how='left'))
+            present = t['present_count'] - t['cum_present'].fillna(t['archived_present'])
+            total = t['total_count'] - t['cum_total'].fillna(t['archived_total'])
+        rates = pd.DataFrame({'student_id': t['student_id'], 'course_id': t['course_id'],
+                              'present_sessions': present.astype('int64'), 'total_sessions': total.astype('int64')})
+        rates = rates[rates['total_sessions'] > 0]
+        rates['attendance_rate'] = (rates['present_sessions'] / rates['total_sessions'] * 100).round(2)
+        return rates[rates['attendance_rate'] < threshold]
+
+    def attrition_watchlist(self, window_days=None, threshold=75.0):
+        """Each student's latest risk assessment with any low-attendance courses, most severe first."""
+        risk, students, courses = self._frames('attrition_risk', 'students', 'courses')
+        risk = (risk.reset_index(drop=True)
+                .sort_values(['student_id', 'assessment_date', 'risk_id'], ascending=[True, False, False])
+                .drop_duplicates('student_id'))
+        low = self.low_attendance(window_days, threshold).rename(columns={'course_id': 'low_att_course_id'})
+        df = (risk[['student_id', 'risk_score', 'risk_level', 'contributing_factors']].reset_index(drop=True)
+              .merge(students[['student_id', 'service_number', 'first_name', 'last_name']].reset_index(drop=True),
+                     on='student_id')
+              .merge(low[['student_id', 'low_att_course_id', 'attendance_rate']], on='student_id', how='left')
+              .astype({'low_att_course_id': 'Int64'})
+              .merge(courses[['course_id', 'course_code', 'name']].reset_index(drop=True)
+                     .rename(columns={'course_id': 'low_att_course_id', 'name': 'low_att_course_name'})
+                     .astype({'low_att_course_id': 'Int64'}),
+                     on='low_att_course_id', how='left'))
+        df['_order'] = df['risk_level'].astype(str).map(RISK_ORDER).fillna(4)
+        df = df.sort_values(['_order', 'risk_score'], ascending=[True, False], kind='stable')
+        return _records(df[['student_id', 'service_number', 'first_name', 'last_name', 'risk_score', 'risk_level',
+                            'contributing_factors', 'low_att_course_id', 'course_code', 'low_att_course_name',
+                            'attendance_rate']])
+
+
+def _records(frame):
+    """DataFrame -> list of dicts with plain Python values (None for missing)."""
+    frame = frame.astype(object).where(frame.notna(), None)
+    return [{k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+            for row in frame.to_dict('records')]
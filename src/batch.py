@@ -0,0 +1,308 @@
+"""Non-interactive subcommands for cron and scripted jobs.
+
+    python main.py report grit --format csv
+    python main.py report transcript --student-id 42
+    python main.py report-pack --format pdf
+    python main.py refresh-performance
+    python main.py import-grades scores.csv --workers 4
+    python main.py run "refresh-views" "report grit --format pdf" "report muster" --jobs 3
+
+Every command reuses the controllers and report generators, never prompts,
+and exits 0 on success, 1 on failure and 2 on a usage error. `run` executes
+independent jobs concurrently in worker processes (ReportLab rendering is
+CPU-bound); chain dependent jobs with `&&` instead.
+"""
+import io
+import os
+import csv
+import sys
+import time
+import shlex
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from src.database import get_db_connection
+from src.utils import validate_email, validate_date, validate_score
+
+COMMANDS = ('report', 'report-pack', 'refresh-performance', 'refresh-views', 'score-risk', 'import-grades', 'run')
+
+# report name -> (generator name in src.reports, supported formats)
+REPORTS = {
+    'transcript': ('generate_official_transcript', ('pdf',)),
+    'ledger': ('generate_company_readiness_ledger', ('pdf',)),
+    'watchlist': ('generate_attrition_watchlist_report', ('csv', 'pdf')),
+    'grit': ('generate_course_grit_report', ('csv', 'pdf')),
+    'muster': ('generate_daily_muster_report', ('csv', 'pdf')),
+    'attendance': ('generate_attendance_report', ('csv', 'pdf')),
+}
+
+GRADE_COLUMNS = ('email', 'course_code', 'assessment_type', 'score', 'weight')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Batch commands (no prompts)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rep = sub.add_parser("report", help="Generate one report")
+    rep.add_argument("name", choices=sorted(REPORTS))
+    rep.add_argument("--format", choices=("csv", "pdf"), help="Output format (default: csv where supported)")
+    rep.add_argument("--student-id", type=int, help="Student for the transcript report")
+    rep.add_argument("--since", help="Muster report: only dates on or after YYYY-MM-DD")
+    rep.add_argument("--window-days", type=int, help="Watchlist: low-attendance window in days")
+    rep.add_argument("--output", help="Output file (transcript and ledger only)")
+    rep.add_argument("--no-cache", action="store_true", help="Regenerate even if the data is unchanged")
+
+    pack = sub.add_parser("report-pack", help="End-of-day pack: ledger, watchlist, grit and muster in parallel")
+    pack.add_argument("--format", choices=("csv", "pdf"), default="pdf",
+                      help="Format for watchlist, grit and muster (the ledger is always PDF)")
+    pack.add_argument("--since", help="Muster report: only dates on or after YYYY-MM-DD")
+    pack.add_argument("--window-days", type=int, help="Watchlist: low-attendance window in days")
+    pack.add_argument("--query-workers", type=int, default=4, help="Pooled connections for the query stage")
+    pack.add_argument("--render-workers", type=int, help="Processes for the render stage")
+    pack.add_argument("--no-cache", action="store_true", help="Regenerate even if the data is unchanged")
+
+    sub.add_parser("refresh-performance", help="Recompute performance_summary for all students")
+    sub.add_parser("refresh-views", help="Refresh materialized views")
+    sub.add_parser("score-risk", help="Run attrition risk scoring")
+
+    imp = sub.add_parser("import-grades", help="Record grades from a CSV file")
+    imp.add_argument("file", help=f"CSV with columns {', '.join(GRADE_COLUMNS)}[, remarks]")
+    imp.add_argument("--workers", type=int, default=1, help="Rows recorded concurrently")
+
+    run = sub.add_parser("run", help="Run several independent commands concurrently")
+    run.add_argument("jobs", nargs="+", help='Quoted commands, e.g. "report grit --format pdf"')
+    run.add_argument("--jobs", dest="max_jobs", type=int, default=os.cpu_count() or 2,
+                     help="Maximum commands running at once")
+    return parser
+
+
+def expected_outputs(args, fmt):
+    """Files a report run must write; None when the generator names the file (transcripts)."""
+    from src.report_orchestrator import report_outputs
+
+    if args.output:
+        return [args.output]
+    if args.name == 'transcript':
+        return None
+    return report_outputs(args.name, fmt)
+
+
+def _written_since(path, started):
+    return os.path.isfile(path) and os.path.getmtime(path) >= started - 1
+
+
+def cmd_report(args):
+    # Imported here so other commands never pay for ReportLab
+    from src import reports
+
+    func_name, formats = REPORTS[args.name]
+    fmt = args.format or formats[0]
+    if fmt not in formats:
+        print(f"Report '{args.name}' supports: {', '.join(formats)}")
+        return 2
+    generate = getattr(reports, func_name)
+
+    if args.name == 'transcript':
+        if args.student_id is None:
+            print("report transcript requires --student-id")
+            return 2
+        call = lambda: generate(args.student_id, filename=args.output)
+    elif args.name == 'ledger':
+        call = lambda: generate(filename=args.output)
+    elif args.name == 'watchlist':
+        call = lambda: generate(fmt, window_days=args.window_days)
+    elif args.name == 'muster':
+        if args.since and not validate_date(args.since):
+            print("--since must be YYYY-MM-DD")
+            return 2
+        call = lambda: generate(fmt, since=args.since)
+    else:
+        call = lambda: generate(fmt)
+
+    outputs = expected_outputs(args, fmt)
+    started = time.time()
+    try:
+        if outputs and not args.output and not args.no_cache:
+            from src.report_cache import generate_cached
+
+            params = {'window_days': args.window_days, 'since': args.since}
+            if generate_cached(args.name, fmt, params, outputs, call) == 'hit':
+                print(f"Served {', '.join(outputs)} from the report cache (data unchanged)")
+        else:
+            call()
+    except Exception as e:
+        print(f"Error generating {args.name} report: {e}")
+        return 1
+
+    # Generators print their errors instead of raising; the output file is the proof
+    if outputs is None:
+        written = [os.path.join("reports", f) for f in os.listdir("reports")
+                   if _written_since(os.path.join("reports", f), started)] if os.path.isdir("reports") else []
+        return 0 if written else 1
+    return 0 if all(_written_since(path, started) for path in outputs) else 1
+
+
+def cmd_report_pack(args):
+    from src.report_orchestrator import run_report_pack
+
+    if args.since and not validate_date(args.since):
+        print("--since must be YYYY-MM-DD")
+        return 2
+    pack = [('ledger', 'pdf')] + [(name, args.format) for name in ('watchlist', 'grit', 'muster')]
+    result = run_report_pack(pack, window_days=args.window_days, since=args.since,
+                             query_workers=args.query_workers, render_workers=args.render_workers,
+                             use_cache=not args.no_cache)
+    for r in result['reports']:
+        timing = "cached" if r.get('cached') else f"query {r['query_s'] or 0:.2f}s, render {r['render_s'] or 0:.2f}s"
+        print(f"[{'ok' if r['status'] == 'ok' else 'FAILED'}] {r['report']} ({r['format']}): {timing}")
+        if r['error']:
+            print(f"    {r['error']}")
+    failed = sum(1 for r in result['reports'] if r['status'] != 'ok')
+    print(f"{len(result['reports']) - failed}/{len(result['reports'])} report(s) in {result['wall_s']:.2f}s")
+    return 1 if failed else 0
+
+
+def _run_in_transaction(statement, label):
+    conn = get_db_connection()
+    if not conn:
+        return 1
+    try:
+        started = time.perf_counter()
+        with conn.cursor() as cur:
+            cur.execute(statement)
+        conn.commit()
+        print(f"{label} completed in {time.perf_counter() - started:.2f}s")
+        return 0
+    except Exception as e:
+        conn.rollback()
+        print(f"Error during {label}: {e}")
+        return 1
+    finally:
+        conn.close()
+
+
+def cmd_refresh_performance(args):
+    return _run_in_transaction("SELECT sp_refresh_all_performance()", "Performance refresh")
+
+
+def cmd_refresh_views(args):
+    return _run_in_transaction("SELECT sp_refresh_course_avg_grades()", "Materialized view refresh")
+
+
+def cmd_score_risk(args):
+    from src.risk_scoring import run_scoring
+
+    result = run_scoring()
+    if not result:
+        return 1
+    print(f"Scored {result['students']} students: {result['levels']}")
+    return 0
+
+
+def read_grade_rows(path):
+    """Parse and validate the import file. Returns (rows, errors) with 1-based line numbers."""
+    rows, errors = [], []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in GRADE_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            return [], [(1, f"missing columns: {', '.join(missing)}")]
+        for line, row in enumerate(reader, start=2):
+            email = (row['email'] or '').strip().lower()
+            if not validate_email(email):
+                errors.append((line, f"invalid email '{row['email']}'"))
+            elif not validate_score(row['score'] or ''):
+                errors.append((line, f"score out of range '{row['score']}'"))
+            else:
+                try:
+                    weight = float(row['weight'])
+                except (TypeError, ValueError):
+                    errors.append((line, f"invalid weight '{row['weight']}'"))
+                    continue
+                if not 0 < weight <= 1:
+                    errors.append((line, f"weight out of range '{row['weight']}'"))
+                    continue
+                rows.append((line, email, row['course_code'].strip(), row['assessment_type'].strip(),
+                             float(row['score']), weight, (row.get('remarks') or '').strip() or None))
+    return rows, errors
+
+
+def cmd_import_grades(args):
+    from src.controllers import record_grade
+
+    if not os.path.isfile(args.file):
+        print(f"File not found: {args.file}")
+        return 1
+    rows, errors = read_grade_rows(args.file)
+
+    def record(row):
+        line, *values = row
+        return line, record_grade(*values)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            results = list(pool.map(record, rows))
+    errors.extend((line, "not recorded (no active enrollment or database error)") for line, ok in results if not ok)
+
+    recorded = sum(1 for _, ok in results if ok)
+    print(f"Imported {recorded} grade(s) from {args.file} in {time.perf_counter() - started:.2f}s")
+    for line, message in sorted(errors):
+        print(f"  line {line}: {message}")
+    return 1 if errors else 0
+
+
+def _run_job(job):
+    """Worker-process entry point: run one command, capturing its output."""
+    buffer = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        code = main(shlex.split(job), allow_run=False)
+    return code, time.perf_counter() - started, buffer.getvalue()
+
+
+def cmd_run(args):
+    failed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, min(args.max_jobs, len(args.jobs)))) as pool:
+        futures = {pool.submit(_run_job, job): job for job in args.jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                code, elapsed, output = future.result()
+            except Exception as e:
+                code, elapsed, output = 1, 0.0, f"{e}\n"
+            failed += code != 0
+            print(f"[{'ok' if code == 0 else 'FAILED'}] {job} ({elapsed:.2f}s)")
+            for line in output.rstrip().splitlines():
+                print(f"    {line}")
+    print(f"{len(args.jobs) - failed}/{len(args.jobs)} job(s) succeeded in {time.perf_counter() - started:.2f}s")
+    return 1 if failed else 0
+
+
+HANDLERS = {
+    'report': cmd_report,
+    'report-pack': cmd_report_pack,
+    'refresh-performance': cmd_refresh_performance,
+    'refresh-views': cmd_refresh_views,
+    'score-risk': cmd_score_risk,
+    'import-grades': cmd_import_grades,
+    'run': cmd_run,
+}
+
+
+def main(argv=None, allow_run=True):
+    """Parse argv and run one command. Returns the exit code."""
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 2
+    if args.command == 'run' and not allow_run:
+        print("'run' cannot be nested")
+        return 2
+    return HANDLERS[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,16 +11,11 @@ from src.controllers import (
     get_students_in_course,
     get_student_enrollments, get_student_grades, get_student_attendance,
     update_grade, delete_grade, update_attendance, delete_attendance,
-    get_all_courses, add_course, update_course, delete_course, unenroll_student
-)
-from src.database import execute_query
-from src.reports import (
-    generate_official_transcript,
-    generate_company_readiness_ledger,
-    generate_attrition_watchlist_report,
-    generate_course_grit_report,
-    generate_daily_muster_report,
+    get_all_courses, add_course, update_course, delete_course, unenroll_student,
+    get_course_id_by_code, get_all_companies, get_top_students, get_company_leaderboard
 )
+from src.database import execute_query, start_change_listener, cache_info
+from src import instrumentation
 from src.utils import get_user_input, validate_email, validate_date, validate_score
 # Create a global console for rich output
 console = Console()
@@ -282,8 +277,17 @@ def menu_student_management():
             print("Invalid selection.")
 
 def menu_reports():
+    # ReportLab and the report module load only once a report is requested
+    from src.reports import (
+        generate_official_transcript,
+        generate_company_readiness_ledger,
+        generate_attrition_watchlist_report,
+        generate_course_grit_report,
+    )
     while True:
-        options = ["1. Official Transcript", "2. Company Readiness & Performance Ledger", "q. Back"]
+        options = ["1. Official Transcript", "2. Company Readiness & Performance Ledger",
+                   "3. Analytics Pack (ledger, grit, watchlist from one snapshot)",
+                   "4. End-of-Day Report Pack (all four reports in parallel)", "q. Back"]
         render_menu("Generate Reports", options)
         choice = input("Select Report: ").strip().lower()
 
@@ -301,13 +305,58 @@ def menu_reports():
             continue
 
         if choice == '2':
-            # Generate Company Readiness & Performance Ledger
-            generate_company_readiness_ledger()
+            # Generate Company Readiness & Performance Ledger (reused if the data is unchanged)
+            from src.report_cache import generate_cached
+            from src.report_orchestrator import report_outputs
+            outputs = report_outputs('ledger', 'pdf')
+            if generate_cached('ledger', 'pdf', {}, outputs, generate_company_readiness_ledger) == 'hit':
+                print(f"Data unchanged; reused {outputs[0]} from the report cache.")
+            input("Press Enter to continue...")
+            continue
+
+        if choice == '3':
+            # One database read; the three reports aggregate in memory (pandas loads here)
+            from src.analytics_snapshot import AnalyticsSnapshot
+            snapshot = AnalyticsSnapshot()
+            if snapshot.load():
+                print(f"Snapshot loaded at {snapshot.loaded_at:%Y-%m-%d %H:%M:%S}")
+                generate_company_readiness_ledger(snapshot=snapshot)
+                generate_course_grit_report('pdf', snapshot=snapshot)
+                generate_attrition_watchlist_report('pdf', snapshot=snapshot)
+            input("Press Enter to continue...")
+            continue
+
+        if choice == '4':
+            show_report_pack()
             input("Press Enter to continue...")
             continue
 
         print("Invalid selection.")
 
+def show_report_pack():
+    """Run the end-of-day pack through the orchestrator and show per-report timings."""
+    from src.report_orchestrator import run_report_pack
+
+    with console.status("Generating report pack..."):
+        result = run_report_pack()
+
+    table = Table(title=f"End-of-Day Report Pack ({result['wall_s']:.2f}s)")
+    table.add_column("Report", style="bold")
+    table.add_column("Format")
+    table.add_column("Status")
+    table.add_column("Query s", justify="right")
+    table.add_column("Render s", justify="right")
+    table.add_column("Details", overflow="fold")
+    for r in result['reports']:
+        status = "[red]failed[/red]" if r['status'] != 'ok' else ("[cyan]cached[/cyan]" if r['cached'] else "[green]ok[/green]")
+        table.add_row(r['report'], r['format'], status,
+                      f"{r['query_s']:.2f}" if r['query_s'] is not None else "-",
+                      f"{r['render_s']:.2f}" if r['render_s'] is not None else "-",
+                      r['error'] or r['output'])
+    console.print(table)
+    sequential = sum(r['total_s'] for r in result['reports'])
+    console.print(f"Sum of report times {sequential:.2f}s; pack finished in {result['wall_s']:.2f}s.")
+
 def get_sql_content(filename):
     """Read SQL content from database directory."""
     try:
@@ -518,33 +567,25 @@ def view_course_avg_paginated():
 
     while True:
         params = []
-        base_query = (
-            "SELECT c.course_code, c.name as course_name, c.department, "
-            "COUNT(e.student_id) as total_students, ROUND(AVG(e.final_score),2) as average_score, "
-            "MAX(e.final_score) as highest_score, MIN(e.final_score) as lowest_score "
-            "FROM courses c JOIN enrollments e ON c.course_id = e.course_id "
-            "WHERE e.status IN ('Completed','Failed') AND e.final_score IS NOT NULL "
-        )
-
+        # Reads the materialized snapshot (refreshed by scripts/refresh_views.py)
+        where = "WHERE finished_count > 0 "
         if search_term:
-            base_query += " AND (c.course_code ILIKE %s OR c.name ILIKE %s) "
+            where += " AND (course_code ILIKE %s OR course_name ILIKE %s) "
             p = f"%{search_term}%"
             params.extend([p, p])
 
-        group_order = "GROUP BY c.course_id, c.course_code, c.name, c.department ORDER BY average_score DESC"
-
-        # Compute total distinct courses for pagination (more robust than subquery count)
-        count_query = (
-            "SELECT COUNT(DISTINCT c.course_id) as cnt "
-            "FROM courses c JOIN enrollments e ON c.course_id = e.course_id "
-            "WHERE e.status IN ('Completed','Failed') AND e.final_score IS NOT NULL "
+        base_query = (
+            "SELECT course_code, course_name, department, "
+            "finished_count as total_students, finished_avg_score as average_score, "
+            "finished_high_score as highest_score, finished_low_score as lowest_score, "
+            "(SELECT refreshed_at FROM materialized_view_refreshes "
+            "WHERE view_name = 'mv_course_avg_grades') as refreshed_at "
+            "FROM mv_course_avg_grades " + where
         )
-        count_params = []
-        if search_term:
-            count_query += " AND (c.course_code ILIKE %s OR c.name ILIKE %s)"
-            count_params = [f"%{search_term}%", f"%{search_term}%"]
+        group_order = "ORDER BY finished_avg_score DESC"
 
-        count_res = execute_query(count_query, tuple(count_params) if count_params else None, fetch=True)
+        count_query = "SELECT COUNT(*) as cnt FROM mv_course_avg_grades " + where
+        count_res = execute_query(count_query, tuple(params) if params else None, fetch=True)
         total_items = count_res[0]['cnt'] if count_res else 0
         total_pages = math.ceil(total_items / limit) if total_items else 1
         current_page = (offset // limit) + 1
@@ -574,6 +615,8 @@ def view_course_avg_paginated():
                             str(r.get('total_students','')), str(r.get('average_score','')),
                             str(r.get('highest_score','')), str(r.get('lowest_score','')))
             console.print(tbl)
+            if displayed[0].get('refreshed_at'):
+                console.print(f"Data as of {displayed[0]['refreshed_at']:%Y-%m-%d %H:%M}", style="dim")
         else:
             console.print("No results found.")
 
@@ -596,7 +639,7 @@ def view_course_avg_paginated():
         if choice == 'a':
             # show all matching courses
             all_query = base_query + group_order
-            all_res = execute_query(all_query, tuple(count_params) if count_params else None, fetch=True)
+            all_res = execute_query(all_query, tuple(params) if params else None, fetch=True)
             if all_res:
                 print_results(all_res)
             else:
@@ -615,52 +658,42 @@ def view_course_avg_paginated():
 
 
 def view_low_attendance_paginated():
-    """Paginated view for students below attendance threshold with search."""
+    """Paginated view for student/course pairs below the attendance threshold, with search and trailing window."""
     offset = 0
     limit = 10
     search_term = None
+    window_days = None  # None = all history
 
     while True:
-        params = []
+        params = [window_days]
         base_query = (
-            "SELECT s.service_number, s.first_name, s.last_name, c.company_name, "
-            "ps.attendance_rate, ps.current_standing "
-            "FROM students s "
-            "JOIN performance_summary ps ON s.student_id = ps.student_id "
-            "JOIN companies c ON s.company_id = c.company_id "
-            "WHERE ps.attendance_rate < 75.00 "
+            "SELECT s.service_number, s.first_name, s.last_name, co.company_name, c.course_code, "
+            "la.attendance_rate, la.total_sessions "
+            "FROM fn_low_attendance(%s, 75.00) la "
+            "JOIN students s ON s.student_id = la.student_id "
+            "JOIN courses c ON c.course_id = la.course_id "
+            "LEFT JOIN companies co ON co.company_id = s.company_id "
+            "WHERE 1=1 "
         )
 
         if search_term:
-            base_query += " AND (s.first_name ILIKE %s OR s.last_name ILIKE %s OR s.service_number ILIKE %s OR c.company_name ILIKE %s) "
+            base_query += " AND (s.first_name ILIKE %s OR s.last_name ILIKE %s OR s.service_number ILIKE %s OR co.company_name ILIKE %s) "
             p = f"%{search_term}%"
             params.extend([p, p, p, p])
 
-        order_clause = "ORDER BY ps.attendance_rate ASC"
+        order_clause = "ORDER BY la.attendance_rate ASC"
 
-        # Compute total rows for pagination (robust count)
-        count_query = (
-            "SELECT COUNT(*) as cnt "
-            "FROM students s "
-            "JOIN performance_summary ps ON s.student_id = ps.student_id "
-            "JOIN companies c ON s.company_id = c.company_id "
-            "WHERE ps.attendance_rate < 75.00 "
-        )
-        count_params = []
-        if search_term:
-            count_query += " AND (s.first_name ILIKE %s OR s.last_name ILIKE %s OR s.service_number ILIKE %s OR c.company_name ILIKE %s) "
-            p = f"%{search_term}%"
-            count_params = [p, p, p, p]
-
-        count_res = execute_query(count_query, tuple(count_params) if count_params else None, fetch=True)
+        count_query = "SELECT COUNT(*) as cnt FROM (" + base_query + ") q"
+        count_res = execute_query(count_query, tuple(params), fetch=True)
         total_items = count_res[0]['cnt'] if count_res else 0
         total_pages = math.ceil(total_items / limit) if total_items else 1
         current_page = (offset // limit) + 1
 
         query = base_query + order_clause + f" LIMIT {limit} OFFSET {offset}"
 
-        console.print(Panel(f"Low Attendance Risk (Page {current_page} of {max(1,total_pages)})", style="cyan"))
-        results = execute_query(query, tuple(params) if params else None, fetch=True)
+        window_label = f"last {window_days} days" if window_days else "all history"
+        console.print(Panel(f"Low Attendance Risk, {window_label} (Page {current_page} of {max(1,total_pages)})", style="cyan"))
+        results = execute_query(query, tuple(params), fetch=True)
 
         # Defensive: only display up to `limit` rows
         displayed = results[:limit] if results else []
@@ -672,18 +705,21 @@ def view_low_attendance_paginated():
             tbl.add_column("First", style="green")
             tbl.add_column("Last", style="green")
             tbl.add_column("Company", style="magenta")
+            tbl.add_column("Course", style="cyan")
             tbl.add_column("Attendance", style="yellow")
-            tbl.add_column("Standing", style="red")
+            tbl.add_column("Sessions", style="red")
             start = offset + 1
             for i, r in enumerate(displayed, start):
                 tbl.add_row(str(i), r.get('service_number',''), r.get('first_name',''), r.get('last_name',''),
-                            r.get('company_name',''), str(r.get('attendance_rate','')), r.get('current_standing',''))
+                            r.get('company_name') or '', r.get('course_code',''),
+                            str(r.get('attendance_rate','')), str(r.get('total_sessions','')))
             console.print(tbl)
         else:
             console.print("No results found.")
 
         console.print("Options:", style="bold")
         console.print(" - [s] Search", style="red", markup=False)
+        console.print(" - [w] Set window (days, blank = all history)", style="red", markup=False)
         console.print(" - [Enter] Next Page", style="red", markup=False)
         console.print(" - [q] Back", style="red", markup=False)
 
@@ -697,6 +733,19 @@ def view_low_attendance_paginated():
             search_term = term
             offset = 0
             continue
+        if choice == 'w':
+            days_in = get_user_input("Trailing window in days", required=False)
+            if days_in is None:
+                continue
+            if days_in == "":
+                window_days = None
+            elif days_in.isdigit() and int(days_in) > 0:
+                window_days = int(days_in)
+            else:
+                print("Please enter a positive integer.")
+                continue
+            offset = 0
+            continue
         if choice == '':
             if offset + limit < total_items:
                 offset += limit
@@ -802,7 +851,7 @@ def view_enrollment_stats_paginated():
 
 
 def view_top_students():
-    """Show top N students by GPA (default 10). User may enter custom N."""
+    """Show top N students by GPA (default 10), overall, per company/course, or as a company leaderboard."""
     while True:
         num_in = get_user_input("Number of top students to show (default 10)", required=False)
         if num_in is None:
@@ -819,44 +868,56 @@ def view_top_students():
                 print("Invalid number. Please enter a positive integer.")
                 continue
 
-        query = f"""
-SELECT
-    RANK() OVER (ORDER BY ps.gpa DESC) AS rank,
-    s.service_number,
-    s.first_name,
-    s.last_name,
-    c.company_name,
-    ps.gpa,
-    ps.total_credits
-FROM
-    students s
-JOIN
-    performance_summary ps ON s.student_id = ps.student_id
-JOIN
-    companies c ON s.company_id = c.company_id
-ORDER BY
-    ps.gpa DESC
-LIMIT {n};
-"""
-
-        results = execute_query(query, fetch=True)
+        console.print("Scope:", style="bold")
+        console.print(" - [Enter] All students", style="red", markup=False)
+        console.print(" - [c] Within a company", style="red", markup=False)
+        console.print(" - [k] Within a course", style="red", markup=False)
+        console.print(" - [l] Leaderboard (top N of every company)", style="red", markup=False)
+        scope = input("Select: ").strip().lower()
+
+        if scope == 'l':
+            results = get_company_leaderboard(n)
+        else:
+            company_id = course_id = None
+            if scope == 'c':
+                companies = get_all_companies() or []
+                name = select_from_list([c['company_name'] for c in companies], "Select Company")
+                if not name:
+                    continue
+                company_id = next(c['company_id'] for c in companies if c['company_name'] == name)
+            elif scope == 'k':
+                course_code = select_course_for_proc()
+                if course_code is None:
+                    continue
+                course_id = get_course_id_by_code(course_code)
+            results = get_top_students(n, company_id, course_id)
+
         if not results:
             console.print("No students found.")
             input("Press Enter to continue...")
             return
 
         tbl = Table(show_header=True, header_style="bold magenta")
+        if scope == 'l':
+            tbl.add_column("Company", style="magenta")
         tbl.add_column("Rank", style="cyan")
         tbl.add_column("Service#", style="cyan")
         tbl.add_column("First", style="green")
         tbl.add_column("Last", style="green")
-        tbl.add_column("Company", style="magenta")
+        if scope != 'l':
+            tbl.add_column("Company", style="magenta")
         tbl.add_column("GPA", style="bright_blue")
         tbl.add_column("Credits", style="yellow")
 
         for r in results:
-            tbl.add_row(str(r.get('rank','')), r.get('service_number',''), r.get('first_name',''),
-                        r.get('last_name',''), r.get('company_name',''), str(r.get('gpa','')), str(r.get('total_credits','')))
+            rank = str(r.get('company_rank') if scope == 'l' else r.get('gpa_rank', ''))
+            row = [rank, r.get('service_number',''), r.get('first_name',''), r.get('last_name','')]
+            if scope == 'l':
+                row.insert(0, r.get('company_name') or '')
+            else:
+                row.append(r.get('company_name') or '')
+            row += [str(r.get('gpa','')), str(r.get('total_credits',''))]
+            tbl.add_row(*row)
 
         console.print(tbl)
         input("Press Enter to continue...")
@@ -1300,7 +1361,73 @@ def menu_course_management():
                 pass
 
 
+def show_query_stats():
+    """Top statements by total time from the in-process instrumentation registry."""
+    while True:
+        print_header()
+        top_n = input("Show top N statements by total time [10] (r = reset, p = save profile, q = back): ").strip().lower()
+        if top_n == 'q':
+            return
+        if top_n == 'p':
+            path = instrumentation.save_profile(
+                os.path.join("reports", f"query_profile_{date.today().strftime('%Y%m%d')}.json"))
+            print(f"Timings and captured plans saved to {path}")
+            input("Press Enter to continue...")
+            continue
+        if top_n == 'r':
+            instrumentation.reset_stats()
+            print("Statement statistics cleared.")
+            input("Press Enter to continue...")
+            continue
+        n = int(top_n) if top_n.isdigit() and int(top_n) > 0 else 10
+
+        entries = instrumentation.top_statements(n)
+        if not entries:
+            print("No statements recorded yet in this session.")
+            input("Press Enter to continue...")
+            return
+
+        table = Table(title=f"Top {len(entries)} Statements by Total Time", show_lines=True)
+        table.add_column("Fingerprint", style="cyan")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total ms", justify="right")
+        table.add_column("Avg ms", justify="right")
+        table.add_column("p95 ms", justify="right")
+        table.add_column("Max ms", justify="right")
+        table.add_column("Connect ms", justify="right")
+        table.add_column("Rows", justify="right")
+        table.add_column("Top Caller")
+        table.add_column("Errors")
+        if instrumentation.explain_enabled():
+            table.add_column("Plan")
+        table.add_column("Statement", max_width=60)
+        for e in entries:
+            top_caller = max(e['callers'].items(), key=lambda kv: kv[1])[0] if e['callers'] else ''
+            errors = ", ".join(f"{code}:{count}" for code, count in e['errors'].items())
+            p95 = e['p95_ms']
+            row = [
+                e['fingerprint'], str(e['calls']), f"{e['total_ms']:.1f}", f"{e['avg_ms']:.1f}",
+                ">5000" if p95 == float('inf') else f"<={p95:g}", f"{e['max_ms']:.1f}",
+                f"{e['connect_ms']:.1f}", str(e['rows']), top_caller, errors,
+            ]
+            if instrumentation.explain_enabled():
+                captured = e['explain'] or {}
+                row.append(instrumentation.plan_flags(captured.get('summary')) or captured.get('skipped', ''))
+            row.append(e['statement'][:200])
+            table.add_row(*row)
+        console.print(table)
+        print(f"Slow statements (>= {instrumentation.slow_query_ms():g} ms) are logged to "
+              f"{os.getenv('SLOW_QUERY_LOG', os.path.join('logs', 'slow_queries.log'))}")
+        cache = cache_info()
+        print(f"Lookup cache: {cache['entries']} entries, change listener "
+              f"{'connected' if cache['listener_connected'] else 'not connected'}, "
+              f"{cache['notifications']} notification(s) received")
+        input("Press Enter to continue...")
+        return
+
 def main():
+    # Evicts cached lookups when another session changes the data
+    start_change_listener()
     while True:
         print_header()
         options = [
@@ -1308,6 +1435,7 @@ def main():
             "2. Course Management",
             "3. Generate Reports",
             "4. Stored Procedures",
+            "s. Query Stats",
             "q. Exit",
         ]
         render_menu("Main Menu", options)
@@ -1321,6 +1449,8 @@ def main():
             menu_reports()
         elif choice == '4':
             menu_stored_procedures()
+        elif choice in ('s', 'stats'):
+            show_query_stats()
         elif choice == 'q':
             print("Exiting...")
             sys.exit(0)
@@ -1,25 +1,44 @@
-import random
-from src.database import execute_query, execute_proc
+from src.database import execute_query, execute_proc, cached_query, invalidate_cache
 
 def get_student_id_by_email(email):
-    """Resolve student email to ID."""
-    res = execute_query("SELECT student_id FROM students WHERE email = %s", (email,), fetch=True)
+    """Resolve student email to ID (cached; evicted by change notifications)."""
+    res = cached_query("SELECT student_id FROM students WHERE email = %s", (email,),
+                       tables=('students',), key_column='student_id')
     return res[0]['student_id'] if res else None
 
 def get_course_id_by_code(code):
-    """Resolve course code to ID."""
-    res = execute_query("SELECT course_id FROM courses WHERE course_code = %s", (code,), fetch=True)
+    """Resolve course code to ID (cached; evicted by change notifications)."""
+    res = cached_query("SELECT course_id FROM courses WHERE course_code = %s", (code,),
+                       tables=('courses',), key_column='course_id')
     return res[0]['course_id'] if res else None
 
 def get_all_courses():
-    """Retrieve all available courses."""
-    return execute_query("SELECT course_id, course_code, name, description FROM courses ORDER BY course_id", fetch=True)
+    """Retrieve all available courses (cached; evicted by change notifications)."""
+    return cached_query("SELECT course_id, course_code, name, description FROM courses ORDER BY course_id",
+                        tables=('courses',))
 
 def get_default_company_id():
     """Get the first company ID found in DB."""
     res = execute_query("SELECT company_id FROM companies LIMIT 1", fetch=True)
     return res[0]['company_id'] if res else None
 
+def allocate_service_numbers(count):
+    """Reserve `count` collision-free service numbers in a single round trip."""
+    res = execute_query("SELECT sp_allocate_service_numbers(%s) AS service_number", (count,), fetch=True)
+    return [r['service_number'] for r in res] if res else []
+
+def get_all_companies():
+    """Retrieve all companies."""
+    return execute_query("SELECT company_id, company_name FROM companies ORDER BY company_name", fetch=True)
+
+def get_top_students(n=10, company_id=None, course_id=None):
+    """Top `n` students by GPA, optionally within a company and/or course (fn_top_students)."""
+    return execute_query("SELECT * FROM fn_top_students(%s, %s, %s)", (n, company_id, course_id), fetch=True) or []
+
+def get_company_leaderboard(n=3):
+    """Top `n` students of every company (fn_company_leaderboard)."""
+    return execute_query("SELECT * FROM fn_company_leaderboard(%s)", (n,), fetch=True) or []
+
 def get_student_details(student_id):
     """Get full student details by ID."""
     query = "SELECT * FROM students WHERE student_id = %s"
@@ -64,18 +83,18 @@ def add_student(first_name, last_name, email, dob, gender='Male', rank='Recruit'
         print("Error: No companies found to assign student to.")
         return False
     
-    # Generate random service number if one isn't handled by DB (it's not auto-gen, it's NOT NULL)
-    service_number = f"SN-{random.randint(10000, 99999)}"
-    
+    # service_number is omitted: the column defaults to fn_next_service_number() (sequence-backed)
     query = """
-        INSERT INTO students (company_id, service_number, first_name, last_name, email, date_of_birth, gender, rank)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING student_id;
+        INSERT INTO students (company_id, first_name, last_name, email, date_of_birth, gender, rank)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING student_id, service_number;
     """
     try:
-        res = execute_query(query, (company_id, service_number, first_name, last_name, email, dob, gender, rank), fetch=True, commit=True)
+        res = execute_query(query, (company_id, first_name, last_name, email, dob, gender, rank), fetch=True, commit=True)
         if res:
-            print(f"Student added successfully: {first_name} {last_name} (ID: {res[0]['student_id']})")
+            # Don't wait for the NOTIFY round trip before this process reads its own write
+            invalidate_cache('students', {'student_id': [res[0]['student_id']]})
+            print(f"Student added successfully: {first_name} {last_name} (ID: {res[0]['student_id']}, SN: {res[0].get('service_number')})")
             return True
     except Exception as e:
         print(f"Failed to add student: {e}")
@@ -111,14 +130,16 @@ def record_grade(email, course_code, assessment_type, score, weight, remarks=Non
         print("Error: Active enrollment not found.")
         return False
         
-    # sp_record_grade(p_enrollment_id, p_assessment_type, p_score, p_weight, p_assessment_date, p_remarks)
+    # sp_record_grade(p_enrollment_id, p_assessment_type, p_score, p_weight, p_assessment_date, p_remarks) RETURNS INT
     # Using defaults for date (CURRENT_DATE) so we won't pass it from CLI for simplicity unless needed
-    try:
-        execute_proc('sp_record_grade', (enrollment_id, assessment_type, score, weight, 'now', remarks))
+    grade_id = execute_proc('sp_record_grade', (enrollment_id, assessment_type, score, weight, 'now', remarks),
+                            fetch_result=True)
+
+    if grade_id:
         print(f"Grade recorded for {email} in {course_code}.")
         return True
-    except Exception as e:
-        print(f"Error recording grade: {e}")
+    else:
+        print("Failed to record grade.")
         return False
 
 def mark_attendance(email, course_code, date, status, remarks=None):
@@ -175,6 +196,7 @@ def update_student(student_id, first_name=None, last_name=None, email=None, dob=
     
     try:
         execute_query(query, tuple(params), commit=True)
+        invalidate_cache('students', {'student_id': [student_id]})
         print(f"Student {student_id} updated successfully.")
         return True
     except Exception as e:
@@ -188,6 +210,7 @@ def delete_student(student_id):
     query = "DELETE FROM students WHERE student_id = %s"
     try:
         execute_query(query, (student_id,), commit=True)
+        invalidate_cache('students', {'student_id': [student_id]})
         print(f"Student {student_id} deleted successfully.")
         return True
     except Exception as e:
@@ -223,43 +246,25 @@ def get_student_grades(email, course_code):
     return execute_query(query, (enrollment_id,), fetch=True)
 
 def update_grade(grade_id, score=None, weight=None, remarks=None):
-    """Update a specific grade entry."""
-    updates = []
-    params = []
-    
-    if score is not None:
-        updates.append("score = %s")
-        params.append(score)
-    if weight is not None:
-        updates.append("weight = %s")
-        params.append(weight)
-    if remarks is not None:
-        updates.append("remarks = %s")
-        params.append(remarks)
-        
-    if not updates:
+    """Update a specific grade entry (and its enrollment's final score, atomically)."""
+    if score is None and weight is None and remarks is None:
         return False
-        
-    query = f"UPDATE grades SET {', '.join(updates)} WHERE grade_id = %s"
-    params.append(grade_id)
-    
-    try:
-        execute_query(query, tuple(params), commit=True)
-        print(f"Grade {grade_id} updated.")
-        return True
-    except Exception as e:
-        print(f"Error updating grade: {e}")
+
+    enrollment_id = execute_proc('sp_update_grade', (grade_id, score, weight, remarks), fetch_result=True)
+    if enrollment_id is None:
+        print(f"Grade {grade_id} was not updated.")
         return False
+    print(f"Grade {grade_id} updated.")
+    return True
 
 def delete_grade(grade_id):
-    """Delete a grade entry."""
-    try:
-        execute_query("DELETE FROM grades WHERE grade_id = %s", (grade_id,), commit=True)
-        print(f"Grade {grade_id} deleted.")
-        return True
-    except Exception as e:
-        print(f"Error deleting grade: {e}")
+    """Delete a grade entry (and recompute its enrollment's final score, atomically)."""
+    enrollment_id = execute_proc('sp_delete_grade', (grade_id,), fetch_result=True)
+    if enrollment_id is None:
+        print(f"Grade {grade_id} was not deleted.")
         return False
+    print(f"Grade {grade_id} deleted.")
+    return True
 
 def get_student_attendance(email, course_code):
     """Get attendance records for a student in a course."""
@@ -323,6 +328,7 @@ def add_course(course_code, name, credits, department, difficulty='Basic', descr
     try:
         res = execute_query(query, (course_code, name, credits, department, difficulty, description), fetch=True, commit=True)
         if res:
+            invalidate_cache('courses', {'course_id': [res[0]['course_id']]})
             print(f"Course added: {course_code} - {name}")
             return True
     except Exception as e:
@@ -360,6 +366,7 @@ def update_course(course_id, name=None, credits=None, department=None, difficult
     
     try:
         execute_query(query, tuple(params), commit=True)
+        invalidate_cache('courses', {'course_id': [course_id]})
         print(f"Course {course_id} updated.")
         return True
     except Exception as e:
@@ -370,6 +377,7 @@ def delete_course(course_id):
     """Delete a course."""
     try:
         execute_query("DELETE FROM courses WHERE course_id = %s", (course_id,), commit=True)
+        invalidate_cache('courses', {'course_id': [course_id]})
         print(f"Course {course_id} deleted.")
         return True
     except Exception as e:
@@ -1,28 +1,63 @@
 import os
+import json
+import time
+import select
+import threading
+from datetime import timedelta
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from src.utils import load_env_from_file
+from src import instrumentation
 
-# Load environment variables on module import
-load_env_from_file()
+# Data version per logged table (table_changes rows visible to this snapshot)
+# and per materialized view (its last refresh). Used by the report cache.
+TABLE_VERSIONS_QUERY = """
+SELECT table_name, COUNT(*) || ':' || MAX(change_id) || ':' || SUM(change_id) AS version
+FROM table_changes
+WHERE table_name = ANY(%(tables)s)
+GROUP BY table_name
+UNION ALL
+SELECT view_name, refreshed_at::TEXT
+FROM materialized_view_refreshes
+WHERE view_name = ANY(%(tables)s)
+"""
 
-DB_NAME = os.getenv("DB_NAME", "student_records_db")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "5432")
+# Statements logged in table_changes (02_create_tables.sql) by transactions that
+# were not yet visible in `since`, a txid_current_snapshot() taken by an earlier
+# reader, for the tables in `tables`. keys is None when the table must be reread.
+TABLE_CHANGES_QUERY = """
+SELECT table_name, keys
+FROM table_changes
+WHERE txid >= txid_snapshot_xmin(%(since)s::txid_snapshot)
+  AND NOT txid_visible_in_snapshot(txid, %(since)s::txid_snapshot)
+  AND table_name = ANY(%(tables)s)
+"""
+
+# How long table_changes rows are kept (scripts/refresh_views.py prunes older
+# ones); readers that last looked further back reload in full
+CHANGE_LOG_KEEP = timedelta(days=1)
+
+_db_config = None
+
+
+def get_db_config():
+    """Connection settings; .env is read on first use rather than at import."""
+    global _db_config
+    if _db_config is None:
+        load_env_from_file()
+        _db_config = {
+            'database': os.getenv("DB_NAME", "student_records_db"),
+            'user': os.getenv("DB_USER"),
+            'password': os.getenv("DB_PASSWORD"),
+            'host': os.getenv("DB_HOST", "localhost"),
+            'port': os.getenv("DB_PORT", "5432"),
+        }
+    return _db_config
 
 def get_db_connection():
     """Establish and return a database connection."""
     try:
-        conn = psycopg2.connect(
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT,
-            cursor_factory=RealDictCursor
-        )
+        conn = psycopg2.connect(cursor_factory=RealDictCursor, **get_db_config())
         return conn
     except psycopg2.Error as e:
         print(f"Error connecting to database: {e}")
@@ -41,19 +76,32 @@ def execute_query(query, params=None, fetch=False, commit=False):
     Returns:
         list/None: Query results if fetch is True, else None.
     """
+    started = time.perf_counter()
     conn = get_db_connection()
+    connect_ms = (time.perf_counter() - started) * 1000
     if not conn:
         return None
     
     result = None
+    rows = 0
+    error = None
+    elapsed_ms = None
+    started = time.perf_counter()
     try:
         with conn.cursor() as cur:
             cur.execute(query, params)
             if fetch:
                 result = cur.fetchall()
+                rows = len(result)
+            else:
+                rows = max(cur.rowcount, 0)
             if commit:
                 conn.commit()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Profiling mode: plan captured once per statement fingerprint
+        instrumentation.maybe_explain(conn, query, params)
     except Exception as e:
+        error = e
         try:
             # Try to show the final query for easier debugging
             final = cur.mogrify(query, params) if 'cur' in locals() and params is not None else query
@@ -64,6 +112,9 @@ def execute_query(query, params=None, fetch=False, commit=False):
         conn.rollback()
     finally:
         conn.close()
+        if elapsed_ms is None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        instrumentation.record(query, elapsed_ms, connect_ms, rows, error=error, params=params)
         
     return result
 
@@ -79,11 +130,16 @@ def execute_proc(proc_name, params=None, fetch_result=False):
     Returns:
         The result of the stored procedure if fetch_result is True.
     """
+    started = time.perf_counter()
     conn = get_db_connection()
+    connect_ms = (time.perf_counter() - started) * 1000
     if not conn:
         return None
 
     result = None
+    query = f"SELECT {proc_name}()"
+    error = None
+    started = time.perf_counter()
     try:
         with conn.cursor() as cur:
             # We use `callproc` for standard procedures, but for functions that return values
@@ -105,9 +161,180 @@ def execute_proc(proc_name, params=None, fetch_result=False):
             conn.commit() # Functions with side effects need commit if called via SELECT
             
     except Exception as e:
+        error = e
         print(f"Error executing procedure {proc_name}: {e}")
         conn.rollback()
     finally:
         conn.close()
+        instrumentation.record(query, (time.perf_counter() - started) * 1000, connect_ms,
+                               1 if result is not None else 0, error=error, params=params)
         
     return result
+
+
+# -----------------------------------------------------
+# Query cache invalidated by LISTEN/NOTIFY
+# -----------------------------------------------------
+# Triggers (fn_table_change in 02_create_tables.sql) NOTIFY `data_changes`
+# with {"table", "op", "keys": {column: [values] | null}} after each write to
+# students, courses, enrollments, grades and attendance. While the listener is
+# connected, cached results live for CACHE_TTL_SECONDS (default 1 hour) because
+# any write from any process evicts them. While it is not connected they live
+# only CACHE_FALLBACK_TTL_SECONDS (default 5).
+
+CHANGE_CHANNEL = "data_changes"
+
+_cache = {}               # (query, params) -> entry dict
+_cache_lock = threading.Lock()
+_cache_generation = [0]   # bumped by every invalidation
+_change_callbacks = []
+_listener = {'thread': None, 'stop': None, 'connected': False, 'last_error': None, 'notifications': 0}
+
+
+def _cache_ttl(ttl=None):
+    if _listener['connected']:
+        return ttl if ttl is not None else float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+    fallback = float(os.getenv("CACHE_FALLBACK_TTL_SECONDS", "5"))
+    return min(ttl, fallback) if ttl is not None else fallback
+
+
+def cached_query(query, params=None, tables=(), key_column=None, ttl=None):
+    """execute_query(fetch=True) with a result cache.
+
+    `tables` are the tables the result depends on. With `key_column`, only
+    changes touching one of the returned rows' values in that column evict the
+    entry (an empty result is evicted by any change to the tables). Failed
+    queries (None) are not cached. Callers must not mutate the returned rows.
+    """
+    cache_key = (query, tuple(params) if params is not None else None)
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(cache_key)
+        if entry and entry['expires'] > now:
+            return entry['rows']
+        generation = _cache_generation[0]
+
+    rows = execute_query(query, params, fetch=True)
+    if rows is None:
+        return None
+    keys = None
+    if key_column and rows:
+        keys = {str(r[key_column]) for r in rows if r.get(key_column) is not None}
+    with _cache_lock:
+        # A change arrived while the query ran; the rows may predate it
+        if _cache_generation[0] != generation:
+            return rows
+        _cache[cache_key] = {'rows': rows, 'expires': now + _cache_ttl(ttl), 'tables': frozenset(tables),
+                             'key_column': key_column, 'keys': keys}
+    return rows
+
+
+def invalidate_cache(table=None, keys=None):
+    """Evict cached results that depend on `table`.
+
+    `keys` maps column -> changed values (or None for "any"); entries cached
+    with a key_column are kept when that column's changed values don't overlap
+    theirs. With no table, the whole cache is cleared. Returns entries evicted.
+    """
+    with _cache_lock:
+        _cache_generation[0] += 1
+        if table is None:
+            evicted = len(_cache)
+            _cache.clear()
+            return evicted
+        stale = []
+        for cache_key, entry in _cache.items():
+            if table not in entry['tables']:
+                continue
+            column, cached_keys = entry['key_column'], entry['keys']
+            changed = (keys or {}).get(column) if column else None
+            if cached_keys is not None and changed is not None and not cached_keys & {str(k) for k in changed}:
+                continue
+            stale.append(cache_key)
+        for cache_key in stale:
+            del _cache[cache_key]
+        return len(stale)
+
+
+def cache_info():
+    with _cache_lock:
+        entries = len(_cache)
+    return {'entries': entries, 'listener_connected': _listener['connected'],
+            'notifications': _listener['notifications'], 'last_error': _listener['last_error']}
+
+
+def add_change_callback(callback):
+    """Call callback(table, op, keys) for every change notification (from the listener thread)."""
+    if callback not in _change_callbacks:
+        _change_callbacks.append(callback)
+
+
+def remove_change_callback(callback):
+    if callback in _change_callbacks:
+        _change_callbacks.remove(callback)
+
+
+def handle_notification(payload):
+    """Apply one `data_changes` payload: evict cache entries, then notify callbacks."""
+    try:
+        change = json.loads(payload)
+        table, op, keys = change['table'], change.get('op'), change.get('keys') or {}
+    except (ValueError, KeyError, TypeError):
+        return
+    _listener['notifications'] += 1
+    invalidate_cache(table, keys)
+    for callback in list(_change_callbacks):
+        try:
+            callback(table, op, keys)
+        except Exception as e:
+            print(f"Change callback failed: {e}")
+
+
+def _listen(stop):
+    backoff = 1
+    while not stop.is_set():
+        try:
+            conn = psycopg2.connect(**get_db_config())
+        except psycopg2.Error as e:
+            # No console output from the background thread; cache_info() has the error
+            _listener['last_error'] = str(e).strip()
+            stop.wait(backoff)
+            backoff = min(backoff * 2, 60)
+            continue
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANGE_CHANNEL}")
+            # Changes made while disconnected were never delivered
+            invalidate_cache()
+            _listener.update(connected=True, last_error=None)
+            backoff = 1
+            while not stop.is_set():
+                if select.select([conn], [], [], 1.0)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        handle_notification(conn.notifies.pop(0).payload)
+        except (psycopg2.Error, OSError) as e:
+            _listener['last_error'] = str(e).strip()
+        finally:
+            _listener['connected'] = False
+            conn.close()
+
+
+def start_change_listener():
+    """Start the background LISTEN thread (idempotent)."""
+    if _listener['thread'] and _listener['thread'].is_alive():
+        return
+    stop = threading.Event()
+    thread = threading.Thread(target=_listen, args=(stop,), name="db-change-listener", daemon=True)
+    _listener.update(thread=thread, stop=stop)
+    thread.start()
+
+
+def stop_change_listener():
+    if _listener['stop']:
+        _listener['stop'].set()
+    if _listener['thread']:
+        _listener['thread'].join(timeout=3)
+    _listener.update(thread=None, stop=None, connected=False)
+
@@ -0,0 +1,324 @@
+"""Per-statement query instrumentation.
+
+execute_query / execute_proc report every statement here. Statements are
+grouped by a normalized fingerprint (literals and placeholders replaced by
+`?`), and each group keeps call counts, wall time, connection-acquire time,
+rows, callers, error counts by SQLSTATE and a latency histogram. Statements
+slower than SLOW_QUERY_MS are appended as JSON lines to SLOW_QUERY_LOG.
+
+With profiling on (DB_EXPLAIN=1 or `python main.py --explain`), the first
+execution of each read-only fingerprint is re-run once per session with
+EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) in a read-only transaction that is
+rolled back. The plan and a summary (large seq scans, row misestimates,
+sort/hash spills) are kept with the fingerprint's timings; save_profile()
+writes everything to JSON as a plan-regression baseline.
+
+Environment:
+    DB_INSTRUMENTATION   "0" disables recording (default on)
+    SLOW_QUERY_MS        slow-query threshold in ms (default 500)
+    SLOW_QUERY_LOG       slow-query log path (default logs/slow_queries.log)
+    DB_EXPLAIN           "1" enables EXPLAIN ANALYZE capture (default off)
+    EXPLAIN_SEQ_SCAN_ROWS  rows read by a seq scan to flag it (default 10000)
+    EXPLAIN_MISESTIMATE    estimated/actual row ratio to flag (default 10)
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+# Histogram bucket upper bounds (ms); the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+
+_COMMENT_RE = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER_RE = re.compile(r'%\(\w+\)s|%s')
+_NUMBER_RE = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+# Frames from these files are skipped when looking for the calling function
+_INTERNAL_FILES = ('database.py', 'instrumentation.py')
+
+# Statements EXPLAIN ANALYZE may re-run: plain reads only
+_READ_ONLY_RE = re.compile(r'^\s*(SELECT|WITH|TABLE|VALUES)\b', re.I)
+_WRITE_RE = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|INTO|FOR\s+UPDATE|FOR\s+SHARE|NEXTVAL|SETVAL)\b', re.I)
+
+_lock = threading.Lock()
+_stats = {}
+_fingerprints = {}
+_plans = {}
+
+
+def enabled():
+    return os.getenv("DB_INSTRUMENTATION", "1") != "0"
+
+
+def explain_enabled():
+    return os.getenv("DB_EXPLAIN", "0") == "1"
+
+
+def enable_explain(on=True):
+    """Turn plan capture on or off for this process (the --explain flag)."""
+    os.environ["DB_EXPLAIN"] = "1" if on else "0"
+
+
+def _env_float(key, default):
+    try:
+        return float(os.getenv(key, default))
+    except ValueError:
+        return float(default)
+
+
+def slow_query_ms():
+    return _env_float("SLOW_QUERY_MS", "500")
+
+
+def fingerprint(query):
+    """Normalize a statement so calls that differ only in values group together.
+
+    Returns (fingerprint_id, normalized_text).
+    """
+    cached = _fingerprints.get(query)
+    if cached:
+        return cached
+    text = _COMMENT_RE.sub(' ', query)
+    text = _STRING_RE.sub('?', text)
+    text = _PLACEHOLDER_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _IN_LIST_RE.sub('(?)', text)
+    text = _SPACE_RE.sub(' ', text).strip().rstrip(';')
+    result = (hashlib.md5(text.encode('utf-8')).hexdigest()[:12], text)
+    if len(_fingerprints) < 10000:
+        _fingerprints[query] = result
+    return result
+
+
+def calling_function():
+    """`module.function` of the nearest caller outside the database layer."""
+    frame = sys._getframe(1)
+    while frame:
+        filename = os.path.basename(frame.f_code.co_filename)
+        if filename not in _INTERNAL_FILES:
+            module = frame.f_globals.get('__name__', filename)
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def _new_entry(fp_id, text):
+    return {
+        'fingerprint': fp_id,
+        'statement': text,
+        'calls': 0,
+        'total_ms': 0.0,
+        'min_ms': None,
+        'max_ms': 0.0,
+        'connect_ms': 0.0,
+        'rows': 0,
+        'errors': {},
+        'callers': {},
+        'histogram': [0] * len(BUCKETS_MS),
+    }
+
+
+def record(query, elapsed_ms, connect_ms=0.0, rows=0, caller=None, error=None, params=None):
+    """Add one execution to the registry (and the slow log if over the threshold)."""
+    if not enabled():
+        return None
+    fp_id, text = fingerprint(query)
+    caller = caller or calling_function()
+    bucket = next(i for i, bound in enumerate(BUCKETS_MS) if elapsed_ms <= bound)
+
+    with _lock:
+        entry = _stats.get(fp_id)
+        if entry is None:
+            entry = _stats[fp_id] = _new_entry(fp_id, text)
+        entry['calls'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['min_ms'] = elapsed_ms if entry['min_ms'] is None else min(entry['min_ms'], elapsed_ms)
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+        entry['connect_ms'] += connect_ms
+        entry['rows'] += rows or 0
+        entry['callers'][caller] = entry['callers'].get(caller, 0) + 1
+        entry['histogram'][bucket] += 1
+        if error is not None:
+            code = getattr(error, 'pgcode', None) or type(error).__name__
+            entry['errors'][code] = entry['errors'].get(code, 0) + 1
+
+    if elapsed_ms >= slow_query_ms():
+        _log_slow(fp_id, text, elapsed_ms, connect_ms, rows, caller, error, params)
+    return fp_id
+
+
+def _log_slow(fp_id, text, elapsed_ms, connect_ms, rows, caller, error, params):
+    path = os.getenv("SLOW_QUERY_LOG", os.path.join("logs", "slow_queries.log"))
+    line = json.dumps({
+        'ts': datetime.now().isoformat(timespec='milliseconds'),
+        'fingerprint': fp_id,
+        'elapsed_ms': round(elapsed_ms, 3),
+        'connect_ms': round(connect_ms, 3),
+        'rows': rows,
+        'caller': caller,
+        'error': getattr(error, 'pgcode', None) or (type(error).__name__ if error else None),
+        'statement': text,
+        'params': [str(p) for p in params] if isinstance(params, (list, tuple)) else None,
+    })
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with _lock, open(path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"Could not write slow query log: {e}")
+
+
+def percentile_ms(histogram, pct):
+    """Upper bound of the histogram bucket holding the pct-th percentile."""
+    total = sum(histogram)
+    if not total:
+        return None
+    target = total * pct / 100.0
+    seen = 0
+    for bound, count in zip(BUCKETS_MS, histogram):
+        seen += count
+        if seen >= target:
+            return bound
+    return BUCKETS_MS[-1]
+
+
+def is_read_only(query):
+    return bool(_READ_ONLY_RE.match(_COMMENT_RE.sub(' ', query))) and not _WRITE_RE.search(query)
+
+
+def maybe_explain(conn, query, params=None):
+    """Capture the plan for `query` if profiling is on and this fingerprint has none yet.
+
+    Runs after the real statement, on the same connection, in a read-only
+    transaction that is rolled back. Failures are recorded, never raised.
+    """
+    if not (enabled() and explain_enabled()):
+        return None
+    fp_id, _ = fingerprint(query)
+    with _lock:
+        if fp_id in _plans:
+            return None
+        _plans[fp_id] = None  # claim it so concurrent callers skip
+
+    if not is_read_only(query):
+        _plans[fp_id] = {'skipped': 'not a read-only statement'}
+        return None
+    try:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute("SET TRANSACTION READ ONLY")
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+            row = cur.fetchone()
+        plan = row['QUERY PLAN'] if isinstance(row, dict) else row[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+        _plans[fp_id] = {'plan': plan, 'summary': summarize_plan(plan)}
+    except Exception as e:
+        _plans[fp_id] = {'skipped': f"explain failed: {e}".strip()}
+    finally:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+    return _plans[fp_id]
+
+
+def _walk(node, depth=0):
+    yield node, depth
+    for child in node.get('Plans', []):
+        yield from _walk(child, depth + 1)
+
+
+def summarize_plan(plan):
+    """Flag the usual plan problems in an EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) document.
+
+    - seq_scans: sequential scans reading at least EXPLAIN_SEQ_SCAN_ROWS rows
+    - misestimates: nodes whose estimated and actual rows differ by EXPLAIN_MISESTIMATE x
+    - spills: sorts on disk and hashes split into batches
+    """
+    seq_rows = _env_float("EXPLAIN_SEQ_SCAN_ROWS", "10000")
+    ratio = _env_float("EXPLAIN_MISESTIMATE", "10")
+    root = plan['Plan']
+    summary = {
+        'execution_ms': plan.get('Execution Time'),
+        'planning_ms': plan.get('Planning Time'),
+        'total_cost': root.get('Total Cost'),
+        'shared_hit_blocks': root.get('Shared Hit Blocks', 0),
+        'shared_read_blocks': root.get('Shared Read Blocks', 0),
+        'seq_scans': [],
+        'misestimates': [],
+        'spills': [],
+    }
+    for node, depth in _walk(root):
+        node_type = node.get('Node Type')
+        loops = node.get('Actual Loops', 1) or 1
+        actual = node.get('Actual Rows', 0) * loops
+        estimated = node.get('Plan Rows', 0) * loops
+
+        if node_type == 'Seq Scan':
+            read = actual + node.get('Rows Removed by Filter', 0) * loops
+            if read >= seq_rows:
+                summary['seq_scans'].append({'relation': node.get('Relation Name'), 'rows_read': read,
+                                             'filter': node.get('Filter')})
+        if max(actual, estimated) >= ratio and max(actual, estimated) / max(min(actual, estimated), 1) >= ratio:
+            summary['misestimates'].append({'node': node_type, 'relation': node.get('Relation Name'),
+                                             'estimated': estimated, 'actual': actual, 'depth': depth})
+        if node_type == 'Sort' and node.get('Sort Space Type') == 'Disk':
+            summary['spills'].append({'node': 'Sort', 'space_kb': node.get('Sort Space Used'),
+                                      'method': node.get('Sort Method')})
+        if node_type == 'Hash' and (node.get('Hash Batches', 1) or 1) > 1:
+            summary['spills'].append({'node': 'Hash', 'batches': node.get('Hash Batches'),
+                                      'peak_kb': node.get('Peak Memory Usage')})
+    return summary
+
+
+def plan_flags(summary):
+    """Short text for a plan summary, e.g. 'seq:attendance, misest x2, spill:Sort'."""
+    if not summary:
+        return ''
+    flags = [f"seq:{s['relation']}" for s in summary['seq_scans']]
+    if summary['misestimates']:
+        flags.append(f"misest x{len(summary['misestimates'])}")
+    flags += [f"spill:{s['node']}" for s in summary['spills']]
+    return ", ".join(flags) or 'ok'
+
+
+def get_stats():
+    """Copy of every fingerprint's entry (with its captured plan, if any)."""
+    with _lock:
+        return {k: {**v, 'errors': dict(v['errors']), 'callers': dict(v['callers']),
+                    'histogram': list(v['histogram']), 'explain': _plans.get(k)}
+                for k, v in _stats.items()}
+
+
+def save_profile(path):
+    """Write every fingerprint's timings and captured plan to a JSON file."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    stats = get_stats()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'captured_at': datetime.now().isoformat(timespec='seconds'),
+                   'statements': list(stats.values())}, f, indent=2, default=str)
+    return path
+
+
+def top_statements(n=10, key='total_ms'):
+    """The n entries with the largest `key` (total_ms, calls, max_ms, rows, ...)."""
+    entries = sorted(get_stats().values(), key=lambda e: e[key], reverse=True)[:n]
+    for e in entries:
+        e['avg_ms'] = e['total_ms'] / e['calls'] if e['calls'] else 0.0
+        e['p50_ms'] = percentile_ms(e['histogram'], 50)
+        e['p95_ms'] = percentile_ms(e['histogram'], 95)
+    return entries
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+        _plans.clear()
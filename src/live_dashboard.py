@@ -0,0 +1,306 @@
+"""State behind the live TUI dashboard.
+
+The dashboard shows today's muster completion per course, AWOL and at-risk
+counts, and recent movements in the top-GPA list. It is loaded once, then kept
+current by small queries:
+
+- Muster rows follow the `data_changes` notifications (see src/database.py).
+  Attendance, enrollment and course events name the changed course_ids, and
+  only those courses are re-read. While the listener is down, every course row
+  is re-read each poll (one rollup row per course) and compared.
+- performance_summary and attrition_risk are not notified. Every poll re-reads
+  the top N from fn_top_students (an index scan of N rows), and the latest risk
+  level of the students whose assessments were logged in table_changes since
+  the previous poll's txid_current_snapshot().
+
+Timestamp and id watermarks are not used: timestamps are the writer's
+transaction start and ids are assigned at insert, so a long transaction
+commits rows already behind any watermark taken meanwhile.
+
+The full load is repeated only at midnight, after a TRUNCATE or an oversized
+change, and when the listener reconnects (events sent while it was down are
+lost).
+
+    dash = LiveDashboard()
+    add_change_callback(dash.on_change)
+    dash.load()
+    changes = dash.poll(listener_connected=True)
+"""
+import threading
+from collections import Counter, deque
+from datetime import date, datetime
+
+from src.database import execute_query, TABLE_CHANGES_QUERY, CHANGE_LOG_KEEP
+
+TOP_N = 10
+AT_RISK_LEVELS = ('High', 'Critical')
+
+COURSE_ROWS_QUERY = """
+SELECT c.course_id, c.course_code, c.name,
+       e.enrolled,
+       COALESCE(r.total_records, 0) AS recorded,
+       COALESCE(r.present_count, 0) AS present,
+       COALESCE(r.late_count, 0) AS late,
+       COALESCE(r.absent_count, 0) AS absent,
+       COALESCE(r.awol_count, 0) AS awol,
+       COALESCE(r.excused_count, 0) AS excused
+FROM courses c
+CROSS JOIN LATERAL (
+    SELECT COUNT(*) AS enrolled FROM enrollments en
+    WHERE en.course_id = c.course_id AND en.status = 'In Progress'
+) e
+LEFT JOIN attendance_daily_rollup r ON r.course_id = c.course_id AND r.muster_date = %s
+"""
+
+ALL_COURSES_QUERY = COURSE_ROWS_QUERY + "ORDER BY c.course_code"
+CHANGED_COURSES_QUERY = COURSE_ROWS_QUERY + "WHERE c.course_id = ANY(%s)"
+
+TOP_GPA_QUERY = "SELECT student_id, first_name, last_name, gpa FROM fn_top_students(%s)"
+
+LATEST_RISK_QUERY = """
+SELECT DISTINCT ON (student_id) risk_id, student_id, risk_level
+FROM attrition_risk
+ORDER BY student_id, assessment_date DESC, risk_id DESC
+"""
+
+# Latest assessment of the students owning the logged risk_ids, or whose
+# listed assessment was among them (a deleted row returns nothing)
+CHANGED_RISK_QUERY = """
+SELECT DISTINCT ON (student_id) risk_id, student_id, risk_level
+FROM attrition_risk
+WHERE student_id IN (SELECT student_id FROM attrition_risk WHERE risk_id = ANY(%s))
+   OR student_id = ANY(%s)
+ORDER BY student_id, assessment_date DESC, risk_id DESC
+"""
+
+SNAPSHOT_QUERY = "SELECT now() AS read_at, txid_current_snapshot()::text AS txid_snapshot"
+
+COUNT_COLUMNS = ('enrolled', 'recorded', 'present', 'late', 'absent', 'awol', 'excused')
+
+
+class LiveDashboard:
+    """Dashboard data, updated in place by load() and poll()."""
+
+    def __init__(self, top_n=TOP_N, change_log=20):
+        self.top_n = top_n
+        self.day = None
+        self.courses = {}          # course_id -> row dict
+        self.totals = Counter()    # sums of COUNT_COLUMNS plus 'complete' courses
+        self.risk = {}             # student_id -> latest risk_level
+        self._risk_ids = {}        # student_id -> risk_id of that assessment
+        self.risk_counts = Counter()
+        self.top = []              # [{'student_id', 'name', 'gpa'}] best first
+        self.gpa_changes = deque(maxlen=change_log)
+        self.last_error = None
+        self._txid_snapshot = None
+        self._read_at = None
+        self._was_connected = None
+        self._lock = threading.Lock()
+        self._pending = {'courses': set(), 'students_removed': set()}
+        self._reload = False
+
+    # ---- change events (called from the listener thread) ----
+
+    def on_change(self, table, op, keys):
+        with self._lock:
+            if table in ('attendance', 'enrollments', 'courses'):
+                ids = keys.get('course_id')
+                if ids is None:
+                    self._reload = True
+                else:
+                    self._pending['courses'].update(int(i) for i in ids)
+            elif table == 'students' and op in ('DELETE', 'TRUNCATE'):
+                ids = keys.get('student_id')
+                if ids is None:
+                    self._reload = True
+                else:
+                    self._pending['students_removed'].update(int(i) for i in ids)
+
+    def has_pending(self):
+        with self._lock:
+            return self._reload or any(self._pending.values())
+
+    def _take_pending(self):
+        with self._lock:
+            pending = {k: set(v) for k, v in self._pending.items()}
+            reload, self._reload = self._reload, False
+            for ids in self._pending.values():
+                ids.clear()
+        return pending, reload
+
+    # ---- loading ----
+
+    def load(self):
+        """Full load. Returns True on success."""
+        with self._lock:
+            for ids in self._pending.values():
+                ids.clear()
+            self._reload = False
+        # Taken first: risk writes committed after it are read again next poll
+        snapshot = execute_query(SNAPSHOT_QUERY, fetch=True)
+        day = date.today()
+        rows = execute_query(ALL_COURSES_QUERY, (day,), fetch=True)
+        risks = execute_query(LATEST_RISK_QUERY, fetch=True)
+        if not snapshot or rows is None or risks is None:
+            self.last_error = "Could not load dashboard data"
+            return False
+
+        self.day = day
+        self.courses.clear()
+        self.totals.clear()
+        for row in rows:
+            self._set_course(dict(row))
+        self.risk = {r['student_id']: r['risk_level'] for r in risks}
+        self._risk_ids = {r['student_id']: r['risk_id'] for r in risks}
+        self.risk_counts = Counter(self.risk.values())
+        self._txid_snapshot, self._read_at = snapshot[0]['txid_snapshot'], snapshot[0]['read_at']
+        self.top = self._read_top() or []
+        self.gpa_changes.clear()
+        self.last_error = None
+        return True
+
+    def _read_top(self):
+        rows = execute_query(TOP_GPA_QUERY, (self.top_n,), fetch=True)
+        if rows is None:
+            return None
+        return [{'student_id': r['student_id'], 'name': f"{r['first_name']} {r['last_name']}",
+                 'gpa': float(r['gpa'])} for r in rows]
+
+    # ---- incremental updates ----
+
+    def _set_course(self, row):
+        self._drop_course(row['course_id'])
+        self.courses[row['course_id']] = row
+        for col in COUNT_COLUMNS:
+            self.totals[col] += row[col]
+        self.totals['complete'] += is_complete(row)
+
+    def _drop_course(self, course_id):
+        old = self.courses.pop(course_id, None)
+        if old:
+            for col in COUNT_COLUMNS:
+                self.totals[col] -= old[col]
+            self.totals['complete'] -= is_complete(old)
+        return old is not None
+
+    def poll(self, listener_connected):
+        """Apply pending events and timer deltas.
+
+        Returns {'reload': bool, 'courses': changed course_ids, 'removed':
+        removed course_ids, 'risk': bool, 'top': bool}, or None if a query failed
+        (pending events are kept for the next poll).
+        """
+        changes = {'reload': False, 'courses': set(), 'removed': set(), 'risk': False, 'top': False}
+        reconnected = listener_connected and self._was_connected is False
+        self._was_connected = listener_connected
+        pending, reload = self._take_pending()
+        if reload or reconnected or self.day != date.today():
+            changes['reload'] = self.load()
+            return changes if changes['reload'] else None
+
+        snapshot = execute_query(SNAPSHOT_QUERY, fetch=True)
+        if not snapshot:
+            self._requeue(pending)
+            return None
+
+        # Without the listener there are no events: compare every course row
+        expected = pending['courses'] if listener_connected else pending['courses'] | set(self.courses)
+        rows = []
+        if not listener_connected:
+            rows = execute_query(ALL_COURSES_QUERY, (self.day,), fetch=True)
+        elif pending['courses']:
+            rows = execute_query(CHANGED_COURSES_QUERY, (self.day, sorted(pending['courses'])), fetch=True)
+        if rows is None:
+            self._requeue(pending)
+            return None
+        seen = set()
+        for row in rows:
+            row = dict(row)
+            seen.add(row['course_id'])
+            if self.courses.get(row['course_id']) != row:
+                self._set_course(row)
+                changes['courses'].add(row['course_id'])
+        for course_id in expected - seen:
+            if self._drop_course(course_id):
+                changes['removed'].add(course_id)
+
+        for student_id in pending['students_removed']:
+            changes['risk'] |= self._set_risk(student_id, None)
+        changes['risk'] |= self._poll_risk(snapshot[0])
+
+        changes['top'] = self._poll_top()
+        self.last_error = None
+        return changes
+
+    def _requeue(self, pending):
+        with self._lock:
+            for key, ids in pending.items():
+                self._pending[key].update(ids)
+        self.last_error = "Dashboard update failed; retrying"
+
+    def _set_risk(self, student_id, row):
+        """Make row (or no assessment) the student's latest. Returns True if the level changed."""
+        old = self.risk.pop(student_id, None)
+        self._risk_ids.pop(student_id, None)
+        if old:
+            self.risk_counts[old] -= 1
+        if row:
+            self.risk[student_id] = row['risk_level']
+            self._risk_ids[student_id] = row['risk_id']
+            self.risk_counts[row['risk_level']] += 1
+        return old != (row['risk_level'] if row else None)
+
+    def _poll_risk(self, snapshot):
+        """Re-read the students with logged risk changes. On failure the log is read again next poll."""
+        full = snapshot['read_at'] - self._read_at >= CHANGE_LOG_KEEP
+        if not full:
+            logged = execute_query(TABLE_CHANGES_QUERY, {'since': self._txid_snapshot, 'tables': ['attrition_risk']},
+                                   fetch=True)
+            if logged is None:
+                return False
+            full = any(r['keys'] is None for r in logged)
+        if full:
+            rows = execute_query(LATEST_RISK_QUERY, fetch=True)
+            students = set(self.risk)
+        else:
+            ids = sorted({k for r in logged for k in r['keys']})
+            students = {s for s, risk_id in self._risk_ids.items() if risk_id in ids}
+            rows = execute_query(CHANGED_RISK_QUERY, (ids, sorted(students)), fetch=True) if ids else []
+        if rows is None:
+            return False
+        latest = {r['student_id']: r for r in rows}
+        changed = False
+        for student_id in students | set(latest):
+            changed |= self._set_risk(student_id, latest.get(student_id))
+        self._txid_snapshot, self._read_at = snapshot['txid_snapshot'], snapshot['read_at']
+        return changed
+
+    def _poll_top(self):
+        before = {t['student_id']: (rank, t) for rank, t in enumerate(self.top, start=1)}
+        top = self._read_top()
+        if top is None or top == self.top:
+            return False
+        stamp = datetime.now().strftime('%H:%M:%S')
+        for rank, entry in enumerate(top, start=1):
+            old = before.get(entry['student_id'])
+            if old is None:
+                self.gpa_changes.appendleft((stamp, entry['name'], f"entered at #{rank}", entry['gpa']))
+            elif old[0] != rank or old[1]['gpa'] != entry['gpa']:
+                self.gpa_changes.appendleft((stamp, entry['name'], f"#{old[0]} -> #{rank}", entry['gpa']))
+        listed_now = {t['student_id'] for t in top}
+        for student_id, (rank, entry) in before.items():
+            if student_id not in listed_now:
+                self.gpa_changes.appendleft((stamp, entry['name'], f"left from #{rank}", entry['gpa']))
+        self.top = top
+        return True
+
+    def at_risk(self):
+        return sum(self.risk_counts[level] for level in AT_RISK_LEVELS)
+
+
+def is_complete(row):
+    return row['enrolled'] > 0 and row['recorded'] >= row['enrolled']
+
+
+def completion_pct(recorded, enrolled):
+    return 100.0 * min(recorded, enrolled) / enrolled if enrolled else None
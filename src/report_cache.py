@@ -0,0 +1,201 @@
+"""On-disk cache of rendered reports keyed by data version.
+
+A report's cache key combines its name, format, parameters and a data-version
+token per source table. For a table it is the count, max and sum of the
+change_ids its trigger has logged in table_changes; for a materialized view, its
+materialized_view_refreshes time. The log is written in the writer's
+transaction, so a committed write changes the key for the very next check,
+whichever connection or pool made it. Reports whose content depends on today's date (the dated ledger file,
+the trailing watchlist window) also include the date in the key. On a hit the
+cached files are copied to the usual output paths and nothing is queried or
+rendered.
+
+Each entry is a directory under REPORT_CACHE_DIR (default reports/.cache)
+holding the output files. An entry's mtime is refreshed on every hit, and
+least-recently-used entries are evicted once the cache exceeds
+REPORT_CACHE_MAX_MB (default 200). Set REPORT_CACHE=0 to disable caching.
+
+Pruning the log (sp_prune_table_changes) also changes the token, which only
+costs one regeneration.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+from datetime import date
+
+from src.database import get_db_connection, TABLE_VERSIONS_QUERY
+
+# Logged tables and materialized views each report reads. Trigger-maintained
+# tables are listed by their sources: company_readiness_summary by
+# performance_summary and students (company transfers and deletions recount
+# it), the attendance counters and rollup by attendance.
+REPORT_TABLES = {
+    'ledger': ('performance_summary', 'students', 'companies'),
+    'watchlist': ('attrition_risk', 'students', 'courses', 'attendance'),
+    'grit': ('mv_course_avg_grades', 'enrollments', 'courses'),
+    'muster': ('attendance', 'students', 'courses'),
+    'attendance': ('attendance', 'courses'),
+}
+
+# Output depends on the current date as well as the data
+DATED_REPORTS = ('ledger', 'watchlist')
+
+
+def enabled():
+    return os.getenv("REPORT_CACHE", "1") != "0"
+
+
+def cache_dir():
+    return os.getenv("REPORT_CACHE_DIR", os.path.join("reports", ".cache"))
+
+
+def max_bytes():
+    return int(float(os.getenv("REPORT_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+
+def data_versions(tables, conn=None):
+    """{table: version} from table_changes and materialized_view_refreshes, or None if it can't be read.
+
+    Tables with nothing in the log are left out.
+    """
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    if not conn:
+        return None
+    try:
+        with conn.cursor() as cur:
+            cur.execute(TABLE_VERSIONS_QUERY, {'tables': sorted(set(tables))})
+            rows = cur.fetchall()
+        conn.rollback()
+    except Exception as e:
+        print(f"Could not read table data versions: {e}")
+        conn.rollback()
+        return None
+    finally:
+        if own_conn:
+            conn.close()
+    return {r['table_name']: r['version'] for r in rows}
+
+
+def cache_key(name, fmt, params, versions):
+    """Key for one report run; None when the report is not cacheable."""
+    if name not in REPORT_TABLES or versions is None:
+        return None
+    payload = {
+        'report': name,
+        'format': fmt,
+        'params': {k: params[k] for k in sorted(params) if params[k] is not None},
+        'data': {t: versions.get(t) for t in REPORT_TABLES[name]},
+        'date': date.today().isoformat() if name in DATED_REPORTS else None,
+    }
+    return hashlib.sha256(json.dumps(payload, default=str).encode()).hexdigest()[:32]
+
+
+def lookup(key, outputs):
+    """Copy a cached entry to `outputs`. Returns True on a hit."""
+    if not key:
+        return False
+    entry = os.path.join(cache_dir(), key)
+    cached = [os.path.join(entry, os.path.basename(path)) for path in outputs]
+    if not all(os.path.isfile(path) for path in cached):
+        return False
+    try:
+        for src, dest in zip(cached, outputs):
+            os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+            shutil.copyfile(src, dest)
+        os.utime(entry)
+    except OSError as e:
+        print(f"Report cache read failed: {e}")
+        return False
+    return True
+
+
+def store(key, outputs):
+    """Save freshly generated `outputs` under `key`, then evict down to the size cap."""
+    if not key:
+        return False
+    root = cache_dir()
+    entry = os.path.join(root, key)
+    staging = f"{entry}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(staging, exist_ok=True)
+        for path in outputs:
+            shutil.copyfile(path, os.path.join(staging, os.path.basename(path)))
+        # Another process may have stored the same key first; either copy is valid
+        if os.path.isdir(entry):
+            shutil.rmtree(staging, ignore_errors=True)
+        else:
+            os.replace(staging, entry)
+    except OSError as e:
+        print(f"Report cache write failed: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+    evict(max_bytes())
+    return True
+
+
+def _entries():
+    """[(last_used, bytes, path)] for every complete entry."""
+    root = cache_dir()
+    if not os.path.isdir(root):
+        return []
+    entries = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if '.tmp-' in name or not os.path.isdir(path):
+            continue
+        try:
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), size, path))
+        except OSError:
+            continue
+    return entries
+
+
+def evict(limit_bytes):
+    """Remove least-recently-used entries until the cache fits in limit_bytes. Returns entries removed."""
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in entries:
+        if total <= limit_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear():
+    return evict(-1)
+
+
+def stats():
+    entries = _entries()
+    return {'entries': len(entries), 'bytes': sum(size for _, size, _ in entries), 'limit_bytes': max_bytes()}
+
+
+def generate_cached(name, fmt, params, outputs, generate, versions=None):
+    """Serve a report from the cache or run `generate()` and cache its files.
+
+    Returns 'hit', 'stored' or 'miss' (not cacheable, caching disabled, or the
+    generator wrote nothing).
+    """
+    if not enabled() or name not in REPORT_TABLES:
+        generate()
+        return 'miss'
+    if versions is None:
+        versions = data_versions(REPORT_TABLES[name])
+    key = cache_key(name, fmt, params, versions)
+    if lookup(key, outputs):
+        return 'hit'
+
+    started = time.time()
+    generate()
+    # Generators print their errors instead of raising; only cache fresh files
+    if key and all(os.path.isfile(p) and os.path.getmtime(p) >= started - 1 for p in outputs):
+        store(key, outputs)
+        return 'stored'
+    return 'miss'
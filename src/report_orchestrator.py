@@ -0,0 +1,199 @@
+"""Parallel end-of-day report pack.
+
+Each report runs in two stages. The query stage runs on a thread pool with a
+psycopg2 ThreadedConnectionPool, so every report's SQL is in flight at once.
+The render stage (ReportLab layout and PDF build, which is CPU-bound) runs in
+a process pool and starts as soon as that report's rows arrive. A failure in
+either stage is recorded for that report only; the rest of the pack still
+completes. The pack takes roughly as long as its slowest report instead of the
+sum of all of them.
+
+    from src.report_orchestrator import run_report_pack
+    results = run_report_pack()
+"""
+import io
+import os
+import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import date
+
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import RealDictCursor
+
+from src import reports, report_cache
+from src.database import get_db_config
+
+# (report, format) pairs generated by default
+DEFAULT_PACK = (
+    ('ledger', 'pdf'),
+    ('watchlist', 'pdf'),
+    ('grit', 'pdf'),
+    ('muster', 'pdf'),
+)
+
+REPORT_TITLES = {
+    'ledger': 'Company Readiness Ledger',
+    'watchlist': 'Attrition Watchlist',
+    'grit': 'Course Grit',
+    'muster': 'Daily Muster',
+}
+
+
+class PrefetchedRows:
+    """Rows from the query stage, exposed through the AnalyticsSnapshot methods the generators call."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def company_readiness(self):
+        return self.rows
+
+    def course_grit(self):
+        return self.rows
+
+    def attrition_watchlist(self, window_days=None, threshold=75.0):
+        return self.rows
+
+
+def report_queries(name, window_days=None, since=None):
+    """[(sql, params), ...] a report needs."""
+    if name == 'ledger':
+        return [(reports.COMPANY_READINESS_QUERY, None)]
+    if name == 'watchlist':
+        return [(reports.ATTRITION_WATCHLIST_QUERY, (window_days,))]
+    if name == 'grit':
+        return [(reports.COURSE_GRIT_QUERY, None)]
+    if name == 'muster':
+        rollup_query, exceptions_query, params = reports.daily_muster_queries(since)
+        return [(rollup_query, params), (exceptions_query, params)]
+    raise ValueError(f"Unknown report: {name}")
+
+
+def report_outputs(name, fmt):
+    """Files a report writes with its default filename."""
+    if name == 'ledger':
+        return [os.path.join("reports", f"Company_Readiness_Ledger_{date.today().strftime('%Y%m%d')}.pdf")]
+    stem = {'watchlist': 'attrition_watchlist', 'grit': 'course_grit', 'muster': 'daily_muster',
+            'attendance': 'attendance_report'}[name]
+    files = [os.path.join("reports", f"{stem}.{fmt}")]
+    if name == 'muster' and fmt == 'csv':
+        files.append(os.path.join("reports", "daily_muster_exceptions.csv"))
+    return files
+
+
+def fetch_report_rows(pool, name, window_days=None, since=None):
+    """Query stage: run a report's SQL on one pooled connection. Returns (row lists, seconds)."""
+    started = time.perf_counter()
+    conn = pool.getconn()
+    try:
+        results = []
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            for sql, params in report_queries(name, window_days, since):
+                cur.execute(sql, params)
+                # Plain dicts pickle cheaply into the render process
+                results.append([dict(r) for r in cur.fetchall()])
+        conn.rollback()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+    return results, time.perf_counter() - started
+
+
+def render_report(name, fmt, results, window_days=None, since=None):
+    """Render stage (runs in a worker process). Returns (ok, seconds, generator output)."""
+    started, started_at = time.perf_counter(), time.time()
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        if name == 'muster':
+            reports.generate_daily_muster_report(fmt, since=since, rows=(results[0], results[1]))
+        else:
+            data = PrefetchedRows(results[0])
+            if name == 'ledger':
+                reports.generate_company_readiness_ledger(snapshot=data)
+            elif name == 'watchlist':
+                reports.generate_attrition_watchlist_report(fmt, window_days=window_days, snapshot=data)
+            else:
+                reports.generate_course_grit_report(fmt, snapshot=data)
+    # Generators print their errors instead of raising; the output file is the proof
+    ok = all(os.path.isfile(path) and os.path.getmtime(path) >= started_at - 1 for path in report_outputs(name, fmt))
+    return ok, time.perf_counter() - started, buffer.getvalue().strip()
+
+
+def cached_pack_keys(pool, pack, window_days=None, since=None):
+    """{(name, fmt): cache key} for the pack, from one read of the table data versions."""
+    tables = [t for name, _ in pack for t in report_cache.REPORT_TABLES.get(name, ())]
+    conn = pool.getconn()
+    try:
+        versions = report_cache.data_versions(tables, conn)
+    finally:
+        pool.putconn(conn)
+    params = {'window_days': window_days, 'since': since}
+    return {(name, fmt): report_cache.cache_key(name, fmt, params, versions) for name, fmt in pack}
+
+
+def run_report_pack(pack=DEFAULT_PACK, window_days=None, since=None, query_workers=4, render_workers=None,
+                    use_cache=True):
+    """Generate every (report, format) in `pack` concurrently.
+
+    Reports whose data is unchanged since they were last rendered are copied
+    from the report cache instead (see src/report_cache.py).
+
+    Returns {'reports': [per-report dict], 'wall_s': float} where each report dict
+    has name, format, status ('ok' | 'failed'), cached, query_s, render_s,
+    total_s and error/output text.
+    """
+    started = time.perf_counter()
+    results = {(name, fmt): {'report': REPORT_TITLES.get(name, name), 'name': name, 'format': fmt,
+                             'status': 'pending', 'cached': False, 'query_s': None, 'render_s': None, 'total_s': None,
+                             'error': None, 'output': ''}
+               for name, fmt in pack}
+    try:
+        pool = ThreadedConnectionPool(1, max(1, query_workers), **get_db_config())
+    except Exception as e:
+        for r in results.values():
+            r.update(status='failed', error=f"Could not connect: {str(e).strip()}")
+        return {'reports': list(results.values()), 'wall_s': time.perf_counter() - started}
+
+    try:
+        keys = cached_pack_keys(pool, pack, window_days, since) if use_cache and report_cache.enabled() else {}
+        pending = []
+        for name, fmt in pack:
+            if report_cache.lookup(keys.get((name, fmt)), report_outputs(name, fmt)):
+                results[(name, fmt)].update(status='ok', cached=True, output="Served from the report cache")
+            else:
+                pending.append((name, fmt))
+
+        with ThreadPoolExecutor(max_workers=max(1, query_workers)) as queries, \
+                ProcessPoolExecutor(max_workers=render_workers or max(1, min(len(pending), os.cpu_count() or 2))) as renders:
+            fetches = {queries.submit(fetch_report_rows, pool, name, window_days, since): (name, fmt)
+                       for name, fmt in pending}
+            rendering = {}
+            for future in as_completed(fetches):
+                key = fetches[future]
+                try:
+                    rows, results[key]['query_s'] = future.result()
+                except Exception as e:
+                    results[key].update(status='failed', error=f"Query failed: {str(e).strip()}")
+                    continue
+                rendering[renders.submit(render_report, *key, rows, window_days, since)] = key
+            for future in as_completed(rendering):
+                key = rendering[future]
+                try:
+                    ok, results[key]['render_s'], results[key]['output'] = future.result()
+                except Exception as e:
+                    results[key].update(status='failed', error=f"Render failed: {e}")
+                    continue
+                results[key]['status'] = 'ok' if ok else 'failed'
+                if ok:
+                    report_cache.store(keys.get(key), report_outputs(*key))
+                else:
+                    results[key]['error'] = results[key]['output'] or "No output written"
+    finally:
+        pool.closeall()
+
+    for r in results.values():
+        r['total_s'] = (r['query_s'] or 0) + (r['render_s'] or 0)
+    return {'reports': list(results.values()), 'wall_s': time.perf_counter() - started}
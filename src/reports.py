@@ -26,9 +26,116 @@ except Exception:
     HAS_PIE = False
 
 
-def export_to_csv(query, filename):
+# Report queries live at module level so the report orchestrator can run them
+# on pooled connections and hand the rows to the generators below.
+
+# Per-company metrics are kept current by triggers on performance_summary
+COMPANY_READINESS_QUERY = """
+SELECT co.company_name, co.commanding_officer,
+       r.avg_gpa,
+       r.good_count,
+       r.student_count AS total_students
+FROM company_readiness_summary r
+JOIN companies co ON co.company_id = r.company_id
+WHERE r.student_count > 0
+ORDER BY r.avg_gpa DESC
+"""
+
+# Parameter: low-attendance window in days (NULL = all history). Each scoring
+# run adds a new assessment, so only each student's latest one is listed.
+ATTRITION_WATCHLIST_QUERY = """
+SELECT ar.student_id,
+       s.service_number,
+       s.first_name,
+       s.last_name,
+       ar.risk_score,
+       ar.risk_level,
+       ar.contributing_factors,
+       va.course_id AS low_att_course_id,
+       c.course_code,
+       c.name AS low_att_course_name,
+       va.attendance_rate
+FROM (
+    SELECT DISTINCT ON (student_id) student_id, risk_score, risk_level, contributing_factors
+    FROM attrition_risk
+    ORDER BY student_id, assessment_date DESC, risk_id DESC
+) ar
+JOIN students s ON s.student_id = ar.student_id
+LEFT JOIN fn_low_attendance(%s, 75.00) va ON va.student_id = ar.student_id
+LEFT JOIN courses c ON c.course_id = va.course_id
+ORDER BY 
+  CASE WHEN ar.risk_level = 'Critical' THEN 1
+       WHEN ar.risk_level = 'High' THEN 2
+       WHEN ar.risk_level = 'Medium' THEN 3
+       ELSE 4 END,
+  ar.risk_score DESC
+"""
+
+# Aggregate by department token from course_code (prefix before '-'). GROUP BY
+# repeats the expression: mv_course_avg_grades also has a `department` column,
+# which a bare GROUP BY department would pick over the alias.
+COURSE_GRIT_QUERY = """
+WITH grit AS (
+  SELECT split_part(course_code, '-', 1) AS department,
+         SUM(a_bucket) AS a_bucket,
+         SUM(b_bucket) AS b_bucket,
+         SUM(c_bucket) AS c_bucket,
+         SUM(d_f_bucket) AS d_f_bucket,
+         SUM(enrollments) AS enrollments,
+         (SELECT refreshed_at FROM materialized_view_refreshes
+          WHERE view_name = 'mv_course_avg_grades') AS data_as_of
+  FROM mv_course_avg_grades
+  GROUP BY split_part(course_code, '-', 1)
+), failures AS (
+  SELECT split_part(course_code, '-', 1) AS department,
+         SUM(total_enrollments) AS total_enrollments,
+         SUM(failed_count) AS failed_count
+  FROM vw_course_enrollment_stats
+  GROUP BY split_part(course_code, '-', 1)
+)
+SELECT g.department, g.a_bucket, g.b_bucket, g.c_bucket, g.d_f_bucket, g.enrollments,
+       COALESCE(f.total_enrollments, 0) AS total_enrollments, COALESCE(f.failed_count, 0) AS failed_count,
+       g.data_as_of
+FROM grit g
+LEFT JOIN failures f ON f.department = g.department
+ORDER BY g.department
+"""
+
+
+def daily_muster_queries(since=None):
+    """(rollup_query, exceptions_query, params) for the daily muster report."""
+    rollup_filter = "WHERE muster_date >= %s" if since else ""
+    exceptions_filter = "AND a.muster_date >= %s" if since else ""
+    params = (since,) if since else None
+
+    rollup_query = f"""
+    SELECT muster_date, course_id, course_code, course_name,
+           present_count, late_count, awol_count, absent_count, excused_count, total_records
+    FROM vw_attendance_report
+    {rollup_filter}
+    ORDER BY muster_date DESC
+    """
+
+    exceptions_query = f"""
+    SELECT a.muster_date, a.student_id, s.service_number, s.first_name, s.last_name,
+           c.course_code, a.status, a.recorded_by, a.remarks
+    FROM attendance a
+    JOIN students s ON s.student_id = a.student_id
+    JOIN courses c ON c.course_id = a.course_id
+    WHERE a.status IN ('AWOL', 'Absent')
+      {exceptions_filter}
+    ORDER BY a.muster_date DESC
+    """
+    return rollup_query, exceptions_query, params
+
+
+def export_to_csv(query, filename, params=None):
     """Execute a query and write results to a CSV file."""
-    results = execute_query(query, fetch=True)
+    write_rows_csv(execute_query(query, params, fetch=True), filename)
+
+
+def write_rows_csv(results, filename):
+    """Write a list of dict rows (query results or snapshot aggregates) to a CSV file."""
     if not results:
         print("No data found to export.")
         return
@@ -215,31 +322,21 @@ def generate_official_transcript(student_id, filename=None):
         print(f"Official transcript saved to {filename}")
     except Exception as e:
         print(f"Error generating transcript PDF: {e}")
-def generate_company_readiness_ledger(filename=None, support_threshold_pct=60):
+def generate_company_readiness_ledger(filename=None, support_threshold_pct=60, snapshot=None):
     """Generate a Company Readiness & Performance Ledger PDF.
 
     - Bar chart: average GPA per company (visual quality focused)
     - Summary table: commanding_officer and % students in Good Standing
     - Key insight: companies below thresholds are flagged for support
+
+    Pass a loaded AnalyticsSnapshot as `snapshot` to aggregate in memory
+    instead of querying the database.
     """
     if not HAS_REPORTLAB:
         print("Error: ReportLab library is required for PDF generation.")
         return
 
-    # Aggregate by company using pre-computed performance_summary where possible
-    q = """
-    SELECT co.company_name, co.commanding_officer,
-           AVG(ps.gpa) AS avg_gpa,
-           SUM(CASE WHEN ps.current_standing ILIKE 'Good%' THEN 1 ELSE 0 END) AS good_count,
-           COUNT(*) AS total_students
-    FROM companies co
-    JOIN students s ON s.company_id = co.company_id
-    JOIN performance_summary ps ON ps.student_id = s.student_id
-    GROUP BY co.company_name, co.commanding_officer
-    ORDER BY avg_gpa DESC
-    """
-
-    rows = execute_query(q, fetch=True)
+    rows = snapshot.company_readiness() if snapshot else execute_query(COMPANY_READINESS_QUERY, fetch=True)
     if not rows:
         print("No company performance data available.")
         return
@@ -350,41 +447,26 @@ def generate_attendance_report(format='csv'):
         export_to_pdf(query, "Attendance Report", filename)
 
 
-def generate_attrition_watchlist_report(format='csv'):
+def generate_attrition_watchlist_report(format='csv', window_days=None, snapshot=None):
     """Generate Attrition Risk & Intervention Watchlist report.
 
-    Data sources: attrition_risk and vw_low_attendance.
+    Data sources: attrition_risk and fn_low_attendance (counter-based).
+    `window_days` restricts the low-attendance check to the trailing N days
+    (None = all history). With a loaded AnalyticsSnapshot as `snapshot` the
+    rows are built in memory instead.
     For CSV the raw query is exported. For PDF, applies conditional
     formatting (Critical -> red, High -> orange) and wraps
     `contributing_factors` using a Paragraph flowable.
     """
-    query = """
-    SELECT ar.student_id,
-           s.service_number,
-           s.first_name,
-           s.last_name,
-           ar.risk_score,
-           ar.risk_level,
-           ar.contributing_factors,
-           va.course_id AS low_att_course_id,
-           va.course_code,
-           va.course_name AS low_att_course_name,
-           va.attendance_rate
-    FROM attrition_risk ar
-    JOIN students s ON s.student_id = ar.student_id
-    LEFT JOIN vw_low_attendance va ON va.student_id = ar.student_id
-    ORDER BY 
-      CASE WHEN ar.risk_level = 'Critical' THEN 1
-           WHEN ar.risk_level = 'High' THEN 2
-           WHEN ar.risk_level = 'Medium' THEN 3
-           ELSE 4 END,
-      ar.risk_score DESC
-    """
+    params = (window_days,)
 
     filename = os.path.join("reports", f"attrition_watchlist.{format}")
 
     if format == 'csv':
-        export_to_csv(query, filename)
+        if snapshot:
+            write_rows_csv(snapshot.attrition_watchlist(window_days), filename)
+        else:
+            export_to_csv(ATTRITION_WATCHLIST_QUERY, filename, params)
         return
 
     # PDF path
@@ -392,7 +474,7 @@ def generate_attrition_watchlist_report(format='csv'):
         print("Error: ReportLab library is required for PDF generation.")
         return
 
-    results = execute_query(query, fetch=True)
+    results = snapshot.attrition_watchlist(window_days) if snapshot else execute_query(ATTRITION_WATCHLIST_QUERY, params, fetch=True)
     if not results:
         print("No data found to export.")
         return
@@ -460,50 +542,31 @@ def generate_attrition_watchlist_report(format='csv'):
         print(f"Error saving PDF: {e}")
 
 
-def generate_course_grit_report(format='csv'):
+def generate_course_grit_report(format='csv', snapshot=None):
     """Generate Course Grit & Grade Distribution Analysis.
 
-    Data Source: vw_course_avg_grades and vw_course_enrollment_stats.
+    Data Source: mv_course_avg_grades and vw_course_enrollment_stats.
     Produces CSV with aggregated A/B/C/D-F buckets per department and
     a PDF with a pie chart per department plus a small statistics table
-    showing total_enrollments vs failed_count.
-    """
-    # Aggregate by department token from course_code (prefix before '-')
-    agg_query = """
-    WITH grit AS (
-      SELECT split_part(course_code, '-', 1) AS department,
-             SUM(a_bucket) AS a_bucket,
-             SUM(b_bucket) AS b_bucket,
-             SUM(c_bucket) AS c_bucket,
-             SUM(d_f_bucket) AS d_f_bucket,
-             SUM(enrollments) AS enrollments
-      FROM vw_course_avg_grades
-      GROUP BY department
-    ), failures AS (
-      SELECT split_part(course_code, '-', 1) AS department,
-             SUM(total_enrollments) AS total_enrollments,
-             SUM(failed_count) AS failed_count
-      FROM vw_course_enrollment_stats
-      GROUP BY department
-    )
-    SELECT g.department, g.a_bucket, g.b_bucket, g.c_bucket, g.d_f_bucket, g.enrollments,
-           COALESCE(f.total_enrollments, 0) AS total_enrollments, COALESCE(f.failed_count, 0) AS failed_count
-    FROM grit g
-    LEFT JOIN failures f ON f.department = g.department
-    ORDER BY g.department
+    showing total_enrollments vs failed_count. Grade buckets come from the
+    materialized view, so both outputs carry its data_as_of timestamp.
+    With a loaded AnalyticsSnapshot as `snapshot` the same rows are computed
+    in memory and data_as_of is the snapshot time.
     """
-
     filename = os.path.join("reports", f"course_grit.{format}")
 
     if format == 'csv':
-        export_to_csv(agg_query, filename)
+        if snapshot:
+            write_rows_csv(snapshot.course_grit(), filename)
+        else:
+            export_to_csv(COURSE_GRIT_QUERY, filename)
         return
 
     if not HAS_REPORTLAB:
         print("Error: ReportLab library is required for PDF generation.")
         return
 
-    rows = execute_query(agg_query, fetch=True)
+    rows = snapshot.course_grit() if snapshot else execute_query(COURSE_GRIT_QUERY, fetch=True)
     if not rows:
         print("No data found to export.")
         return
@@ -514,6 +577,9 @@ def generate_course_grit_report(format='csv'):
         styles = getSampleStyleSheet()
 
         elements.append(Paragraph("Course Grit & Grade Distribution Analysis", styles['Title']))
+        as_of = max((r['data_as_of'] for r in rows if r.get('data_as_of')), default=None)
+        if as_of:
+            elements.append(Paragraph(f"Grade data as of {as_of:%Y-%m-%d %H:%M}", styles['Normal']))
 
         # For each department create a small pie chart and a stats table
         for r in rows:
@@ -586,43 +652,41 @@ def generate_course_grit_report(format='csv'):
         print(f"Error saving PDF: {e}")
 
 
-def generate_daily_muster_report(format='csv'):
+def generate_daily_muster_report(format='csv', since=None, rows=None):
     """Generate Daily Muster (Attendance) Accountability Report.
 
-    Data Source: vw_attendance_report for daily roll-ups and `attendance`
+    Data Source: vw_attendance_report (backed by the trigger-maintained
+    attendance_daily_rollup counters) for daily roll-ups and `attendance`
     for exceptions (AWOL / Absent) including `recorded_by` and `remarks`.
-    """
-    rollup_query = """
-    SELECT muster_date, course_id, course_code, course_name,
-           present_count, late_count, awol_count, absent_count, excused_count, total_records
-    FROM vw_attendance_report
-    ORDER BY muster_date DESC
-    """
 
-    exceptions_query = """
-    SELECT a.muster_date, a.student_id, s.service_number, s.first_name, s.last_name,
-           c.course_code, a.status, a.recorded_by, a.remarks
-    FROM attendance a
-    JOIN students s ON s.student_id = a.student_id
-    JOIN courses c ON c.course_id = a.course_id
-    WHERE a.status IN ('AWOL', 'Absent')
-    ORDER BY a.muster_date DESC
+    `since` (date or 'YYYY-MM-DD') limits both sections to muster dates on
+    or after it; attendance is partitioned by month, so older partitions
+    are pruned instead of scanned. `rows` takes an already fetched
+    (rollups, exceptions) pair instead of querying (report orchestrator).
     """
+    rollup_query, exceptions_query, params = daily_muster_queries(since)
 
     filename = os.path.join("reports", f"daily_muster.{format}")
 
     # CSV: write rollup and exceptions as two separate files for clarity
     if format == 'csv':
-        export_to_csv(rollup_query, filename)
-        export_to_csv(exceptions_query, os.path.join("reports", "daily_muster_exceptions.csv"))
+        if rows:
+            write_rows_csv(rows[0], filename)
+            write_rows_csv(rows[1], os.path.join("reports", "daily_muster_exceptions.csv"))
+        else:
+            export_to_csv(rollup_query, filename, params)
+            export_to_csv(exceptions_query, os.path.join("reports", "daily_muster_exceptions.csv"), params)
         return
 
     if not HAS_REPORTLAB:
         print("Error: ReportLab library is required for PDF generation.")
         return
 
-    rollups = execute_query(rollup_query, fetch=True)
-    exceptions = execute_query(exceptions_query, fetch=True)
+    if rows:
+        rollups, exceptions = rows
+    else:
+        rollups = execute_query(rollup_query, params, fetch=True)
+        exceptions = execute_query(exceptions_query, params, fetch=True)
 
     if not rollups and not exceptions:
         print("No data found to export.")
@@ -2,12 +2,14 @@ from textual.app import App, ComposeResult
 from textual.widgets import Header, Footer, Button, Static, DataTable, Label, ContentSwitcher, Input
 from textual.containers import Container, Vertical, Horizontal
 from textual.screen import Screen
-from src.database import execute_query
+from src.database import execute_query, start_change_listener, add_change_callback, remove_change_callback, cache_info
+from src.live_dashboard import LiveDashboard, completion_pct, AT_RISK_LEVELS
 from src.controllers import (
     add_student, update_student, delete_student, get_student_id_by_email,
     get_student_enrollments, record_grade, get_student_grades, mark_attendance, get_student_attendance
 )
 import os
+import time
 
 # Helper to load SQL
 def load_sql_query(filename):
@@ -22,6 +24,7 @@ class Sidebar(Container):
     def compose(self) -> ComposeResult:
         yield Label("EDA DBMS", classes="title")
         yield Button("Home", id="btn_home", classes="-active")
+        yield Button("Dashboard", id="btn_dashboard")
         yield Button("Students", id="btn_students")
         yield Button("Academics", id="btn_academics")
         yield Button("Reports", id="btn_reports")
@@ -456,6 +459,128 @@ class ReportsView(Container):
             table.add_columns("Error")
             table.add_row(str(e))
 
+class DashboardView(Container):
+    """Today's muster, AWOL and at-risk counts, updated from change events.
+
+    Only the rows and cells that changed are touched, so the table stays
+    responsive with thousands of courses. Data is loaded the first time the
+    view is shown; src/live_dashboard.py does the querying.
+    """
+    MUSTER_COLUMNS = [("Code", "code"), ("Course", "name"), ("Mustered", "muster"), ("%", "pct"),
+                      ("Present", "present"), ("Late", "late"), ("Absent", "absent"),
+                      ("AWOL", "awol"), ("Excused", "excused")]
+
+    def compose(self) -> ComposeResult:
+        yield Label("Live Dashboard", classes="section-title")
+        yield Static("Loading...", id="dash_summary")
+        yield Horizontal(
+            DataTable(id="dash_muster"),
+            Vertical(
+                Label("Top GPA"),
+                DataTable(id="dash_top"),
+                Label("GPA movements"),
+                DataTable(id="dash_gpa_changes"),
+                id="dash_side",
+            ),
+            classes="dashboard-container"
+        )
+
+    def on_mount(self) -> None:
+        self.dashboard = LiveDashboard()
+        self.loaded = False
+        self.busy = False
+        self.last_poll = 0.0
+        muster = self.query_one("#dash_muster", DataTable)
+        muster.cursor_type = "row"
+        for label, key in self.MUSTER_COLUMNS:
+            muster.add_column(label, key=key)
+        self.query_one("#dash_top", DataTable).add_columns("#", "Student", "GPA")
+        self.query_one("#dash_gpa_changes", DataTable).add_columns("Time", "Student", "Move", "GPA")
+        add_change_callback(self.dashboard.on_change)
+        self.set_interval(0.5, self.tick)
+
+    def on_unmount(self) -> None:
+        remove_change_callback(self.dashboard.on_change)
+
+    def tick(self) -> None:
+        # Events keep queueing while hidden; they are applied when shown again
+        if self.busy or not self.display:
+            return
+        poll_seconds = float(os.getenv("DASHBOARD_POLL_SECONDS", "2"))
+        if self.loaded and not self.dashboard.has_pending() and time.monotonic() - self.last_poll < poll_seconds:
+            return
+        self.busy = True
+        self.run_worker(self.refresh_data, thread=True, group="dashboard")
+
+    def refresh_data(self) -> None:
+        """Worker thread: query, then hand the changes to the UI thread."""
+        changes = None
+        try:
+            if not self.loaded:
+                if self.dashboard.load():
+                    changes = {'reload': True}
+            else:
+                changes = self.dashboard.poll(cache_info()['listener_connected'])
+        finally:
+            self.app.call_from_thread(self.apply_changes, changes)
+
+    def apply_changes(self, changes) -> None:
+        self.busy = False
+        self.last_poll = time.monotonic()
+        if changes is None:
+            self.update_summary()
+            return
+        dash = self.dashboard
+        muster = self.query_one("#dash_muster", DataTable)
+        if changes['reload']:
+            self.loaded = True
+            muster.clear()
+            for course_id, row in dash.courses.items():
+                muster.add_row(*self.muster_cells(row), key=str(course_id))
+            self.show_top()
+        else:
+            for course_id in changes['removed']:
+                muster.remove_row(str(course_id))
+            for course_id in changes['courses']:
+                cells = self.muster_cells(dash.courses[course_id])
+                if str(course_id) in muster.rows:
+                    for (_, key), value in zip(self.MUSTER_COLUMNS, cells):
+                        muster.update_cell(str(course_id), key, value)
+                else:
+                    muster.add_row(*cells, key=str(course_id))
+            if changes['top']:
+                self.show_top()
+        self.update_summary()
+
+    def muster_cells(self, row):
+        pct = completion_pct(row['recorded'], row['enrolled'])
+        return (row['course_code'], row['name'], f"{row['recorded']}/{row['enrolled']}",
+                "-" if pct is None else f"{pct:.0f}%", row['present'], row['late'],
+                row['absent'], row['awol'], row['excused'])
+
+    def show_top(self):
+        top = self.query_one("#dash_top", DataTable)
+        top.clear()
+        for rank, entry in enumerate(self.dashboard.top, start=1):
+            top.add_row(rank, entry['name'], f"{entry['gpa']:.2f}")
+        moves = self.query_one("#dash_gpa_changes", DataTable)
+        moves.clear()
+        for stamp, name, move, gpa in self.dashboard.gpa_changes:
+            moves.add_row(stamp, name, move, f"{gpa:.2f}")
+
+    def update_summary(self):
+        dash = self.dashboard
+        totals = dash.totals
+        pct = completion_pct(totals['recorded'], totals['enrolled'])
+        risk = ", ".join(f"{level} {dash.risk_counts[level]}" for level in AT_RISK_LEVELS)
+        live = "live" if cache_info()['listener_connected'] else "polling"
+        text = (f"Muster {dash.day or '-'}: {totals['recorded']}/{totals['enrolled']} "
+                f"({'-' if pct is None else f'{pct:.1f}%'}), {totals['complete']}/{len(dash.courses)} courses complete"
+                f"  |  AWOL: {totals['awol']}  |  At risk: {dash.at_risk()} ({risk})  |  Updates: {live}")
+        if dash.last_error:
+            text += f"  |  {dash.last_error}"
+        self.query_one("#dash_summary", Static).update(text)
+
 class EDATuiApp(App):
     CSS_PATH = "tui.css"
     BINDINGS = [("d", "toggle_dark", "Toggle Dark Mode"), ("q", "quit", "Quit")]
@@ -466,6 +591,7 @@ class EDATuiApp(App):
             Sidebar(id="sidebar"),
             ContentSwitcher(
                 HomeView(id="view_home"),
+                DashboardView(id="view_dashboard"),
                 StudentsView(id="view_students"),
                 AcademicsView(id="view_academics"),
                 ReportsView(id="view_reports"),
@@ -475,6 +601,10 @@ class EDATuiApp(App):
         )
         yield Footer()
 
+    def on_mount(self) -> None:
+        # Feeds the dashboard and evicts cached lookups on writes from other sessions
+        start_change_listener()
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         button_id = event.button.id
         switcher = self.query_one("#main_content", ContentSwitcher)
@@ -486,6 +616,8 @@ class EDATuiApp(App):
 
         if button_id == "btn_home":
             switcher.current = "view_home"
+        elif button_id == "btn_dashboard":
+            switcher.current = "view_dashboard"
         elif button_id == "btn_students":
             switcher.current = "view_students"
         elif button_id == "btn_academics":
@@ -0,0 +1,187 @@
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch, MagicMock
+import numpy as np
+import pandas as pd
+from src.analytics_snapshot import AnalyticsSnapshot, TABLES, COUNTER_TABLES
+
+
+def frame(table, rows):
+    spec = TABLES.get(table) or COUNTER_TABLES[table]
+    df = pd.DataFrame(rows, columns=spec['columns'])
+    return df.set_index(spec['key'], drop=False)
+
+
+class TestAnalyticsSnapshot(unittest.TestCase):
+    def setUp(self):
+        today = pd.Timestamp(date.today())
+        self.snap = AnalyticsSnapshot()
+        self.snap.loaded_at = datetime(2024, 1, 2, 9, 0)
+        self.snap.frames = {
+            'companies': frame('companies', [(1, 'Alpha', 'Cpt. A'), (2, 'Bravo', 'Cpt. B')]),
+            'students': frame('students', [
+                (1, 1.0, 'SN-1', 'Ann', 'Lee', 'Active'),
+                (2, 1.0, 'SN-2', 'Bob', 'Ray', 'Active'),
+                (3, 2.0, 'SN-3', 'Cal', 'Fox', 'Active'),
+                (4, np.nan, 'SN-4', 'Dee', 'Kim', 'Active'),
+            ]),
+            'courses': frame('courses', [(10, 'TAC-101', 'Tactics', 'Tactics'),
+                                         (11, 'TAC-102', 'Tactics II', 'Tactics'),
+                                         (20, 'LOG-201', 'Logistics', 'Logistics')]),
+            'enrollments': frame('enrollments', [
+                (1, 1, 10, 'Completed', 95.0, 0.0, 0.0),
+                (2, 2, 10, 'Failed', 55.0, 0.0, 0.0),
+                (3, 3, 11, 'In Progress', np.nan, 42.5, 0.5),   # running 85
+                (4, 3, 20, 'In Progress', np.nan, 0.0, 0.0),    # no grades yet
+            ]),
+            'performance_summary': frame('performance_summary', [
+                (1, 1, 3.5, 'Good Standing'), (2, 2, 1.5, 'Probation'), (3, 3, 3.0, 'Good Standing'),
+                (4, 4, 2.0, 'Good Standing'),
+            ]),
+            # Student 1: present yesterday. Student 2: present 31 and 30 days ago, absent yesterday
+            'attendance_counter_totals': frame('attendance_counter_totals', [
+                (1, 10, 1, 1, 0, 0, today - timedelta(days=1)),
+                (2, 10, 2, 3, 0, 0, today - timedelta(days=1)),
+            ]),
+            'attendance_rolling_counters': frame('attendance_rolling_counters', [
+                (1, 10, today - timedelta(days=1), 1, 1),
+                (2, 10, today - timedelta(days=31), 1, 1),
+                (2, 10, today - timedelta(days=30), 2, 2),
+                (2, 10, today - timedelta(days=1), 2, 3),
+            ]),
+            'attrition_risk': frame('attrition_risk', [
+                (1, 1, today, 10.0, 'Low', 'No significant factors'),
+                (2, 2, today, 80.0, 'Critical', 'Low GPA'),
+                (3, 2, today - timedelta(days=1), 60.0, 'High', 'Low GPA'),
+            ]),
+        }
+
+    def test_company_readiness(self):
+        rows = self.snap.company_readiness()
+        self.assertEqual([r['company_name'] for r in rows], ['Bravo', 'Alpha'])
+        alpha = rows[1]
+        self.assertAlmostEqual(alpha['avg_gpa'], 2.5)
+        self.assertEqual(alpha['good_count'], 1)
+        self.assertEqual(alpha['total_students'], 2)
+
+    def test_course_grit(self):
+        rows = {r['department']: r for r in self.snap.course_grit()}
+        tac = rows['TAC']
+        self.assertEqual((tac['a_bucket'], tac['b_bucket'], tac['c_bucket'], tac['d_f_bucket']), (1, 1, 0, 1))
+        self.assertEqual(tac['enrollments'], 3)
+        self.assertEqual(tac['failed_count'], 1)
+        self.assertEqual(rows['LOG']['enrollments'], 1)
+        self.assertEqual(rows['LOG']['a_bucket'], 0)
+        self.assertEqual(tac['data_as_of'], self.snap.loaded_at)
+
+    def test_attrition_watchlist_window(self):
+        # All history: student 2 is at 2/3 present; last 14 days: 0/1
+        rows = self.snap.attrition_watchlist()
+        # Only the latest assessment per student
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['student_id'], 2)
+        self.assertEqual(rows[0]['risk_level'], 'Critical')
+        self.assertEqual(rows[0]['low_att_course_id'], 10)
+        self.assertEqual(rows[0]['course_code'], 'TAC-101')
+        self.assertAlmostEqual(rows[0]['attendance_rate'], 66.67)
+        self.assertIsNone(rows[1]['low_att_course_id'])
+
+        rows = self.snap.attrition_watchlist(window_days=14)
+        self.assertAlmostEqual(rows[0]['attendance_rate'], 0.0)
+
+    def test_low_attendance_counts_archived_months(self):
+        # Student 1 also has 10 archived sessions (4 present): 5/11 overall, 1/1 in the window
+        today = pd.Timestamp(date.today())
+        self.snap.frames['attendance_counter_totals'] = frame('attendance_counter_totals', [
+            (1, 10, 5, 11, 4, 10, today - timedelta(days=1))])
+        self.snap.frames['attendance_rolling_counters'] = frame('attendance_rolling_counters', [
+            (1, 10, today - timedelta(days=1), 5, 11)])
+        low = self.snap.low_attendance()
+        self.assertEqual(low[['present_sessions', 'total_sessions']].values.tolist(), [[5, 11]])
+        self.assertAlmostEqual(low['attendance_rate'].iloc[0], 45.45)
+        self.assertTrue(self.snap.low_attendance(window_days=14).empty)
+
+    def test_not_loaded(self):
+        with self.assertRaises(RuntimeError):
+            AnalyticsSnapshot().course_grit()
+
+
+class TestSnapshotRefresh(unittest.TestCase):
+    def setUp(self):
+        self.snap = AnalyticsSnapshot()
+        self.current = frame('enrollments', [(1, 1, 10, 'In Progress', np.nan, 0.0, 0.0),
+                                             (2, 2, 10, 'In Progress', np.nan, 0.0, 0.0)])
+        self.snap.frames = {'enrollments': self.current}
+        self.snap._txid_snapshot = '100:100:'
+        self.snap.loaded_at = datetime(2024, 1, 2, 9, 0)
+
+    def refresh_table(self, changes, delta=None):
+        with patch.object(self.snap, '_read', return_value=delta) as mock_read:
+            result = self.snap._refresh_table(MagicMock(), 'enrollments', TABLES['enrollments'], changes)
+        return result, mock_read
+
+    def test_unchanged_table_is_not_read(self):
+        result, mock_read = self.refresh_table({'students': {4}})
+        mock_read.assert_not_called()
+        self.assertIs(result, self.current)
+
+    def test_changed_keys_are_reread(self):
+        # Row 2 was updated, row 3 inserted (whatever order their ids committed in)
+        delta = frame('enrollments', [(2, 2, 10, 'Failed', 55.0, 0.0, 0.0),
+                                      (3, 1, 11, 'In Progress', np.nan, 0.0, 0.0)])
+        result, mock_read = self.refresh_table({'enrollments': {2, 3}}, delta)
+        self.assertEqual(mock_read.call_args[0][3:], ("enrollment_id = ANY(%s)", ([2, 3],)))
+        self.assertEqual(list(result.index), [1, 2, 3])
+        self.assertEqual(result.loc[2, 'status'], 'Failed')
+        self.assertEqual(result['status'].dtype, 'category')
+
+    def test_deleted_keys_are_dropped(self):
+        result, _ = self.refresh_table({'enrollments': {2}}, frame('enrollments', []))
+        self.assertEqual(list(result.index), [1])
+
+    def test_truncate_or_large_statement_reloads_table(self):
+        _, mock_read = self.refresh_table({'enrollments': None}, self.current)
+        self.assertEqual(len(mock_read.call_args[0]), 3)  # no WHERE clause
+
+    def test_attendance_changes_reread_counters_of_changed_pairs(self):
+        day = pd.Timestamp('2024-01-01')
+        self.snap.frames['attendance_counter_totals'] = frame('attendance_counter_totals', [
+            (1, 10, 1, 1, 0, 0, day), (2, 10, 1, 2, 0, 0, day), (3, 10, 1, 1, 0, 0, day)])
+        rolling = frame('attendance_rolling_counters', [
+            (1, 10, day, 1, 1), (2, 10, day, 1, 1), (2, 10, day + timedelta(days=1), 1, 2), (3, 10, day, 1, 1)])
+        self.snap.frames['attendance_rolling_counters'] = rolling
+        # Student 2's second session was deleted; student 3's row was updated in place
+        new_totals = frame('attendance_counter_totals', [
+            (1, 10, 1, 1, 0, 0, day), (2, 10, 1, 1, 0, 0, day), (3, 10, 1, 1, 0, 0, day)])
+        delta = frame('attendance_rolling_counters', [(2, 10, day, 1, 1), (3, 10, day, 1, 1)])
+        cur = MagicMock()
+        cur.fetchall.return_value = [{'student_id': 3, 'course_id': 10}]
+        with patch.object(self.snap, '_read', side_effect=[new_totals, delta]) as mock_read:
+            frames = self.snap._refresh_counters(cur, {'attendance': {7, 9}})
+        self.assertEqual(cur.execute.call_args[0][1], ([7, 9],))
+        self.assertEqual(mock_read.call_args[0][4], ([2, 3], [10, 10]))
+        self.assertIs(frames['attendance_counter_totals'], new_totals)
+        self.assertEqual(frames['attendance_rolling_counters'][['student_id', 'cum_total']].values.tolist(),
+                         [[1, 1], [2, 1], [3, 1]])
+
+        # No attendance changes: neither counter table is read
+        with patch.object(self.snap, '_read') as mock_read:
+            frames = self.snap._refresh_counters(MagicMock(), {'students': {4}})
+        mock_read.assert_not_called()
+
+    def test_changes_since_merges_log_rows(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = [{'table_name': 'attendance', 'keys': [3, 2]},
+                                     {'table_name': 'attendance', 'keys': [4]},
+                                     {'table_name': 'students', 'keys': [7]},
+                                     {'table_name': 'students', 'keys': None}]
+        changes = self.snap._changes_since(cur, datetime(2024, 1, 2, 9, 5))
+        self.assertEqual(changes, {'attendance': {2, 3, 4}, 'students': None})
+        self.assertEqual(cur.execute.call_args[0][1]['since'], '100:100:')
+        self.assertIn('attendance', cur.execute.call_args[0][1]['tables'])
+
+        # Older than the log keeps: reload everything
+        self.assertIsNone(self.snap._changes_since(cur, datetime(2024, 1, 4, 9, 0)))
+
+if __name__ == '__main__':
+    unittest.main()
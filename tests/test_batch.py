@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src import batch
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(name, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return name
+
+    @patch('src.controllers.record_grade')
+    def test_import_grades(self, mock_record):
+        mock_record.side_effect = lambda email, *args: email != 'gone@eda.mil'
+        path = self.write('grades.csv', "email,course_code,assessment_type,score,weight,remarks\n"
+                                        "A.Smith@eda.mil,TAC-101,Quiz,88.5,0.1,retake\n"
+                                        "gone@eda.mil,TAC-101,Quiz,70,0.1,\n"
+                                        "b@eda.mil,TAC-101,Quiz,101,0.1,\n")
+        with patch('builtins.print'):
+            code = batch.main(['import-grades', path, '--workers', '2'])
+        self.assertEqual(code, 1)
+        self.assertEqual(mock_record.call_count, 2)
+        mock_record.assert_any_call('a.smith@eda.mil', 'TAC-101', 'Quiz', 88.5, 0.1, 'retake')
+
+    @patch('src.controllers.execute_proc', return_value=None)
+    @patch('src.controllers.get_enrollment_id', return_value=7)
+    def test_import_grades_database_error_is_not_imported(self, mock_enrollment, mock_proc):
+        # execute_proc prints the error and returns None instead of raising
+        path = self.write('grades.csv', "email,course_code,assessment_type,score,weight,remarks\n"
+                                        "a@eda.mil,TAC-101,Quiz,88,0.1,\n")
+        with patch('builtins.print') as mock_print:
+            self.assertEqual(batch.main(['import-grades', path]), 1)
+        mock_proc.assert_called_once_with('sp_record_grade', (7, 'Quiz', 88.0, 0.1, 'now', None), fetch_result=True)
+        printed = [c[0][0] for c in mock_print.call_args_list]
+        self.assertTrue(any(p.startswith("Imported 0 grade(s)") for p in printed))
+
+    def test_import_grades_weight_range(self):
+        rows, errors = batch.read_grade_rows(self.write('w.csv', "email,course_code,assessment_type,score,weight\n"
+                                                                 "a@eda.mil,TAC-101,Quiz,80,0\n"
+                                                                 "a@eda.mil,TAC-101,Quiz,80,1.5\n"
+                                                                 "a@eda.mil,TAC-101,Quiz,80,1\n"))
+        self.assertEqual([r[0] for r in rows], [4])
+        self.assertEqual([(line, msg.split(" '")[0]) for line, msg in errors],
+                         [(2, 'weight out of range'), (3, 'weight out of range')])
+
+    def test_import_grades_missing_columns(self):
+        rows, errors = batch.read_grade_rows(self.write('bad.csv', "email,score\nx@y.z,5\n"))
+        self.assertEqual(rows, [])
+        self.assertIn('course_code', errors[0][1])
+
+    @patch('src.reports.generate_course_grit_report')
+    def test_report_succeeds_only_when_file_written(self, mock_report):
+        with patch('builtins.print'):
+            self.assertEqual(batch.main(['report', 'grit']), 1)
+
+            def write_file(fmt, snapshot=None):
+                os.makedirs('reports', exist_ok=True)
+                self.write(os.path.join('reports', f'course_grit.{fmt}'), 'x')
+            mock_report.side_effect = write_file
+            self.assertEqual(batch.main(['report', 'grit', '--format', 'pdf']), 0)
+        mock_report.assert_called_with('pdf')
+
+    def test_usage_errors(self):
+        with patch('builtins.print'), patch('sys.stderr'):
+            self.assertEqual(batch.main(['report', 'transcript']), 2)
+            self.assertEqual(batch.main(['report', 'ledger', '--format', 'csv']), 2)
+            self.assertEqual(batch.main(['no-such-command']), 2)
+            self.assertEqual(batch.main(['run', 'refresh-views'], allow_run=False), 2)
+
+    @patch('src.batch.get_db_connection')
+    def test_refresh_performance_reports_failure(self, mock_conn):
+        cur = mock_conn.return_value.cursor.return_value.__enter__.return_value
+        with patch('builtins.print'):
+            self.assertEqual(batch.main(['refresh-performance']), 0)
+            cur.execute.assert_called_with("SELECT sp_refresh_all_performance()")
+            cur.execute.side_effect = Exception("lock timeout")
+            self.assertEqual(batch.main(['refresh-performance']), 1)
+        mock_conn.return_value.rollback.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
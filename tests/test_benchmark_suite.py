@@ -0,0 +1,69 @@
+import os
+import unittest
+from unittest.mock import patch
+from scripts.benchmark_suite import summarize, compare_to_baseline, run_operations
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_summarize_percentiles(self):
+        r = summarize([float(x) for x in range(1, 101)])
+        self.assertEqual(r['runs'], 100)
+        self.assertEqual(r['min_ms'], 1.0)
+        self.assertEqual(r['max_ms'], 100.0)
+        self.assertAlmostEqual(r['p50_ms'], 50.5)
+        self.assertAlmostEqual(r['p95_ms'], 95.05)
+        self.assertEqual(summarize([4.0])['p99_ms'], 4.0)
+
+    def test_compare_to_baseline(self):
+        baseline = {'results': {
+            'view:vw_transcript': {'p50_ms': 10.0, 'p95_ms': 20.0},
+            'student_search': {'p50_ms': 0.5, 'p95_ms': 1.0},
+        }}
+        results = {
+            'view:vw_transcript': {'p50_ms': 14.0, 'p95_ms': 21.0},   # p50 +40%
+            'student_search': {'p50_ms': 1.0, 'p95_ms': 2.0},         # +100% but under the ms floor
+            'record_grade': {'p50_ms': 5.0, 'p95_ms': 9.0},           # not in baseline
+        }
+        regressions = compare_to_baseline(results, baseline, tolerance_pct=25, floor_ms=2.0)
+        self.assertEqual([(r['operation'], r['metric']) for r in regressions], [('view:vw_transcript', 'p50_ms')])
+        self.assertEqual(regressions[0]['change_pct'], 40.0)
+
+    def test_compare_skips_operations_that_always_failed(self):
+        baseline = {'results': {'record_grade': {'runs': 0, 'failures': 3},
+                                'student_search': {'p50_ms': 1.0, 'p95_ms': 2.0}}}
+        results = {'record_grade': {'p50_ms': 50.0, 'p95_ms': 90.0},
+                   'student_search': {'runs': 0, 'failures': 20}}
+        self.assertEqual(compare_to_baseline(results, baseline, tolerance_pct=25, floor_ms=2.0), [])
+
+    @patch('scripts.benchmark_suite.instrumentation.get_stats')
+    def test_failed_runs_are_counted_not_timed(self, mock_stats):
+        errors = {'count': 0}
+        mock_stats.side_effect = lambda: {'q': {'errors': {'UniqueViolation': errors['count']}}}
+
+        def enroll(i):
+            print("Error: already enrolled")
+            return False
+
+        def database_error(i):
+            errors['count'] += 1
+            return None
+
+        def write_report(i):
+            os.makedirs('reports', exist_ok=True)
+            if i % 2:
+                with open(os.path.join('reports', 'out.csv'), 'w') as f:
+                    f.write('x')
+
+        ops = {'enroll_student': enroll, 'view:vw_x': database_error, 'search': lambda i: True,
+               'report:grit': write_report}
+        with patch('sys.stderr'):
+            results = run_operations(ops, repeats=4, warmup=0)
+        self.assertEqual(results['enroll_student'], {'runs': 0, 'failures': 4})
+        self.assertEqual(results['view:vw_x'], {'runs': 0, 'failures': 4})
+        self.assertEqual((results['search']['runs'], results['search']['failures']), (4, 0))
+        # Only odd runs wrote a file
+        self.assertEqual((results['report:grit']['runs'], results['report:grit']['failures']), (2, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
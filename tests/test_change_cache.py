@@ -0,0 +1,96 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+from src import database
+
+EMAIL_QUERY = "SELECT student_id FROM students WHERE email = %s"
+
+
+class TestChangeCache(unittest.TestCase):
+    def setUp(self):
+        database.invalidate_cache()
+        self.connected = patch.dict(database._listener, {'connected': True})
+        self.connected.start()
+
+    def tearDown(self):
+        self.connected.stop()
+        database.invalidate_cache()
+        database._change_callbacks.clear()
+
+    @patch('src.database.execute_query')
+    def test_second_call_is_served_from_cache(self, mock_exec):
+        mock_exec.return_value = [{'student_id': 7}]
+        first = database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',), key_column='student_id')
+        second = database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',), key_column='student_id')
+        self.assertEqual(first, second)
+        self.assertEqual(mock_exec.call_count, 1)
+
+        database.cached_query(EMAIL_QUERY, ('b@eda.mil',), tables=('students',), key_column='student_id')
+        self.assertEqual(mock_exec.call_count, 2)
+
+    @patch('src.database.execute_query')
+    def test_failed_query_is_not_cached(self, mock_exec):
+        mock_exec.return_value = None
+        database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',))
+        database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',))
+        self.assertEqual(mock_exec.call_count, 2)
+
+    @patch('src.database.execute_query')
+    def test_keyed_invalidation(self, mock_exec):
+        mock_exec.side_effect = lambda q, p, fetch: [{'student_id': 7}] if p == ('a@eda.mil',) else []
+        for email in ('a@eda.mil', 'new@eda.mil'):
+            database.cached_query(EMAIL_QUERY, (email,), tables=('students',), key_column='student_id')
+        self.assertEqual(database.cache_info()['entries'], 2)
+
+        # Another student changed: the cached hit survives, the cached miss does not
+        self.assertEqual(database.invalidate_cache('students', {'student_id': [99]}), 1)
+        self.assertEqual(database.cache_info()['entries'], 1)
+        # Unrelated table
+        self.assertEqual(database.invalidate_cache('grades', {'enrollment_id': [7]}), 0)
+        # Same student, or keys unknown (TRUNCATE / over the cap)
+        self.assertEqual(database.invalidate_cache('students', {'student_id': [7]}), 1)
+        database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',), key_column='student_id')
+        self.assertEqual(database.invalidate_cache('students', {'student_id': None}), 1)
+
+    @patch('src.database.execute_query')
+    def test_unkeyed_entries_evicted_by_any_change(self, mock_exec):
+        mock_exec.return_value = [{'course_id': 1}, {'course_id': 2}]
+        database.cached_query("SELECT course_id FROM courses", tables=('courses',))
+        self.assertEqual(database.invalidate_cache('courses', {'course_id': [3]}), 1)
+
+    @patch('src.database.execute_query')
+    def test_change_during_query_is_not_cached(self, mock_exec):
+        def racing_query(query, params, fetch):
+            database.invalidate_cache('students', {'student_id': [7]})
+            return [{'student_id': 7}]
+        mock_exec.side_effect = racing_query
+        rows = database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',), key_column='student_id')
+        self.assertEqual(rows, [{'student_id': 7}])
+        self.assertEqual(database.cache_info()['entries'], 0)
+
+    @patch('src.database.execute_query')
+    def test_short_ttl_without_listener(self, mock_exec):
+        mock_exec.return_value = [{'student_id': 7}]
+        with patch.dict(database._listener, {'connected': False}), \
+                patch.dict('os.environ', {'CACHE_FALLBACK_TTL_SECONDS': '0'}):
+            database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',))
+            database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',))
+        self.assertEqual(mock_exec.call_count, 2)
+
+    @patch('src.database.execute_query')
+    def test_notification_evicts_and_calls_back(self, mock_exec):
+        mock_exec.return_value = [{'student_id': 7}]
+        database.cached_query(EMAIL_QUERY, ('a@eda.mil',), tables=('students',), key_column='student_id')
+        callback = MagicMock()
+        database.add_change_callback(callback)
+
+        database.handle_notification(json.dumps({'table': 'students', 'op': 'UPDATE', 'keys': {'student_id': [7]}}))
+        callback.assert_called_once_with('students', 'UPDATE', {'student_id': [7]})
+        self.assertEqual(database.cache_info()['entries'], 0)
+
+        database.handle_notification("not json")
+        self.assertEqual(callback.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
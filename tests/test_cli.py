@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from src.utils import validate_email, validate_score, validate_date
-from src.controllers import add_student, enroll_student
+from src.controllers import add_student, enroll_student, allocate_service_numbers, update_grade, delete_grade, get_top_students
 import os
 
 class TestUtils(unittest.TestCase):
@@ -35,6 +35,14 @@ class TestControllers(unittest.TestCase):
         result = add_student("Test", "Cadet", "test@eda.mil", "2000-01-01")
         self.assertTrue(result)
 
+    @patch('src.controllers.execute_query')
+    def test_allocate_service_numbers(self, mock_query):
+        mock_query.return_value = [{'service_number': 'SN-1000000'}, {'service_number': 'SN-1000001'}]
+
+        result = allocate_service_numbers(2)
+        self.assertEqual(result, ['SN-1000000', 'SN-1000001'])
+        self.assertEqual(mock_query.call_args[0][1], (2,))
+
     @patch('src.controllers.execute_proc')
     @patch('src.controllers.get_student_id_by_email')
     @patch('src.controllers.get_course_id_by_code')
@@ -52,5 +60,37 @@ class TestControllers(unittest.TestCase):
         result = enroll_student("ghost@eda.mil", "TAC-101", "2023-01-01")
         self.assertFalse(result)
 
+    @patch('src.controllers.execute_proc')
+    def test_update_grade_is_one_call(self, mock_proc):
+        mock_proc.return_value = 42
+
+        result = update_grade(7, score=88)
+        self.assertTrue(result)
+        mock_proc.assert_called_once_with('sp_update_grade', (7, 88, None, None), fetch_result=True)
+
+    @patch('src.controllers.execute_proc')
+    def test_update_grade_missing_or_failed(self, mock_proc):
+        mock_proc.return_value = None
+        self.assertFalse(update_grade(7, remarks="Re-marked"))
+        self.assertFalse(update_grade(7))
+        self.assertEqual(mock_proc.call_count, 1)
+
+    @patch('src.controllers.execute_proc')
+    def test_delete_grade_is_one_call(self, mock_proc):
+        mock_proc.return_value = 42
+
+        result = delete_grade(7)
+        self.assertTrue(result)
+        mock_proc.assert_called_once_with('sp_delete_grade', (7,), fetch_result=True)
+
+    @patch('src.controllers.execute_query')
+    def test_get_top_students_passes_filters(self, mock_query):
+        mock_query.return_value = [{'gpa_rank': 1, 'student_id': 5}]
+
+        result = get_top_students(50, company_id=3)
+        self.assertEqual(result, [{'gpa_rank': 1, 'student_id': 5}])
+        self.assertIn("fn_top_students", mock_query.call_args[0][0])
+        self.assertEqual(mock_query.call_args[0][1], (50, 3, None))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import subprocess
+import importlib.util
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Cumulative import budget for the entry modules (ms); override on slow machines
+CLI_BUDGET_MS = float(os.getenv("CLI_IMPORT_BUDGET_MS", "400"))
+TUI_BUDGET_MS = float(os.getenv("TUI_IMPORT_BUDGET_MS", "800"))
+
+# Only needed once a report, the analytics snapshot or a batch command is requested
+DEFERRED = ('reportlab', 'pandas', 'numpy', 'src.reports', 'src.analytics_snapshot', 'src.risk_scoring',
+            'src.batch', 'concurrent.futures.process')
+
+
+def import_profile(module):
+    """Run `python -X importtime -c "import <module>"` cold; return {module: cumulative_ms}."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr[-2000:])
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative) / 1000.0
+    return profile
+
+
+class TestImportTime(unittest.TestCase):
+    def assert_cold_start(self, module, budget_ms):
+        profile = import_profile(module)
+        loaded = sorted(name for name in profile if name.split('.')[0] in DEFERRED or name in DEFERRED)
+        self.assertEqual(loaded, [], f"{module} eagerly imports {loaded}")
+        self.assertLess(profile[module], budget_ms, f"{module} import took {profile[module]:.0f} ms")
+
+    def test_main_cold_start(self):
+        # main.py is the entry point; batch commands import their modules on demand
+        self.assert_cold_start('main', CLI_BUDGET_MS)
+
+    def test_cli_cold_start(self):
+        self.assert_cold_start('src.cli', CLI_BUDGET_MS)
+
+    @unittest.skipUnless(importlib.util.find_spec('textual'), "textual not installed")
+    def test_tui_cold_start(self):
+        self.assert_cold_start('src.tui_app', TUI_BUDGET_MS)
+
+    def test_env_not_read_at_import(self):
+        result = subprocess.run([sys.executable, '-c', 'import src.database as d; print(d._db_config)'],
+                                cwd=ROOT, capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), 'None')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from src import instrumentation
+from src.database import execute_query
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset_stats()
+
+    def test_fingerprint_ignores_values(self):
+        a = instrumentation.fingerprint("SELECT * FROM students WHERE student_id = 5 AND email = 'a@b.c'")
+        b = instrumentation.fingerprint("select  *  FROM students\n WHERE student_id = %s AND email = %s;")
+        self.assertEqual(a[1], "SELECT * FROM students WHERE student_id = ? AND email = ?")
+        self.assertNotEqual(a[0], b[0])  # keyword case is preserved
+        c = instrumentation.fingerprint("SELECT * FROM students WHERE student_id = 7 AND email = 'x@y.z'")
+        self.assertEqual(a[0], c[0])
+        self.assertIn("IN (?)", instrumentation.fingerprint("SELECT 1 FROM t WHERE id IN (1, 2, 3)")[1])
+        self.assertIn("attendance_p202401", instrumentation.fingerprint("SELECT * FROM attendance_p202401")[1])
+
+    def test_record_and_top_statements(self):
+        with patch.dict(os.environ, {"SLOW_QUERY_MS": "100000"}):
+            instrumentation.record("SELECT * FROM courses", 3.0, connect_ms=1.0, rows=1, caller="a.b")
+            instrumentation.record("SELECT * FROM students", 9.0, rows=5, caller="a.c")
+            instrumentation.record("SELECT * FROM courses", 7.0, rows=1, caller="a.b")
+        top = instrumentation.top_statements(1)
+        self.assertEqual(len(top), 1)
+        self.assertEqual(top[0]['calls'], 2)
+        self.assertEqual(top[0]['total_ms'], 10.0)
+        self.assertEqual(top[0]['callers'], {'a.b': 2})
+        self.assertEqual(top[0]['p95_ms'], 10)
+
+    def test_slow_query_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "slow.log")
+            with patch.dict(os.environ, {"SLOW_QUERY_MS": "50", "SLOW_QUERY_LOG": path}):
+                instrumentation.record("SELECT * FROM grades WHERE enrollment_id = %s", 75.0, params=(9,))
+                instrumentation.record("SELECT 1", 5.0)
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['statement'], "SELECT * FROM grades WHERE enrollment_id = ?")
+        self.assertEqual(lines[0]['params'], ['9'])
+
+    @patch('src.database.get_db_connection')
+    def test_execute_query_is_recorded(self, mock_conn):
+        cur = mock_conn.return_value.cursor.return_value.__enter__.return_value
+        cur.fetchall.return_value = [{'id': 1}, {'id': 2}]
+        execute_query("SELECT id FROM courses WHERE course_id = %s", (1,), fetch=True)
+
+        cur.execute.side_effect = Exception("boom")
+        execute_query("SELECT id FROM courses WHERE course_id = %s", (2,), fetch=True)
+
+        (entry,) = instrumentation.get_stats().values()
+        self.assertEqual(entry['calls'], 2)
+        self.assertEqual(entry['rows'], 2)
+        self.assertEqual(entry['errors'], {'Exception': 1})
+        self.assertIn('test_instrumentation.test_execute_query_is_recorded', list(entry['callers'])[0])
+
+
+# Trimmed EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) output
+SAMPLE_PLAN = {
+    'Plan': {
+        'Node Type': 'Sort', 'Sort Space Type': 'Disk', 'Sort Space Used': 5120, 'Sort Method': 'external merge',
+        'Plan Rows': 50, 'Actual Rows': 40000, 'Actual Loops': 1, 'Total Cost': 900.0,
+        'Plans': [{
+            'Node Type': 'Seq Scan', 'Relation Name': 'attendance', 'Filter': "(status = 'AWOL')",
+            'Plan Rows': 50, 'Actual Rows': 40000, 'Actual Loops': 1, 'Rows Removed by Filter': 60000,
+        }, {
+            'Node Type': 'Seq Scan', 'Relation Name': 'companies', 'Plan Rows': 5, 'Actual Rows': 5, 'Actual Loops': 1,
+        }],
+    },
+    'Planning Time': 0.2,
+    'Execution Time': 120.5,
+}
+
+
+class TestExplainCapture(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset_stats()
+
+    def test_summarize_plan(self):
+        summary = instrumentation.summarize_plan(SAMPLE_PLAN)
+        self.assertEqual(summary['execution_ms'], 120.5)
+        self.assertEqual([s['relation'] for s in summary['seq_scans']], ['attendance'])
+        self.assertEqual(summary['seq_scans'][0]['rows_read'], 100000)
+        self.assertEqual(len(summary['misestimates']), 2)
+        self.assertEqual(summary['spills'][0]['node'], 'Sort')
+        self.assertEqual(instrumentation.plan_flags(summary), "seq:attendance, misest x2, spill:Sort")
+
+    def test_read_only_detection(self):
+        self.assertTrue(instrumentation.is_read_only("SELECT * FROM vw_transcript WHERE student_id = %s"))
+        self.assertTrue(instrumentation.is_read_only("-- note\nWITH x AS (SELECT 1) SELECT * FROM x"))
+        self.assertTrue(instrumentation.is_read_only("SELECT last_updated, updated_at FROM students"))
+        self.assertFalse(instrumentation.is_read_only("UPDATE students SET rank = %s"))
+        self.assertFalse(instrumentation.is_read_only("WITH d AS (DELETE FROM grades RETURNING *) SELECT * FROM d"))
+        self.assertFalse(instrumentation.is_read_only("SELECT * FROM students FOR UPDATE"))
+
+    @patch.dict(os.environ, {"DB_EXPLAIN": "1"})
+    def test_plan_captured_once_per_fingerprint(self):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchone.return_value = {'QUERY PLAN': [SAMPLE_PLAN]}
+
+        instrumentation.maybe_explain(conn, "SELECT * FROM attendance WHERE status = %s", ('AWOL',))
+        instrumentation.maybe_explain(conn, "SELECT * FROM attendance WHERE status = %s", ('Absent',))
+        instrumentation.maybe_explain(conn, "DELETE FROM attendance WHERE status = %s", ('AWOL',))
+
+        explains = [c for c in cur.execute.call_args_list if c[0][0].startswith("EXPLAIN")]
+        self.assertEqual(len(explains), 1)
+        self.assertEqual(explains[0][0][1], ('AWOL',))
+        conn.rollback.assert_called()
+
+        instrumentation.record("SELECT * FROM attendance WHERE status = %s", 5.0)
+        (entry,) = instrumentation.get_stats().values()
+        self.assertEqual(entry['explain']['summary']['seq_scans'][0]['relation'], 'attendance')
+
+    def test_no_capture_when_disabled(self):
+        conn = MagicMock()
+        with patch.dict(os.environ, {"DB_EXPLAIN": "0"}):
+            self.assertIsNone(instrumentation.maybe_explain(conn, "SELECT 1"))
+        conn.cursor.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
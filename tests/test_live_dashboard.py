@@ -0,0 +1,189 @@
+import asyncio
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from src import live_dashboard
+from src.live_dashboard import LiveDashboard
+
+
+def course(course_id, code, enrolled, recorded=0, awol=0):
+    return {'course_id': course_id, 'course_code': code, 'name': f"Course {code}", 'enrolled': enrolled,
+            'recorded': recorded, 'present': recorded - awol, 'late': 0, 'absent': 0, 'awol': awol, 'excused': 0}
+
+
+class FakeDatabase:
+    """Answers the dashboard's queries from in-memory rows and records what ran."""
+
+    def __init__(self):
+        self.courses = {1: course(1, 'TAC-101', 20), 2: course(2, 'WPN-202', 10, recorded=10)}
+        # Assessment order: the last row per student is its latest
+        self.risks = [{'risk_id': 1, 'student_id': 5, 'risk_level': 'High'},
+                      {'risk_id': 2, 'student_id': 6, 'risk_level': 'Low'}]
+        self.logged = []   # table_changes rows not yet seen by the dashboard
+        self.top = [{'student_id': 9, 'first_name': 'Ada', 'last_name': 'Hale', 'gpa': 3.9},
+                    {'student_id': 8, 'first_name': 'Bo', 'last_name': 'Reyes', 'gpa': 3.5}]
+        self.calls = []
+
+    def __call__(self, query, params=None, fetch=False):
+        self.calls.append((query, params))
+        if query == live_dashboard.SNAPSHOT_QUERY:
+            return [{'read_at': datetime(2026, 1, 1, 6, 0), 'txid_snapshot': '100:100:'}]
+        if query == live_dashboard.TABLE_CHANGES_QUERY:
+            logged, self.logged = self.logged, []
+            return logged
+        if query == live_dashboard.ALL_COURSES_QUERY:
+            return [self.courses[k] for k in sorted(self.courses)]
+        if query == live_dashboard.CHANGED_COURSES_QUERY:
+            return [self.courses[k] for k in params[1] if k in self.courses]
+        if query == live_dashboard.LATEST_RISK_QUERY:
+            return list({r['student_id']: r for r in self.risks}.values())
+        if query == live_dashboard.CHANGED_RISK_QUERY:
+            ids, students = params
+            students = set(students) | {r['student_id'] for r in self.risks if r['risk_id'] in ids}
+            return [r for s, r in {r['student_id']: r for r in self.risks}.items() if s in students]
+        if query == live_dashboard.TOP_GPA_QUERY:
+            return list(self.top)
+        raise AssertionError(f"unexpected query: {query}")
+
+    def write_risk(self, row):
+        self.risks.append(row)
+        self.logged.append({'table_name': 'attrition_risk', 'keys': [row['risk_id']]})
+
+    def ran(self, query):
+        return sum(1 for q, _ in self.calls if q == query)
+
+
+class TestLiveDashboard(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeDatabase()
+        patcher = patch('src.live_dashboard.execute_query', self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.dash = LiveDashboard()
+        self.assertTrue(self.dash.load())
+
+    def test_load_totals(self):
+        self.assertEqual(self.dash.totals['enrolled'], 30)
+        self.assertEqual(self.dash.totals['recorded'], 10)
+        self.assertEqual(self.dash.totals['complete'], 1)
+        self.assertEqual(self.dash.at_risk(), 1)
+        self.assertEqual([t['student_id'] for t in self.dash.top], [9, 8])
+
+    def test_attendance_event_rereads_only_that_course(self):
+        self.db.courses[1] = course(1, 'TAC-101', 20, recorded=20, awol=2)
+        self.dash.on_change('attendance', 'INSERT', {'student_id': [3], 'course_id': [1]})
+        self.assertTrue(self.dash.has_pending())
+
+        changes = self.dash.poll(listener_connected=True)
+        self.assertEqual(changes['courses'], {1})
+        changed = [params for q, params in self.db.calls if q == live_dashboard.CHANGED_COURSES_QUERY]
+        self.assertEqual(changed[0][1], [1])
+        self.assertEqual(self.db.ran(live_dashboard.ALL_COURSES_QUERY), 1)
+        self.assertEqual(self.dash.totals['recorded'], 30)
+        self.assertEqual(self.dash.totals['awol'], 2)
+        self.assertEqual(self.dash.totals['complete'], 2)
+
+    def test_deleted_course_is_removed(self):
+        del self.db.courses[2]
+        self.dash.on_change('courses', 'DELETE', {'course_id': [2]})
+        changes = self.dash.poll(listener_connected=True)
+        self.assertEqual(changes['removed'], {2})
+        self.assertEqual(self.dash.totals['enrolled'], 20)
+        self.assertEqual(self.dash.totals['complete'], 0)
+
+    def test_oversized_event_reloads(self):
+        self.dash.on_change('attendance', 'INSERT', {'student_id': None, 'course_id': None})
+        self.assertTrue(self.dash.poll(listener_connected=True)['reload'])
+        self.assertEqual(self.db.ran(live_dashboard.ALL_COURSES_QUERY), 2)
+
+    def test_without_listener_compares_every_course(self):
+        self.db.courses[1] = course(1, 'TAC-101', 20, recorded=4)
+        del self.db.courses[2]
+        changes = self.dash.poll(listener_connected=False)
+        self.assertEqual((changes['courses'], changes['removed']), ({1}, {2}))
+        self.assertEqual(self.db.ran(live_dashboard.ALL_COURSES_QUERY), 2)
+        self.assertEqual(self.dash.totals['recorded'], 4)
+        # Events were missed while disconnected: reload once on reconnect
+        self.assertTrue(self.dash.poll(listener_connected=True)['reload'])
+
+    def test_risk_and_gpa_deltas(self):
+        self.db.write_risk({'risk_id': 3, 'student_id': 6, 'risk_level': 'Critical'})
+        self.db.top.insert(1, {'student_id': 7, 'first_name': 'Cy', 'last_name': 'Ng', 'gpa': 3.7})
+
+        changes = self.dash.poll(listener_connected=True)
+        self.assertTrue(changes['risk'])
+        self.assertEqual(self.dash.at_risk(), 2)
+        self.assertTrue(changes['top'])
+        moves = {name: move for _, name, move, _ in self.dash.gpa_changes}
+        self.assertEqual(moves, {'Cy Ng': 'entered at #2', 'Bo Reyes': '#2 -> #3'})
+
+        # Re-read every poll, whenever the GPA refresh committed; unchanged means no moves
+        self.assertFalse(self.dash.poll(listener_connected=True)['top'])
+        self.assertEqual(self.db.ran(live_dashboard.TOP_GPA_QUERY), 3)
+        self.assertEqual(len(self.dash.gpa_changes), 2)
+
+    def test_risk_committed_out_of_id_order(self):
+        self.db.write_risk({'risk_id': 4, 'student_id': 7, 'risk_level': 'Low'})
+        self.dash.poll(listener_connected=True)
+        # risk_id 3 was assigned earlier but committed after 4: the log still reports it
+        self.db.write_risk({'risk_id': 3, 'student_id': 8, 'risk_level': 'Critical'})
+        self.assertTrue(self.dash.poll(listener_connected=True)['risk'])
+        self.assertEqual(self.dash.at_risk(), 2)
+
+        # Deleting a student's latest assessment falls back to nothing (or the previous one)
+        del self.db.risks[0]
+        self.db.logged.append({'table_name': 'attrition_risk', 'keys': [1]})
+        self.assertTrue(self.dash.poll(listener_connected=True)['risk'])
+        self.assertNotIn(5, self.dash.risk)
+        self.assertEqual(self.dash.at_risk(), 1)
+
+        # Keys over the cap: every latest assessment is re-read
+        self.db.logged.append({'table_name': 'attrition_risk', 'keys': None})
+        self.assertFalse(self.dash.poll(listener_connected=True)['risk'])
+        self.assertEqual(self.db.ran(live_dashboard.LATEST_RISK_QUERY), 2)
+
+    def test_failed_poll_keeps_events(self):
+        self.dash.on_change('enrollments', 'INSERT', {'student_id': [3], 'course_id': [2]})
+        with patch('src.live_dashboard.execute_query', return_value=None):
+            self.assertIsNone(self.dash.poll(listener_connected=True))
+        self.assertTrue(self.dash.has_pending())
+
+
+class TestDashboardView(unittest.TestCase):
+    def test_event_updates_row_in_place(self):
+        from textual.widgets import DataTable, ContentSwitcher
+        from src.tui_app import EDATuiApp
+
+        db = FakeDatabase()
+
+        async def run():
+            app = EDATuiApp()
+            async with app.run_test() as pilot:
+                app.query_one("#main_content", ContentSwitcher).current = "view_dashboard"
+                view = app.query_one("#view_dashboard")
+                table = app.query_one("#dash_muster", DataTable)
+                for _ in range(40):
+                    await pilot.pause(0.05)
+                    if table.row_count:
+                        break
+                self.assertEqual(table.row_count, 2)
+                self.assertEqual(table.get_cell("1", "muster"), "0/20")
+
+                db.courses[1] = course(1, 'TAC-101', 20, recorded=5)
+                view.dashboard.on_change('attendance', 'INSERT', {'course_id': [1]})
+                for _ in range(40):
+                    await pilot.pause(0.05)
+                    if table.get_cell("1", "muster") == "5/20":
+                        break
+                self.assertEqual(table.get_cell("1", "muster"), "5/20")
+                self.assertEqual(table.get_cell("1", "pct"), "25%")
+
+        with patch('src.live_dashboard.execute_query', db), \
+                patch('src.tui_app.execute_query', return_value=[]), \
+                patch('src.tui_app.start_change_listener'), \
+                patch('src.tui_app.cache_info', return_value={'listener_connected': True}):
+            asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
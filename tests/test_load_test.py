@@ -0,0 +1,72 @@
+import os
+import json
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+from scripts import load_test
+from scripts.load_test import LockSampler, error_counts
+
+
+def fake_query(query, params=None, fetch=False):
+    """Answers the fixture, view and pg_stat_database queries the load test runs."""
+    if 'FROM students WHERE email' in query:
+        return [{'student_id': 1, 'email': 'a@eda.mil', 'last_name': 'Hale'}]
+    if 'FROM courses ORDER BY' in query:
+        return [{'course_code': 'TAC-101'}]
+    if 'FROM enrollments e' in query:
+        return [{'email': 'a@eda.mil', 'course_code': 'TAC-101'}]
+    if 'MAX(start_date)' in query:
+        return [{'last_start': date(2026, 1, 5)}]
+    if 'pg_stat_database' in query:
+        return [{'deadlocks': 0, 'xact_commit': 10, 'xact_rollback': 0}]
+    return []
+
+
+class TestLoadTest(unittest.TestCase):
+    def test_lock_sampler_summary(self):
+        sampler = LockSampler(interval=0.1)
+        self.assertEqual(sampler.summary(), {})
+        sampler.samples = [
+            {'waiting_locks': 0, 'waiting_backends': 0, 'lock_wait_sessions': 0},
+            {'waiting_locks': 4, 'waiting_backends': 2, 'lock_wait_sessions': 2},
+            {'waiting_locks': 2, 'waiting_backends': 1, 'lock_wait_sessions': 1},
+            {'waiting_locks': 0, 'waiting_backends': 0, 'lock_wait_sessions': 0},
+        ]
+        summary = sampler.summary()
+        self.assertEqual(summary['max_waiting_locks'], 4)
+        self.assertEqual(summary['avg_waiting_locks'], 1.5)
+        self.assertEqual(summary['max_waiting_backends'], 2)
+        self.assertEqual(summary['pct_samples_with_waits'], 50.0)
+
+    @patch('scripts.load_test.instrumentation.get_stats')
+    def test_error_counts_sums_sqlstates(self, mock_stats):
+        mock_stats.return_value = {
+            'a': {'errors': {'40P01': 2, '23505': 1}},
+            'b': {'errors': {'40P01': 1}},
+            'c': {'errors': {}},
+        }
+        self.assertEqual(error_counts(), {'40P01': 3, '23505': 1})
+
+    @patch('scripts.load_test.get_db_connection', return_value=None)
+    @patch('scripts.load_test.controllers')
+    @patch('scripts.load_test.execute_query', side_effect=fake_query)
+    @patch('scripts.benchmark_suite.execute_query', side_effect=fake_query)
+    def test_main_runs_a_stage(self, mock_fixtures, mock_query, mock_controllers, mock_conn):
+        # load_fixtures is shared with the benchmark suite; a change to it must not break this script
+        mock_controllers.mark_attendance.return_value = True
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'load.json')
+            argv = ['load_test', '--stages', '1', '--stage-seconds', '0.05', '--seed', '1',
+                    '--mix', 'mark_attendance=1', '--output', output]
+            with patch('sys.argv', argv), patch('scripts.load_test.log'):
+                load_test.main()
+            with open(output, encoding='utf-8') as f:
+                stage = json.load(f)['stages'][0]
+        self.assertEqual(stage['concurrency'], 1)
+        self.assertGreater(stage['latency']['mark_attendance']['runs'], 0)
+        self.assertEqual(mock_controllers.mark_attendance.call_args[0][:2], ('a@eda.mil', 'TAC-101'))
+
+
+if __name__ == '__main__':
+    unittest.main()
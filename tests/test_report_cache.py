@@ -0,0 +1,86 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from src import report_cache
+
+VERSIONS = {'mv_course_avg_grades': '2026-01-05 06:00:00', 'enrollments': '3:40:90', 'courses': '1:8:8'}
+
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {'REPORT_CACHE_DIR': os.path.join(self.tmp.name, 'cache'),
+                                           'REPORT_CACHE': '1'})
+        self.env.start()
+        self.out = os.path.join(self.tmp.name, 'reports', 'course_grit.pdf')
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def render(self, text='pdf-bytes'):
+        def generate():
+            os.makedirs(os.path.dirname(self.out), exist_ok=True)
+            with open(self.out, 'w') as f:
+                f.write(text)
+        return MagicMock(side_effect=generate)
+
+    def test_key_tracks_data_params_and_date(self):
+        key = report_cache.cache_key('grit', 'pdf', {'since': None}, VERSIONS)
+        self.assertEqual(key, report_cache.cache_key('grit', 'pdf', {}, dict(VERSIONS, students='1:1:1')))
+        self.assertNotEqual(key, report_cache.cache_key('grit', 'pdf', {}, dict(VERSIONS, enrollments='4:41:131')))
+        self.assertNotEqual(key, report_cache.cache_key('grit', 'csv', {}, VERSIONS))
+        self.assertIsNone(report_cache.cache_key('transcript', 'pdf', {}, VERSIONS))
+        self.assertIsNone(report_cache.cache_key('grit', 'pdf', {}, None))
+        # A company transfer recounts company_readiness_summary without touching performance_summary
+        ledger = {'performance_summary': '9:90:400', 'companies': '1:2:2', 'students': '5:60:200'}
+        self.assertNotEqual(report_cache.cache_key('ledger', 'pdf', {}, ledger),
+                            report_cache.cache_key('ledger', 'pdf', {}, dict(ledger, students='6:61:261')))
+
+    def test_generate_cached_hit_skips_generator(self):
+        first = self.render()
+        self.assertEqual(report_cache.generate_cached('grit', 'pdf', {}, [self.out], first, VERSIONS), 'stored')
+        os.remove(self.out)
+
+        second = self.render('never')
+        self.assertEqual(report_cache.generate_cached('grit', 'pdf', {}, [self.out], second, VERSIONS), 'hit')
+        second.assert_not_called()
+        with open(self.out) as f:
+            self.assertEqual(f.read(), 'pdf-bytes')
+
+        changed = dict(VERSIONS, enrollments='4:41:131')
+        self.assertEqual(report_cache.generate_cached('grit', 'pdf', {}, [self.out], second, changed), 'stored')
+        second.assert_called_once()
+
+    def test_failed_generation_is_not_cached(self):
+        nothing = MagicMock()
+        self.assertEqual(report_cache.generate_cached('grit', 'pdf', {}, [self.out], nothing, VERSIONS), 'miss')
+        self.assertEqual(report_cache.stats()['entries'], 0)
+
+    def test_lru_eviction(self):
+        for i in range(3):
+            self.render('x' * 1000)()
+            report_cache.store(f'key{i}', [self.out])
+            stamp = time.time() - 100 + i
+            os.utime(os.path.join(os.environ['REPORT_CACHE_DIR'], f'key{i}'), (stamp, stamp))
+        # Touch the oldest entry so key1 becomes least recently used
+        self.assertTrue(report_cache.lookup('key0', [self.out]))
+        self.assertEqual(report_cache.evict(2000), 1)
+        remaining = sorted(os.listdir(os.environ['REPORT_CACHE_DIR']))
+        self.assertEqual(remaining, ['key0', 'key2'])
+
+    @patch('src.report_cache.get_db_connection')
+    def test_data_versions(self, mock_conn):
+        cur = mock_conn.return_value.cursor.return_value.__enter__.return_value
+        cur.fetchall.return_value = [{'table_name': 'courses', 'version': '1:8:8'},
+                                     {'table_name': 'mv_course_avg_grades', 'version': '2026-01-05 06:00:00'}]
+        versions = report_cache.data_versions(['courses', 'mv_course_avg_grades', 'courses', 'enrollments'])
+        self.assertEqual(versions, {'courses': '1:8:8', 'mv_course_avg_grades': '2026-01-05 06:00:00'})
+        self.assertEqual(cur.execute.call_args[0][1], {'tables': ['courses', 'enrollments', 'mv_course_avg_grades']})
+        mock_conn.return_value.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
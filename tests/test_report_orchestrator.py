@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+from unittest.mock import patch, MagicMock
+from src import report_orchestrator
+from src.report_orchestrator import run_report_pack
+
+LEDGER_ROWS = [{'company_name': 'Alpha', 'commanding_officer': 'Maj. Reyes', 'avg_gpa': 3.1,
+                'good_count': 40, 'total_students': 50}]
+GRIT_ROWS = [{'department': 'TAC', 'a_bucket': 5, 'b_bucket': 8, 'c_bucket': 3, 'd_f_bucket': 1, 'enrollments': 17,
+              'total_enrollments': 17, 'failed_count': 1, 'data_as_of': datetime(2025, 1, 6, 5, 0)}]
+ROLLUP_ROWS = [{'muster_date': date(2025, 1, 6), 'course_id': 1, 'course_code': 'TAC-101', 'course_name': 'Tactics',
+                'present_count': 20, 'late_count': 1, 'awol_count': 0, 'absent_count': 1, 'excused_count': 0,
+                'total_records': 22}]
+EXCEPTION_ROWS = [{'muster_date': date(2025, 1, 6), 'student_id': 7, 'service_number': 'EDA-7', 'first_name': 'Ana',
+                   'last_name': 'Ruiz', 'course_code': 'TAC-101', 'status': 'Absent', 'recorded_by': 'sgt',
+                   'remarks': None}]
+
+
+def fake_connection():
+    """Connection stand-in whose cursor answers by query text."""
+    def execute(sql, params=None):
+        if 'table_changes' in sql:
+            cur.fetchall.return_value = [{'table_name': t, 'version': '3:40:90'} for t in params['tables']]
+        elif 'attrition_risk' in sql:
+            raise Exception('relation "attrition_risk" does not exist')
+        elif 'company_readiness_summary' in sql:
+            cur.fetchall.return_value = LEDGER_ROWS
+        elif 'mv_course_avg_grades' in sql:
+            cur.fetchall.return_value = GRIT_ROWS
+        elif 'vw_attendance_report' in sql:
+            cur.fetchall.return_value = ROLLUP_ROWS
+        else:
+            cur.fetchall.return_value = EXCEPTION_ROWS
+
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.execute.side_effect = execute
+    return conn
+
+
+def fake_pool():
+    """ThreadedConnectionPool stand-in handing out independent connections."""
+    pool = MagicMock()
+    pool.getconn.side_effect = lambda: fake_connection()
+    return pool
+
+
+class TestReportOrchestrator(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        os.environ.pop('REPORT_CACHE_DIR', None)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    @patch('src.report_orchestrator.get_db_config', return_value={})
+    @patch('src.report_orchestrator.ThreadedConnectionPool')
+    def test_pack_isolates_failures(self, mock_pool_cls, mock_config):
+        mock_pool_cls.return_value = pool = fake_pool()
+        result = run_report_pack(query_workers=2, render_workers=2)
+        status = {r['name']: r['status'] for r in result['reports']}
+        self.assertEqual(status, {'ledger': 'ok', 'watchlist': 'failed', 'grit': 'ok', 'muster': 'ok'})
+        watchlist = next(r for r in result['reports'] if r['name'] == 'watchlist')
+        self.assertIn('Query failed', watchlist['error'])
+        self.assertIsNone(watchlist['render_s'])
+        for name in ('ledger', 'grit', 'muster'):
+            for path in report_orchestrator.report_outputs(name, 'pdf'):
+                self.assertTrue(os.path.isfile(path), path)
+        pool.closeall.assert_called_once()
+        self.assertEqual(pool.getconn.call_count, pool.putconn.call_count)
+
+        # Same counters: the successful reports come from the cache, the failed one is retried
+        mock_pool_cls.return_value = pool = fake_pool()
+        result = run_report_pack(query_workers=2, render_workers=2)
+        cached = {r['name']: r['cached'] for r in result['reports']}
+        self.assertEqual(cached, {'ledger': True, 'watchlist': False, 'grit': True, 'muster': True})
+        self.assertEqual(pool.getconn.call_count, 2)  # counters read + watchlist query
+
+    def test_render_reports_missing_output(self):
+        ok, _, output = report_orchestrator.render_report('grit', 'csv', [[]])
+        self.assertFalse(ok)
+        self.assertIn('No data', output)
+
+    def test_report_queries(self):
+        (rollup, params), (exceptions, _) = report_orchestrator.report_queries('muster', since='2025-01-01')
+        self.assertIn('muster_date >= %s', rollup)
+        self.assertEqual(params, ('2025-01-01',))
+        self.assertEqual(report_orchestrator.report_queries('watchlist', window_days=14)[0][1], (14,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from datetime import date
+from unittest.mock import MagicMock
+import numpy as np
+from src.risk_scoring import score, write_assessments, MODEL_VERSION
+
+
+def make_features(**overrides):
+    # Two students: one healthy, one struggling on every factor
+    features = {
+        'student_id': np.array([1, 2], dtype=np.int64),
+        'gpa': np.array([3.6, 1.2]),
+        'total_credits': np.array([30.0, 12.0]),
+        'present_all': np.array([95.0, 50.0]),
+        'sessions_all': np.array([100.0, 100.0]),
+        'present_recent': np.array([10.0, 2.0]),
+        'sessions_recent': np.array([10.0, 10.0]),
+        'grade_recent': np.array([85.0, 45.0]),
+        'grade_prior': np.array([82.0, 70.0]),
+        'failed_courses': np.array([0.0, 1.0]),
+        'withdrawn_courses': np.array([0.0, 1.0]),
+        'active_courses': np.array([3.0, 1.0]),
+    }
+    features.update({k: np.asarray(v) for k, v in overrides.items()})
+    return features
+
+
+class TestRiskScoring(unittest.TestCase):
+    def test_score_levels_and_factors(self):
+        result = score(make_features())
+        self.assertEqual(result['risk_score'][0], 0.0)
+        self.assertEqual(result['risk_level'][0], 'Low')
+        self.assertEqual(result['contributing_factors'][0], 'No significant factors')
+
+        self.assertEqual(result['risk_level'][1], 'Critical')
+        self.assertLessEqual(result['risk_score'][1], 100.0)
+        for factor in ('Low GPA', 'Low attendance', 'Declining attendance', 'Declining grades'):
+            self.assertIn(factor, result['contributing_factors'][1])
+
+    def test_score_handles_missing_data(self):
+        # No GPA, no attendance and no grades yet: only the missing-GPA half weight applies
+        nan = np.array([np.nan, np.nan])
+        zero = np.array([0.0, 0.0])
+        result = score(make_features(gpa=nan, present_all=zero, sessions_all=zero,
+                                     present_recent=zero, sessions_recent=zero,
+                                     grade_recent=nan, grade_prior=nan,
+                                     failed_courses=zero, withdrawn_courses=zero))
+        np.testing.assert_array_equal(result['risk_score'], [17.5, 17.5])
+        self.assertTrue(np.all(result['risk_level'] == 'Low'))
+
+    def test_write_assessments_copies_rows(self):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        captured = {}
+        cur.copy_expert.side_effect = lambda sql, buf: captured.setdefault('csv', buf.read())
+
+        features = make_features()
+        written = write_assessments(conn, features['student_id'], score(features), date(2024, 5, 1))
+
+        self.assertEqual(written, 2)
+        cur.execute.assert_called_once()
+        self.assertEqual(cur.execute.call_args[0][1], (date(2024, 5, 1), MODEL_VERSION))
+        lines = captured['csv'].strip().splitlines()
+        self.assertEqual(lines[0], f"1,2024-05-01,0.00,Low,No significant factors,{MODEL_VERSION}")
+        self.assertTrue(lines[1].startswith("2,2024-05-01,"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -47,5 +47,65 @@ class TestDataIntegrity(unittest.TestCase):
         res = execute_query(sql, fetch=True)
         self.assertEqual(len(res), 0, f"Found invalid emails: {res}")
 
+    def test_attendance_counters_match_attendance(self):
+        """Running/all-time counters agree with the attached attendance rows"""
+        sql = """
+            SELECT a.student_id, a.course_id
+            FROM (
+                SELECT student_id, course_id, MAX(muster_date) AS last_date,
+                       COUNT(*) FILTER (WHERE status = 'Present') AS present, COUNT(*) AS total
+                FROM attendance
+                GROUP BY student_id, course_id
+            ) a
+            FULL JOIN attendance_counter_totals t
+              ON t.student_id = a.student_id AND t.course_id = a.course_id
+            LEFT JOIN attendance_rolling_counters r
+              ON r.student_id = a.student_id AND r.course_id = a.course_id AND r.muster_date = a.last_date
+            WHERE CASE WHEN a.student_id IS NULL
+                       -- only pairs whose attendance is all archived
+                       THEN t.archived_total = 0
+                            OR (t.present_count, t.total_count) <> (t.archived_present, t.archived_total)
+                       ELSE t.student_id IS NULL
+                            OR t.present_count - t.archived_present <> a.present
+                            OR t.total_count - t.archived_total <> a.total
+                            OR (r.cum_present, r.cum_total) IS DISTINCT FROM (t.present_count, t.total_count)
+                  END;
+        """
+        res = execute_query(sql, fetch=True)
+        self.assertEqual(len(res), 0, f"Attendance counters out of step: {res}")
+
+    def test_company_readiness_matches_performance_summary(self):
+        """Trigger-maintained readiness totals agree with performance_summary"""
+        sql = """
+            SELECT COALESCE(r.company_id, p.company_id) AS company_id
+            FROM company_readiness_summary r
+            FULL JOIN (
+                SELECT s.company_id, COUNT(*) AS students, COUNT(ps.gpa) AS graded,
+                       COALESCE(SUM(ps.gpa), 0) AS gpa_sum,
+                       COUNT(*) FILTER (WHERE ps.current_standing ILIKE 'Good%') AS good
+                FROM performance_summary ps
+                JOIN students s ON s.student_id = ps.student_id
+                WHERE s.company_id IS NOT NULL
+                GROUP BY s.company_id
+            ) p ON p.company_id = r.company_id
+            WHERE (COALESCE(r.student_count, 0), COALESCE(r.graded_count, 0),
+                   COALESCE(r.gpa_sum, 0), COALESCE(r.good_count, 0))
+                  IS DISTINCT FROM
+                  (COALESCE(p.students, 0), COALESCE(p.graded, 0), COALESCE(p.gpa_sum, 0), COALESCE(p.good, 0));
+        """
+        res = execute_query(sql, fetch=True)
+        self.assertEqual(len(res), 0, f"Company readiness out of step: {res}")
+
+    def test_rebuild_company_readiness(self):
+        """Rebuild counts every company with students (not committed)"""
+        sql = """
+            SELECT sp_rebuild_company_readiness() AS companies,
+                   (SELECT COUNT(DISTINCT s.company_id)
+                    FROM performance_summary ps
+                    JOIN students s ON s.student_id = ps.student_id) AS expected;
+        """
+        res = execute_query(sql, fetch=True)
+        self.assertEqual(res[0]['companies'], res[0]['expected'])
+
 if __name__ == '__main__':
     unittest.main()